@@ -9,6 +9,8 @@ import streamlit.components.v1 as components
 import time
 import textwrap
 import drive_sync # [NEW] 동기화 모듈
+import tracing # [PERF] 리런 구간 추적
+import metrics # [PERF] 운영 지표 (Prometheus)
 import io
 
 # --- 화면 렌더링 함수 (메인 진입점) ---
@@ -20,21 +22,36 @@ def main():
         initial_sidebar_state="expanded" 
     )
 
-    # [NEW] 앱 시작 시 DB 복구 (클라우드 배포 대응)
-    # voca.db가 없으면 구글 드라이브에서 가져옴 -> [FIX] 항상 최신 상태 유지를 위해 세션 시작 시 1회 동기화 시도
-    if 'db_synced' not in st.session_state:
-        with st.spinner("☁️ 서버 데이터(Google Drive)와 동기화 중..."):
-            if drive_sync.download_db_from_drive():
-                st.toast("✅ 최신 데이터 로드 완료")
-            else:
-                # 드라이브에 파일이 없거나(최초) 실패 시
-                # 로컬에 파일이 있으면 그거라도 씀
-                if not os.path.exists("voca.db"):
-                    st.toast("⚠️ 서버 데이터 없음 (새 DB 생성 예정)")
+    # 운영 지표 내보내기 스레드 (프로세스당 1회, metrics.METRICS_* 설정이 없으면 아무것도 안 함)
+    metrics.start_exporters()
+
+    with tracing.rerun(st.session_state.get('page', 'login')):
+        with tracing.span("db_sync"):
+            # [NEW] 앱 시작 시 DB 복구 (클라우드 배포 대응)
+            # voca.db가 없으면 구글 드라이브에서 가져옴
+            # -> [PERF] 프로세스당 1회만 동기화 (드라이브 파일이 마지막 동기화 이후 바뀐 경우에만 다운로드)
+            #    새 브라우저 세션은 첫 결과를 재사용하므로 다른 학생이 쓰는 중인 DB를 덮어쓰지 않음
+            if 'db_synced' not in st.session_state:
+                with st.spinner("☁️ 서버 데이터(Google Drive)와 동기화 중..."):
+                    sync_result = drive_sync.sync_db_once()
+                if sync_result in ('downloaded', 'up_to_date'):
+                    st.toast("✅ 최신 데이터 로드 완료")
                 else:
-                    st.toast("⚠️ 동기화 실패 (로컬 데이터 사용)")
-        st.session_state.db_synced = True
+                    # 드라이브에 파일이 없거나(최초) 실패 시
+                    # 로컬에 파일이 있으면 그거라도 씀
+                    if not os.path.exists("voca.db"):
+                        st.toast("⚠️ 서버 데이터 없음 (새 DB 생성 예정)")
+                    else:
+                        st.toast("⚠️ 동기화 실패 (로컬 데이터 사용)")
+                st.session_state.db_synced = True
+
+        inject_global_css()
+        inject_ui_cleaner_js()
+        route_page()
 
+@tracing.traced("inject_css")
+def inject_global_css():
+    """앱 전역 CSS (배포 버튼/툴바 등 Streamlit 기본 UI 숨김)"""
     st.markdown("""
         <style>
             .stDeployButton { display: none !important; visibility: hidden !important; }
@@ -88,7 +105,9 @@ def main():
         </style>
     """, unsafe_allow_html=True)
 
-    # [NEW] 새로고침/뒤로가기 방지 및 하단 버튼 강제 제거 스크립트
+@tracing.traced("inject_js")
+def inject_ui_cleaner_js():
+    """CSS 만으로 숨겨지지 않는 Streamlit Cloud UI 를 주기적으로 제거하는 스크립트"""
     components.html("""
         <script>
             // 1. 뒤로가기 방지 (History Trap)
@@ -158,7 +177,8 @@ def main():
             setInterval(killStreamlitUI, 300);
         </script>
     """, height=0)
-    
+
+def route_page():
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
     
@@ -188,7 +208,7 @@ def main():
                 # 여기서는 로그인/초기진입 시점을 타겟팅.
                 
                 # pending_session이 있고, 아직 복구 시도를 안 했으며, 현재 페이지가 대시보드(기본)일 때
-                if user_info and user_info.get('pending_session') and str(user_info.get('pending_session')).strip():
+                if user_info and utils.has_pending_session(st.session_state.username):
                      # 단순히 여기로 리다이렉트하면 홈으로 가고 싶을 때 못 갈 수 있음.
                      # 따라서 세션 상태에 'session_restored' 플래그를 두어 1회만 실행
                      if not st.session_state.get('session_restored', False):
@@ -210,6 +230,7 @@ def check_answer_callback(username, curr_q, target, today):
 
     if user_input:
         is_correct = user_input.lower() == target.lower()
+        metrics.ANSWERS.inc(result="correct" if is_correct else "wrong")
         
         # [속도 개선] API 호출 제거 -> 메모리 버퍼링 및 로컬 상태 관리
         if is_correct:
@@ -221,6 +242,8 @@ def check_answer_callback(username, curr_q, target, today):
                  return
 
             # [FIX] 정답을 맞췄으면 모드와 상관없이 즉시 Pending 목록에서 제거 (무한 루프 방지)
+            wrongs_remove = []
+            session_remove = []
             
             # 1. 오답 노트(Pending Wrongs) 제거
             if 'pending_wrongs_local' not in st.session_state: st.session_state.pending_wrongs_local = set()
@@ -229,23 +252,18 @@ def check_answer_callback(username, curr_q, target, today):
             q_id = curr_q.get('id')
             if q_id and q_id in st.session_state.pending_wrongs_local:
                 st.session_state.pending_wrongs_local.remove(q_id)
-                # 즉시 DB 동기화
-                new_wrongs_str = ",".join(str(x) for x in st.session_state.pending_wrongs_local)
-                utils.update_user_dynamic_fields(username, {'pending_wrongs': new_wrongs_str})
+                wrongs_remove.append(q_id)
             
             # 2. 진행 중인 세션(Pending Session) 제거
             if 'pending_session_local' not in st.session_state: st.session_state.pending_session_local = set()
             if q_id and q_id in st.session_state.pending_session_local:
                 st.session_state.pending_session_local.remove(q_id)
-                # 즉시 DB 동기화
-                new_session_str = ",".join(str(x) for x in st.session_state.pending_session_local)
-                utils.update_user_dynamic_fields(username, {'pending_session': new_session_str})
+                session_remove.append(q_id)
 
             # [FIX] (D) 통계 왜곡 방지: 정규 학습(normal) 모드일 때만 평가용 로그 기록
+            log_row = None
             if st.session_state.is_first_attempt and st.session_state.get("quiz_mode") == "normal":
                 # [CHANGE] 즉시 DB 저장 (중단 시 데이터 유실 방지)
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
                 # [SAFETY] ID 유효성 검사 및 복구 (Stale Data 방지)
                 q_level = curr_q.get('level')
                 
@@ -265,27 +283,25 @@ def check_answer_callback(username, curr_q, target, today):
                         print(f"Recovery Error: {e}")
 
                 if q_id is not None:
-                    # 로그 포맷: [timestamp, date, word_id, username, level, is_correct]
-                    row = [timestamp, str(today), int(q_id), username, int(q_level) if q_level else 1, 1]
-                    utils.batch_log_study_results([row]) # 버퍼링 없이 즉시 저장
-                    
-                    # [FIX] 단어 통계(total_try) 업데이트
-                    utils.update_word_stats(q_id, True)
+                    # 로그 포맷: [ts, word_id, username, level, is_correct] (학습일은 ts에서 계산)
+                    # 단어 통계(total_try)도 함께 반영됨
+                    log_row = utils.make_log_row(q_id, username, int(q_level) if q_level else 1, True, today)
 
             # [속도 개선] 메모리 상의 progress_df 사용
             if 'user_progress_df' not in st.session_state:
                 st.session_state.user_progress_df = utils.load_user_progress(username)
             
+            progress_df = None
             if st.session_state.is_first_attempt and st.session_state.get("quiz_mode") == "normal":
                 # ID가 유효할 때만 실행
                 if q_id is not None:
                     st.session_state.user_progress_df = utils.update_schedule(q_id, True, st.session_state.user_progress_df, today)
-                    # [CHANGE] 진도표 즉시 저장 (단일 행 최적화)
-                    try:
-                        target_row = st.session_state.user_progress_df[st.session_state.user_progress_df['word_id'] == q_id].iloc[0]
-                        utils.save_progress_single(username, q_id, target_row)
-                    except Exception as e:
-                        print(f"Save Error: {e}")
+                    progress_df = st.session_state.user_progress_df
+
+            # [속도 개선] 로그 / 단어 통계 / 오답·세션 목록 / 진도표를 한 트랜잭션으로 즉시 저장
+            if q_id is not None and (log_row or progress_df is not None or wrongs_remove or session_remove):
+                utils.record_answer(username, q_id, True, log_row=log_row, progress_df=progress_df,
+                                    wrongs_remove=wrongs_remove, session_remove=session_remove)
             
             st.session_state.quiz_state = "success"
             st.session_state.last_result = "correct"
@@ -302,6 +318,8 @@ def give_up_callback(username, curr_q, today):
     if curr_q is None:
         return
     
+    metrics.ANSWERS.inc(result="give_up")
+
     # [NEW] 이미 check_answer에서 실패 처리된 경우 중복 로깅 방지
     if st.session_state.is_first_attempt:
         
@@ -323,44 +341,35 @@ def give_up_callback(username, curr_q, today):
                 print(f"Recovery Error: {e}")
 
         if q_id is not None:
-            # 1. 학습 로그 (오답=0) - [FIX] (D) 정규 모드일 때만 기록
+            # 1. 학습 로그 (오답=0) - [FIX] (D) 정규 모드일 때만 기록 (단어 통계 total_try, total_wrong 포함)
+            log_row = None
             if st.session_state.get("quiz_mode") == "normal":
-                # [CHANGE] 즉시 DB 저장
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                row = [timestamp, str(today), int(q_id), username, int(q_level) if q_level else 1, 0]
-                utils.batch_log_study_results([row])
-                
-                # [FIX] 단어 통계(total_try, total_wrong) 업데이트
-                utils.update_word_stats(q_id, False)
+                log_row = utils.make_log_row(q_id, username, int(q_level) if q_level else 1, False, today)
             
             # 2. 오답 노트 추가
             if 'pending_wrongs_local' not in st.session_state: st.session_state.pending_wrongs_local = set()
             st.session_state.pending_wrongs_local.add(q_id)
-            # [FIX] 즉시 DB 동기화
-            new_wrongs_str = ",".join(str(x) for x in st.session_state.pending_wrongs_local)
-            utils.update_user_dynamic_fields(username, {'pending_wrongs': new_wrongs_str})
             
             # 3. 세션 목록에서 제거 (완료됨)
+            session_remove = []
             if 'pending_session_local' not in st.session_state: st.session_state.pending_session_local = set()
             if st.session_state.get("quiz_mode") == "normal":
                 if q_id in st.session_state.pending_session_local:
                     st.session_state.pending_session_local.remove(q_id)
-                    # [FIX] 즉시 DB 동기화
-                    new_session_str = ",".join(str(x) for x in st.session_state.pending_session_local)
-                    utils.update_user_dynamic_fields(username, {'pending_session': new_session_str})
+                    session_remove.append(q_id)
 
             # 4. 진도표 업데이트 (Fail)
             if 'user_progress_df' not in st.session_state:
                 st.session_state.user_progress_df = utils.load_user_progress(username)
                 
+            progress_df = None
             if st.session_state.get("quiz_mode") == "normal":
                 st.session_state.user_progress_df = utils.update_schedule(q_id, False, st.session_state.user_progress_df, today)
-                # [CHANGE] 진도표 즉시 저장 (단일 행 최적화)
-                try:
-                    target_row = st.session_state.user_progress_df[st.session_state.user_progress_df['word_id'] == q_id].iloc[0]
-                    utils.save_progress_single(username, q_id, target_row)
-                except Exception as e:
-                    print(f"Save Error: {e}")
+                progress_df = st.session_state.user_progress_df
+
+            # [속도 개선] 위 변경 사항을 한 트랜잭션으로 즉시 저장
+            utils.record_answer(username, q_id, False, log_row=log_row, progress_df=progress_df,
+                                wrongs_add=[q_id], session_remove=session_remove)
         
     # 5. 오답 리스트 추가 (재학습용) - 중복 방지
     if 'wrong_answers' not in st.session_state: st.session_state.wrong_answers = []
@@ -504,7 +513,19 @@ def go_next_question():
     st.session_state.retry_mode = False
 
 def handle_session_end(username, progress_df, today):
-    df = utils.load_data()
+    # 레벨 평가 화면/오답 복습 후에도 다시 호출되므로 세트당 1회만 집계
+    if st.session_state.pop('quiz_session_open', False):
+        metrics.SESSIONS_FINISHED.inc()
+
+    # Write-Behind 모드: 레벨 평가 전에 대기 중인 답안이 DB에 반영되도록 대기
+    # (반영되지 않은 채로 평가하면 마지막 답안이 빠진 기록으로 레벨이 바뀔 수 있으므로 평가를 미룸)
+    with st.spinner("답안을 저장하는 중입니다..."):
+        answers_saved = utils.wait_for_pending_answers(timeout=30)
+    if not answers_saved:
+        st.warning("⚠️ 답안 저장이 지연되고 있어 레벨 평가를 잠시 미룹니다. 잠시 후 다시 시도해주세요. (답안은 안전하게 보관 중)")
+        if st.button("🔄 다시 시도", use_container_width=True):
+            st.rerun()
+        return
     user_info = utils.get_user_info(username)
     current_level = int(user_info['level']) if user_info and pd.notna(user_info['level']) else 1
     
@@ -521,20 +542,12 @@ def handle_session_end(username, progress_df, today):
             st.session_state.study_log_buffer = [] # 버퍼 비우기
             
         # 3. 상태 관리 (Pending Wrongs & Session) DB 동기화
-        updates = {}
-        
-        # Pending Wrongs
-        if 'pending_wrongs_local' in st.session_state:
-            new_wrongs_str = ",".join(str(x) for x in st.session_state.pending_wrongs_local)
-            updates['pending_wrongs'] = new_wrongs_str
-            
-        # Pending Session
-        if 'pending_session_local' in st.session_state:
-            new_session_str = ",".join(str(x) for x in st.session_state.pending_session_local)
-            updates['pending_session'] = new_session_str
-            
-        if updates:
-            utils.update_user_dynamic_fields(username, updates)
+        if 'pending_wrongs_local' in st.session_state or 'pending_session_local' in st.session_state:
+            utils.sync_pending_ids(
+                username,
+                st.session_state.get('pending_wrongs_local'),
+                st.session_state.get('pending_session_local')
+            )
 
     # 학습 로그 분석 (구글 시트)
     # [NEW] 방어 구간 & 연패 방지 로직 적용
@@ -542,8 +555,8 @@ def handle_session_end(username, progress_df, today):
     # 1. 현재 세션의 문제 수 확인
     session_qs_count = len(st.session_state.quiz_list) if 'quiz_list' in st.session_state else 0
     
-    # 데이터가 DB에 반영되었으므로 다시 로드 (캐시 무효화됨)
-    study_log_df = utils.load_study_log(username)
+    # 현재 레벨 최근 50문제 결과 (SQLite 롤링 카운터 - 전체 로그 로드 불필요)
+    recent_total, recent_correct = utils.get_recent_level_result(username, current_level)
     
     # 유저 최신 상태 가져오기
     # 캐시 갱신을 위해 force reload가 필요할 수 있으나, batch_log_study_results에서 bump했으므로 get_user_info도 갱신될 것임
@@ -559,86 +572,80 @@ def handle_session_end(username, progress_df, today):
     total_qs_accumulated = current_qs_count + session_qs_count
     
     if total_qs_accumulated >= 50:
-        # 평가 진행
-        # 최근 50개 로그 가져오기 (현재 레벨)
-        if not study_log_df.empty:
-            current_level_logs = study_log_df[study_log_df['level'] == current_level]
-            if len(current_level_logs) >= 50:
-                target_logs = current_level_logs.tail(50)
-                correct_count = target_logs['is_correct'].sum()
-                total_q = 50 # 고정
-                
-                new_level, new_streak, new_shield, msg = utils.evaluate_level_update(
-                    current_level, correct_count, total_q, fail_streak, level_shield
-                )
-                
-                # 나머지 카운트 (25개 풀었으면 5개 남김)
-                remainder_qs = total_qs_accumulated % 50
-                
-                # DB 업데이트
-                updates = {
-                    'level': new_level,
-                    'fail_streak': new_streak,
-                    'level_shield': new_shield,
-                    'qs_count': remainder_qs
-                }
-                utils.update_user_dynamic_fields(username, updates)
-                
-                # 결과 메시지 출력
-                if new_level != current_level:
-                    st.balloons()
-                    with st.container(border=True):
-                        st.markdown(f"<h1 style='text-align: center; color: #FFD700;'>LEVEL UPDATE</h1>", unsafe_allow_html=True)
-                        st.markdown(f"<h3 style='text-align: center;'>{msg}</h3>", unsafe_allow_html=True)
-                        st.write(f"Level {current_level} ➡ Level {new_level}")
-                        if st.button("확인", key="btn_lv_change", use_container_width=True):
-                            if st.session_state.wrong_answers:
-                                st.session_state.quiz_list = st.session_state.wrong_answers
-                                st.session_state.wrong_answers = []
-                                st.session_state.current_idx = 0
-                                st.session_state.retry_mode = False
-                                st.session_state.quiz_state = "answering"
-                                st.session_state.quiz_mode = "wrong_review"
-                                st.rerun()
-                            else:
-                                st.session_state.page = 'dashboard'
-                                st.rerun()
-                    return # 여기서 중단하고 사용자 반응 대기
-                else:
-                    # [CHANGE] 레벨 유지 시에도 명확한 결과 창 표시 (자동 넘어감 방지)
-                    with st.container(border=True):
-                        st.markdown(f"<h3 style='text-align: center;'>📊 레벨 평가 결과</h3>", unsafe_allow_html=True)
-                        st.info(msg)
-                        st.write(f"**Level {current_level} 유지**")
-                        st.caption(f"다음 평가까지: {50 - remainder_qs}문제")
-                        
-                        if st.button("확인", key="btn_lv_keep", use_container_width=True):
-                            if st.session_state.wrong_answers:
-                                st.session_state.quiz_list = st.session_state.wrong_answers
-                                st.session_state.wrong_answers = []
-                                st.session_state.current_idx = 0
-                                st.session_state.retry_mode = False
-                                st.session_state.quiz_state = "answering"
-                                st.session_state.quiz_mode = "wrong_review"
-                                st.rerun()
-                            else:
-                                st.session_state.page = 'dashboard'
-                                st.rerun()
-                    return
+        # 평가 진행 (현재 레벨 최근 50개 답안 기준)
+        if recent_total >= 50:
+            correct_count = recent_correct
+            total_q = 50 # 고정
+            
+            new_level, new_streak, new_shield, msg = utils.evaluate_level_update(
+                current_level, correct_count, total_q, fail_streak, level_shield
+            )
+            
+            # 나머지 카운트 (25개 풀었으면 5개 남김)
+            remainder_qs = total_qs_accumulated % 50
+            
+            # DB 업데이트
+            updates = {
+                'level': new_level,
+                'fail_streak': new_streak,
+                'level_shield': new_shield,
+                'qs_count': remainder_qs
+            }
+            utils.update_user_dynamic_fields(username, updates)
+            
+            # 결과 메시지 출력
+            if new_level != current_level:
+                st.balloons()
+                with st.container(border=True):
+                    st.markdown(f"<h1 style='text-align: center; color: #FFD700;'>LEVEL UPDATE</h1>", unsafe_allow_html=True)
+                    st.markdown(f"<h3 style='text-align: center;'>{msg}</h3>", unsafe_allow_html=True)
+                    st.write(f"Level {current_level} ➡ Level {new_level}")
+                    if st.button("확인", key="btn_lv_change", use_container_width=True):
+                        if st.session_state.wrong_answers:
+                            st.session_state.quiz_list = st.session_state.wrong_answers
+                            st.session_state.wrong_answers = []
+                            st.session_state.current_idx = 0
+                            st.session_state.retry_mode = False
+                            st.session_state.quiz_state = "answering"
+                            st.session_state.quiz_mode = "wrong_review"
+                            st.rerun()
+                        else:
+                            st.session_state.page = 'dashboard'
+                            st.rerun()
+                return # 여기서 중단하고 사용자 반응 대기
             else:
-                # 로그가 부족한 경우 (혹시 모를 예외)
-                 utils.update_user_dynamic_fields(username, {'qs_count': total_qs_accumulated})
+                # [CHANGE] 레벨 유지 시에도 명확한 결과 창 표시 (자동 넘어감 방지)
+                with st.container(border=True):
+                    st.markdown(f"<h3 style='text-align: center;'>📊 레벨 평가 결과</h3>", unsafe_allow_html=True)
+                    st.info(msg)
+                    st.write(f"**Level {current_level} 유지**")
+                    st.caption(f"다음 평가까지: {50 - remainder_qs}문제")
+                    
+                    if st.button("확인", key="btn_lv_keep", use_container_width=True):
+                        if st.session_state.wrong_answers:
+                            st.session_state.quiz_list = st.session_state.wrong_answers
+                            st.session_state.wrong_answers = []
+                            st.session_state.current_idx = 0
+                            st.session_state.retry_mode = False
+                            st.session_state.quiz_state = "answering"
+                            st.session_state.quiz_mode = "wrong_review"
+                            st.rerun()
+                        else:
+                            st.session_state.page = 'dashboard'
+                            st.rerun()
+                return
         else:
-             utils.update_user_dynamic_fields(username, {'qs_count': total_qs_accumulated})
+            # 로그가 부족한 경우 (레벨 변경 직후 등)
+            utils.update_user_dynamic_fields(username, {'qs_count': total_qs_accumulated})
              
     else:
         # 평가 기준 미달 -> 카운트만 누적
         utils.update_user_dynamic_fields(username, {'qs_count': total_qs_accumulated})
         st.success(f"📈 레벨 평가 진행 중: {total_qs_accumulated} / 50 문제")
 
-    # [NEW] 데이터 자동 백업 (비동기 처리처럼 보이게 맨 마지막에)
-    if drive_sync.upload_db_to_drive():
-        st.toast("☁️ 학습 기록이 안전하게 저장되었습니다.")
+    # [NEW] 데이터 자동 백업 -> [PERF] 백그라운드 업로드 (학습 기록은 이미 로컬 DB에 저장됨)
+    drive_sync.schedule_upload()
+    st.toast("💾 학습 기록이 저장되었습니다. (드라이브 백업은 잠시 후 자동 진행)")
 
     # 세트 완료 화면
     batch_size = st.session_state.get('batch_size', 5)
@@ -734,7 +741,7 @@ def show_login_page():
                     result = utils.register_user(new_user, new_password, new_realname)
                     if result == "SUCCESS":
                         # [NEW] 가입 정보 즉시 백업
-                        drive_sync.upload_db_to_drive()
+                        drive_sync.schedule_upload()
                         
                         st.session_state.signup_success_popup = True
                         st.rerun()
@@ -763,6 +770,20 @@ def show_login_page():
     # [MOBILE KEYBOARD FIX] 하단 여백 추가 (키보드가 올라왔을 때 스크롤 가능하도록)
     st.markdown("<div style='height: 40vh;'></div>", unsafe_allow_html=True)
 
+def show_snapshot_status(key):
+    """관리자 통계 스냅샷 기준 시각 표시 + 즉시 갱신 버튼"""
+    age = utils.get_analytics_snapshot_age()
+    c_info, c_btn = st.columns([4, 1])
+    if age is None:
+        c_info.caption("📸 통계 스냅샷 없음 (실시간 DB 기준)")
+    elif age < 60:
+        c_info.caption(f"📸 통계 스냅샷 기준: {int(age)}초 전")
+    else:
+        c_info.caption(f"📸 통계 스냅샷 기준: {int(age // 60)}분 전")
+    if c_btn.button("🔄 최신화", key=key, use_container_width=True):
+        utils.refresh_analytics_snapshot()
+        st.rerun()
+
 def show_admin_page():
     st.title("👨‍🏫 선생님 관리 대시보드 (DB 연동됨)")
     
@@ -773,7 +794,7 @@ def show_admin_page():
     st.divider()
     
     # [CHANGE] 탭 구조 변경 (단어 DB 관리 추가)
-    tab1, tab2, tab_stats, tab3, tab4, tab5, tab6 = st.tabs(["👥 학생 관리", "🏆 학습 랭킹", "📊 학습 통계", "📚 단어 DB 관리", "⚖️ 레벨 자동 조정", "⚙️ 시스템 설정", "💾 DB 백업/복구"])
+    tab1, tab2, tab_stats, tab3, tab4, tab5, tab6, tab_perf = st.tabs(["👥 학생 관리", "🏆 학습 랭킹", "📊 학습 통계", "📚 단어 DB 관리", "⚖️ 레벨 자동 조정", "⚙️ 시스템 설정", "💾 DB 백업/복구", "🩺 DB 성능"])
     
     with tab1:
         users = utils.get_all_users()
@@ -825,7 +846,7 @@ def show_admin_page():
                         else:
                             res = utils.update_student_info(selected_user_id, new_id, new_name, new_level)
                             if res == "SUCCESS":
-                                drive_sync.upload_db_to_drive() # [NEW] 백업
+                                drive_sync.schedule_upload() # [NEW] 백업
                                 st.success("✅ 학생 정보가 수정되었습니다.")
                                 time.sleep(1)
                                 st.rerun()
@@ -863,7 +884,7 @@ def show_admin_page():
                         if st.button("✅ 예, 초기화합니다", type="primary", use_container_width=True, key="btn_confirm_reset"):
                             success = utils.reset_user_password(selected_user_id, '1234')
                             if success:
-                                drive_sync.upload_db_to_drive() # [NEW] 백업
+                                drive_sync.schedule_upload() # [NEW] 백업
                                 del st.session_state['reset_verification']
                                 st.success(f"✅ {selected_user_id} 학생 비밀번호 초기화 완료!")
                                 time.sleep(1)
@@ -884,7 +905,7 @@ def show_admin_page():
                     with col_confirm_1:
                         if st.button("✅ 예, 삭제합니다", type="primary", use_container_width=True, key="btn_confirm_del"):
                             if utils.delete_student(selected_user_id):
-                                drive_sync.upload_db_to_drive() # 백업
+                                drive_sync.schedule_upload() # 백업
                                 del st.session_state['delete_verification']
                                 st.success(f"✅ {selected_user_id} 학생 및 관련 기록이 삭제되었습니다.")
                                 time.sleep(1)
@@ -905,22 +926,20 @@ def show_admin_page():
 
     with tab2:
         st.subheader("🏆 학습 활동 랭킹 (Top 5)")
-        all_logs = utils.get_all_study_logs()
+        # [PERF] 일별 집계 테이블(study_daily_rollup)에서 상위 N명만 조회 - 학생 쓰기와 분리된 스냅샷 파일 사용
+        ranking, active_users = utils.get_activity_ranking(5)
+        show_snapshot_status("refresh_snapshot_ranking")
         
         users = utils.get_all_users()
         total_users = len(users) if not users.empty else 0
             
-        if not all_logs.empty:
-            ranking = all_logs['username'].value_counts().head(5).reset_index()
-            ranking.columns = ['학생 ID', '문제 풀이 수']
-            
-            if not users.empty:
-                name_map = dict(zip(users['username'], users['name']))
-                ranking['이름'] = ranking['학생 ID'].map(name_map).fillna(ranking['학생 ID'])
+        if not ranking.empty:
+            ranking = ranking.rename(columns={'username': '학생 ID', 'name': '이름', 'attempts': '문제 풀이 수'})
+            ranking['이름'] = ranking['이름'].fillna(ranking['학생 ID'])
             
             c1, c2 = st.columns(2)
             c1.metric("총 가입 학생", f"{total_users}명")
-            c2.metric("학습 기록 보유", f"{all_logs['username'].nunique()}명")
+            c2.metric("학습 기록 보유", f"{active_users}명")
 
             chart = alt.Chart(ranking).mark_bar().encode(
                 x=alt.X('문제 풀이 수', title='총 풀이 횟수'),
@@ -936,42 +955,18 @@ def show_admin_page():
     with tab_stats:
         st.subheader("📊 기간별 학습 통계")
         
-        all_logs = utils.get_all_study_logs()
-        users = utils.get_all_users()
+        today = utils.get_korea_today()
+        thirty_days_ago = today - timedelta(days=29) # 오늘 포함 30일
         
-        if not all_logs.empty and not users.empty:
-            # 1. 데이터 전처리
-            all_logs['timestamp'] = pd.to_datetime(all_logs['timestamp'])
-            all_logs['date'] = all_logs['timestamp'].dt.date
-            
-            today = utils.get_korea_today()
-            seven_days_ago = today - timedelta(days=6) # 오늘 포함 7일
-            thirty_days_ago = today - timedelta(days=29) # 오늘 포함 30일
-            
-            # 통계 집계용 리스트
-            stats_data = []
-            
-            for _, user in users.iterrows():
-                u_id = user['username']
-                u_name = user['name']
-                
-                u_logs = all_logs[all_logs['username'] == u_id]
-                
-                # 기간별 카운트
-                count_today = len(u_logs[u_logs['date'] == today])
-                count_7days = len(u_logs[u_logs['date'] >= seven_days_ago])
-                count_30days = len(u_logs[u_logs['date'] >= thirty_days_ago])
-                
-                stats_data.append({
-                    '이름': u_name,
-                    'ID': u_id,
-                    '오늘 (Today)': count_today,
-                    '최근 7일': count_7days,
-                    '최근 30일': count_30days,
-                    '총 누적': len(u_logs)
-                })
-            
-            stats_df = pd.DataFrame(stats_data)
+        # [PERF] 전체 로그를 읽어 학생별로 거르는 대신 일별 집계 테이블에서 기간별 합계를 한 번에 조회
+        stats_df = utils.get_period_counts(today)
+        show_snapshot_status("refresh_snapshot_stats")
+        
+        if not stats_df.empty and stats_df['total'].sum() > 0:
+            stats_df = stats_df.rename(columns={
+                'username': 'ID', 'name': '이름', 'today': '오늘 (Today)',
+                'last_7': '최근 7일', 'last_30': '최근 30일', 'total': '총 누적'
+            })
             
             # 정렬 (오늘 많이 푼 순서)
             stats_df = stats_df.sort_values(by='오늘 (Today)', ascending=False)
@@ -995,11 +990,11 @@ def show_admin_page():
                 sel_id = selected_stat_user.split('(')[-1].strip(')')
                 sel_name = selected_stat_user.split('(')[0].strip()
                 
-                target_logs = all_logs[all_logs['username'] == sel_id]
+                sel_total = stats_df.loc[stats_df['ID'] == sel_id, '총 누적']
                 
-                if not target_logs.empty:
+                if not sel_total.empty and sel_total.iloc[0] > 0:
                     # 최근 30일 일별 카운트
-                    daily_counts = target_logs[target_logs['date'] >= thirty_days_ago].groupby('date').size().reset_index(name='count')
+                    daily_counts = utils.get_daily_counts(sel_id, thirty_days_ago, today)[['date', 'attempts']]
                     
                     # 날짜 비어있는 날도 0으로 채우기
                     date_range = pd.date_range(start=thirty_days_ago, end=today)
@@ -1062,8 +1057,7 @@ def show_admin_page():
                         with st.spinner("데이터 처리 중..."):
                             success, msg = utils.process_excel_upload(uploaded_file, reset_mode=reset_mode)
                             if success:
-                                st.cache_data.clear()
-                                drive_sync.upload_db_to_drive()
+                                drive_sync.schedule_upload()
                                 st.success(msg)
                                 time.sleep(2)
                                 st.rerun()
@@ -1111,8 +1105,7 @@ def show_admin_page():
                             with c_edit_btn:
                                 if st.form_submit_button("💾 수정 저장", type="primary", use_container_width=True):
                                     if utils.update_word(target_id, e_word, e_mean, e_lv, e_sen_en, e_sen_ko, e_root):
-                                        st.cache_data.clear() # [FIX] 즉시 반영을 위해 캐시 초기화
-                                        drive_sync.upload_db_to_drive()
+                                        drive_sync.schedule_upload()
                                         st.toast("✅ 수정되었습니다!") # [FIX] 팝업 메시지
                                         time.sleep(0.5) # 잠시 대기 후 리로딩
                                         st.rerun()
@@ -1121,8 +1114,7 @@ def show_admin_page():
                             with c_del_btn:
                                 if st.form_submit_button("🗑️ 삭제", type="secondary", use_container_width=True):
                                     if utils.delete_word(target_id):
-                                        st.cache_data.clear() # [FIX] 즉시 반영
-                                        drive_sync.upload_db_to_drive()
+                                        drive_sync.schedule_upload()
                                         st.toast("✅ 삭제되었습니다!")
                                         time.sleep(0.5)
                                         st.rerun()
@@ -1147,8 +1139,7 @@ def show_admin_page():
                             st.warning("단어와 뜻은 필수입니다.")
                         else:
                             if utils.add_word(n_word, n_mean, n_lv, n_sen_en, n_sen_ko, n_root):
-                                st.cache_data.clear() # [FIX] 즉시 반영
-                                drive_sync.upload_db_to_drive()
+                                drive_sync.schedule_upload()
                                 st.toast(f"✅ '{n_word}' 추가 완료!")
                                 time.sleep(0.5)
                                 st.rerun()
@@ -1162,7 +1153,7 @@ def show_admin_page():
         st.info("학생들의 오답 데이터를 분석하여 단어 레벨(1~30)을 자동 조정합니다.")
         if st.button("🚀 레벨 조정 실행", type="primary"):
             count, msg = utils.adjust_level_based_on_stats()
-            if count > 0: drive_sync.upload_db_to_drive() # [NEW] 백업
+            if count > 0: drive_sync.schedule_upload() # [NEW] 백업
             st.info(f"결과: {msg}")
 
     with tab5:
@@ -1187,7 +1178,7 @@ def show_admin_page():
                         s2 = utils.update_system_config('admin_pw', new_admin_pw)
                         
                         if s1 and s2:
-                            drive_sync.upload_db_to_drive() # [NEW] 백업
+                            drive_sync.schedule_upload() # [NEW] 백업
                             st.success("✅ 설정이 안전하게 저장되었습니다.")
                             time.sleep(1)
                             st.rerun()
@@ -1232,6 +1223,170 @@ def show_admin_page():
                         else:
                             st.error(msg)
         
+        # 자동 백업 상태 (백그라운드 업로드)
+        up = drive_sync.get_upload_status()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("마지막 자동 백업", up['last_success_at'].strftime('%m-%d %H:%M:%S') if up['last_success_at'] else "없음")
+        c2.metric("대기 상태", "업로드 중" if up['uploading'] else ("대기 중" if up['pending'] else "최신"))
+        c3.metric("업로드 / 요청", f"{up['uploads']} / {up['requests']}", delta=f"연속 실패 {up['consecutive_failures']}회" if up['consecutive_failures'] else None, delta_color="inverse")
+        if up['last_error']:
+            st.caption(f"최근 오류: {up['last_error']}")
+        st.caption(f"데이터가 바뀌면 {drive_sync.UPLOAD_DEBOUNCE_SEC}초 동안 추가 변경을 모았다가 한 번에 백업합니다.")
+        if (up['pending'] or up['uploading']) and st.button("⏫ 대기 중인 백업 지금 실행", key="flush_uploads"):
+            with st.spinner("구글 드라이브에 백업 중..."):
+                drive_sync.flush_uploads(timeout=120)
+            st.rerun()
+
+        # 백업 이력 (중복 제거 청크 스냅샷)
+        if drive_sync.HISTORY_ENABLED:
+            with st.container(border=True):
+                st.markdown("#### 📚 백업 이력")
+                st.caption(f"하루 1회(및 수동 백업 시) 스냅샷을 남깁니다. 바뀐 부분만 전송되며 최근 {drive_sync.HISTORY_KEEP_SNAPSHOTS}개를 보관합니다.")
+                if st.button("🔍 이력 불러오기", key="load_history"):
+                    st.session_state.history_snapshots = drive_sync.list_history_snapshots()
+                snaps = st.session_state.get('history_snapshots')
+                if snaps:
+                    hist_df = pd.DataFrame(snaps)
+                    hist_df['크기 (MB)'] = (hist_df['db_bytes'] / 2**20).round(2)
+                    st.dataframe(hist_df[['created', 'note', '크기 (MB)', 'chunks']].rename(columns={'created': '시각', 'note': '메모', 'chunks': '청크 수'}),
+                                 use_container_width=True, hide_index=True)
+                    labels = {s['name']: f"{s['created']} {s['note']}".strip() for s in snaps}
+                    sel_snap = st.selectbox("복구할 시점", list(labels), format_func=labels.get, key="history_select")
+                    confirm = st.checkbox("현재 데이터가 선택한 시점으로 바뀌는 것을 확인했습니다.", key="history_confirm")
+                    if st.button("⏪ 이 시점으로 복구", disabled=not confirm, key="history_restore"):
+                        with st.spinner("스냅샷 복구 중..."):
+                            ok = drive_sync.restore_history_snapshot(sel_snap)
+                        if ok:
+                            st.success("복구 완료! 최신 백업에도 반영합니다.")
+                            drive_sync.schedule_upload()
+                        else:
+                            st.error("복구 실패 (로그를 확인하세요)")
+                elif snaps is not None:
+                    st.info("저장된 스냅샷이 없습니다.")
+
+        # 2. 학습 로그 보관 (Hot/Cold)
+        with st.container(border=True):
+            st.markdown("#### 🗄️ 오래된 학습 로그 보관")
+            st.caption("오래된 학습 로그를 월별 보관 파일(log_archive/)로 옮겨 DB를 가볍게 유지합니다. 랭킹/통계/레벨 조정 결과는 그대로 유지됩니다. 보관 파일은 구글 드라이브 백업에 포함되지 않습니다.")
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                archive_days = st.number_input("보관 기준 (일)", min_value=30, value=180, step=30, help="학습일이 이보다 오래된 로그를 옮깁니다.")
+            with c2:
+                st.write("")
+                st.write("")
+                if st.button("보관 실행", use_container_width=True):
+                    with st.spinner("오래된 로그를 보관 파일로 옮기는 중..."):
+                        moved = utils.archive_study_log(int(archive_days))
+                    st.success(f"{moved}개 로그를 보관했습니다.")
+            
+            archive_summary = utils.get_log_archive_summary()
+            if not archive_summary.empty:
+                archive_summary.columns = ['월', '로그 수', '크기 (KB)']
+                st.dataframe(archive_summary, use_container_width=True, hide_index=True)
+            
+            # 전체 기록은 명시적으로 요청할 때만 보관 파일까지 읽음
+            if st.button("📥 전체 학습 기록 준비 (보관 로그 포함)"):
+                full_logs = utils.get_all_study_logs(include_archive=True)
+                st.download_button(
+                    label=f"CSV 다운로드 ({len(full_logs)}행)",
+                    data=full_logs.to_csv(index=False).encode('utf-8-sig'),
+                    file_name=f"study_log_full_{utils.get_korea_today()}.csv",
+                    mime="text/csv"
+                )
+
+    with tab_perf:
+        st.subheader("🩺 DB 성능 모니터링")
+        st.caption("서버 프로세스가 시작된 이후의 누적 값입니다.")
+        
+        # 1. 쓰기 스레드 (그룹 커밋)
+        st.markdown("#### ✍️ 쓰기 스레드 (그룹 커밋)")
+        w = utils.get_writer_stats()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("대기 중인 쓰기", w['queue_depth'])
+        c2.metric("커밋 / 쓰기 요청", f"{w['commits']} / {w['writes']}")
+        c3.metric("평균 배치 크기", f"{w['avg_batch_size']:.1f}")
+        c4.metric("마지막 커밋", f"{w['last_commit_ms']:.1f} ms", delta=f"오류 {w['errors']}건" if w['errors'] else None, delta_color="inverse")
+        
+        st.divider()
+        
+        # 2. 쿼리별 지연시간
+        st.markdown("#### ⏱️ 쿼리별 지연시간")
+        q_stats = utils.get_query_stats()
+        if not q_stats.empty:
+            st.dataframe(
+                q_stats[['name', 'calls', 'rows', 'errors', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms', 'sql']],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            sel_query = st.selectbox("지연시간 분포 보기", q_stats['name'].unique().tolist(), key="perf_query_select")
+            if sel_query:
+                hist = utils.get_query_histogram(sel_query)
+                hist['구간 (ms)'] = hist['le_ms'].map(lambda v: "초과" if v == float('inf') else f"≤ {v:g}")
+                chart = alt.Chart(hist).mark_bar().encode(
+                    x=alt.X('구간 (ms)', sort=None, title='지연시간 (ms)'),
+                    y=alt.Y('count', title='호출 수'),
+                    tooltip=['구간 (ms)', 'count']
+                ).properties(title=f'{sel_query} 지연시간 분포', height=250)
+                st.altair_chart(chart, use_container_width=True)
+            
+            if st.button("🔄 통계 초기화", key="reset_query_stats"):
+                utils.reset_query_stats()
+                st.rerun()
+        else:
+            st.info("아직 기록된 쿼리가 없습니다.")
+        
+        st.divider()
+        
+        # 3. 느린 쿼리 로그
+        st.markdown("#### 🐢 느린 쿼리 로그")
+        slow = utils.read_slow_query_log(20)
+        if slow:
+            for entry in slow:
+                with st.expander(f"{entry['time']} · {entry['ms']} ms · {entry['name']} · {entry['rows']}행"):
+                    st.code(entry['sql'], language='sql')
+                    st.caption(f"파라미터: {entry.get('params')}")
+                    st.code("\n".join(entry.get('plan') or []) or "(실행 계획 없음)", language='text')
+        else:
+            st.info("기록된 느린 쿼리가 없습니다.")
+
+        # 4. 리런 구간 추적 (숨김 패널: 주소 뒤에 ?trace=1 을 붙였을 때만 표시)
+        if st.query_params.get("trace") == "1":
+            st.divider()
+            st.markdown("#### 🧭 리런 구간 추적")
+            st.caption(f"켜 두면 모든 사용자의 화면 갱신(리런)마다 구간별 소요 시간이 `{tracing.TRACE_FILE}`에 한 줄씩 기록됩니다. 측정이 끝나면 꺼 주세요.")
+
+            trace_on = st.toggle("구간 추적 켜기", value=tracing.is_enabled(), key="trace_enabled")
+            if trace_on != tracing.is_enabled():
+                tracing.set_enabled(trace_on)
+
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                last_n = st.slider("최근 리런 수", 10, 1000, 200, step=10, key="trace_last_n")
+            with c2:
+                trace_page = st.selectbox("페이지", ["전체", "quiz", "dashboard", "admin", "login"], key="trace_page")
+
+            stage_stats = tracing.load_stage_stats(last_n, None if trace_page == "전체" else trace_page)
+            if not stage_stats.empty:
+                st.dataframe(stage_stats, use_container_width=True, hide_index=True)
+                chart_df = stage_stats[stage_stats['stage'] != tracing.TRACE_TOTAL_NAME].melt(
+                    id_vars='stage', value_vars=['p50_ms', 'p95_ms'], var_name='지표', value_name='ms'
+                )
+                chart = alt.Chart(chart_df).mark_bar().encode(
+                    x=alt.X('ms', title='소요 시간 (ms)'),
+                    y=alt.Y('stage', sort='-x', title=None),
+                    yOffset='지표',
+                    color='지표',
+                    tooltip=['stage', '지표', 'ms']
+                ).properties(title='구간별 p50 / p95', height=max(200, 40 * len(chart_df) // 2))
+                st.altair_chart(chart, use_container_width=True)
+            else:
+                st.info("기록된 리런이 없습니다. 추적을 켠 뒤 퀴즈 화면을 몇 번 진행해 보세요.")
+
+            if st.button("🗑️ 추적 기록 삭제", key="clear_traces"):
+                tracing.clear_traces()
+                st.rerun()
+
 
 
 def show_level_test_page():
@@ -1289,7 +1444,7 @@ def show_level_test_page():
                     utils.update_user_level(st.session_state.username, final_lv)
                     
                     # [FIX] 레벨 설정 즉시 클라우드 백업 (재로그인 시 초기화 방지)
-                    drive_sync.upload_db_to_drive()
+                    drive_sync.schedule_upload()
                     
                     st.success(f"레벨 {final_lv}로 설정되었습니다!")
                     time.sleep(1)
@@ -1377,7 +1532,6 @@ def show_dashboard_page():
     realname = user_info['name'] if user_info else username
     user_level = int(user_info['level']) if user_info and pd.notna(user_info['level']) else 1
     
-    progress_df = utils.load_user_progress(username)
     real_today = utils.get_korea_today()
 
     # [NEW] 상단 로그아웃 버튼 (우측 상단 작게 배치)
@@ -1398,18 +1552,8 @@ def show_dashboard_page():
     st.markdown(f"<h4 style='text-align: center; color: #4e8cff;'>현재 레벨: Lv.{user_level}</h4>", unsafe_allow_html=True)
     st.write("") 
 
-    total_learned = len(progress_df)
-    long_term_count = len(progress_df[progress_df['interval'] > 14])
-    # 오늘 날짜보다 '작거나 같은'(<=) 리뷰 대상 단어 (오늘 이미 한 것은 제외)
-    if 'next_review' in progress_df.columns:
-        target_mask = progress_df['next_review'] <= real_today
-        if 'last_reviewed' in progress_df.columns:
-            not_reviewed_today = progress_df['last_reviewed'] != real_today
-            review_count = len(progress_df[target_mask & not_reviewed_today])
-        else:
-            review_count = len(progress_df[target_mask])
-    else:
-        review_count = 0
+    # 전체 학습 / 장기 기억(interval > 14) / 오늘 복습 대상 (오늘 날짜보다 '작거나 같은'(<=) 단어, 오늘 이미 한 것은 제외)
+    total_learned, long_term_count, review_count = utils.get_dashboard_counts(username, real_today)
 
     with st.container(border=True):
         # [CHANGE] 박스 내 모든 글씨 가운데 정렬 (Metrics 대신 Custom HTML 사용)
@@ -1497,10 +1641,153 @@ def show_dashboard_page():
                     else:
                         st.error("현재 비밀번호가 틀렸습니다.")
 
+@tracing.traced("inject_quiz_css")
+def inject_quiz_css():
+    """퀴즈 화면 전용 CSS (리런마다 다시 주입됨)"""
+    # [MOBILE LAYOUT FIX] Sticky Header Approach -> [MALHEBOCA STYLE]
+    st.markdown("""
+    <style>
+        /* Hide Streamlit Header */
+        header { visibility: hidden; }
+        .block-container { padding-top: 5rem !important; max-width: 700px; margin: 0 auto; padding-bottom: 10rem !important; }
+        
+        /* Sticky Game Area */
+        .quiz-container {
+            position: -webkit-sticky; /* Safari */
+            position: sticky;
+            top: 45px !important;
+            background-color: white;
+            z-index: 9999;
+            padding: 10px 0 10px 0;
+            border-bottom: 1px solid #f0f0f0;
+        }
+        
+        /* [FIX] Hide empty iframe container (Focus Script) to prevent extra space */
+        iframe[height="0"] { display: none !important; }
+        div[data-testid="stHtml"] { height: 0; margin: 0; }
+        
+        /* [FIX] Tighten Layout */
+        div[data-testid="stTextInput"] { margin-bottom: -10px !important; }
+        div[data-testid="stButton"] { margin-top: 10px !important; }
+        
+        /* Progress Bar */
+        
+        /* Progress Bar */
+        .progress-track {
+            width: 100%;
+            background-color: #f1f3f5;
+            height: 6px;
+            border-radius: 3px;
+            margin-bottom: 15px;
+            overflow: hidden;
+        }
+        .progress-fill {
+            background: linear-gradient(90deg, #4facfe 0%, #00f2fe 100%);
+            height: 100%;
+            border-radius: 3px;
+            transition: width 0.3s ease;
+        }
+        
+        /* Card Design */
+        .sentence-card {
+            background-color: #f8f9fa;
+            border-radius: 16px;
+            padding: 15px 15px;
+            text-align: center;
+            margin-bottom: 10px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.03);
+            border: 1px solid #e9ecef;
+            animation: slideUp 0.4s ease-out;
+        }
+        @keyframes slideUp {
+            from { opacity: 0; transform: translateY(10px); }
+            to { opacity: 1; transform: translateY(0); }
+        }
+        
+        .meaning-text {
+            font-size: 1.0rem;
+            color: #868e96;
+            font-weight: 600;
+            margin-bottom: 5px;
+        }
+        
+        .english-text {
+            font-size: 1.25rem;
+            font-weight: 700;
+            color: #343a40;
+            line-height: 1.4;
+        }
+        
+        .korean-sub {
+            font-size: 0.9rem;
+            color: #333333;
+            margin-top: 5px;
+            font-weight: 400;
+        }
+        
+        /* Blank Style */
+        .blank-box {
+            display: inline-block;
+            min-width: 60px;
+            border-bottom: 3px solid #339af0;
+            color: transparent;
+            margin: 0 4px;
+        }
+
+        /* Input Styling */
+        div[data-testid="stTextInput"] input {
+            font-size: 1.4rem !important;
+            padding: 12px !important;
+            text-align: center;
+            background-color: #fff;
+            border: 2px solid #dee2e6;
+            border-radius: 12px;
+            color: #333;
+        }
+        div[data-testid="stTextInput"] input:focus {
+            border-color: #339af0;
+            box-shadow: 0 0 0 3px rgba(51, 154, 240, 0.1);
+        }
+        
+        /* Hint & Error */
+        .hint-box {
+            background-color: #fff3cd;
+            color: #856404;
+            padding: 10px;
+            border-radius: 8px;
+            margin-top: 10px;
+            text-align: center;
+            font-weight: bold;
+            animation: fadeIn 0.3s;
+        }
+        .error-box {
+            background-color: #ffe3e3;
+            color: #c92a2a;
+            padding: 10px;
+            border-radius: 8px;
+            margin-top: 10px;
+            text-align: center;
+            font-weight: bold;
+            animation: shake 0.3s;
+        }
+        
+        @keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
+        @keyframes shake {
+            0% { transform: translateX(0); }
+            25% { transform: translateX(-5px); }
+            50% { transform: translateX(5px); }
+            75% { transform: translateX(-5px); }
+            100% { transform: translateX(0); }
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+
 def show_quiz_page():
     try:
         username = st.session_state.username
-        df = utils.load_data()
+        vocab = utils.get_vocab_store()
+        df = vocab.frame
         if df is None: 
             st.error("DB 연결 오류")
             return
@@ -1554,17 +1841,15 @@ def show_quiz_page():
                     st.session_state.study_log_buffer = []
 
                 # 3. 상태 동기화 (Pending Wrongs / Session)
-                updates = {}
-                if 'pending_wrongs_local' in st.session_state:
-                    updates['pending_wrongs'] = ",".join(str(x) for x in st.session_state.pending_wrongs_local)
-                if 'pending_session_local' in st.session_state:
-                    updates['pending_session'] = ",".join(str(x) for x in st.session_state.pending_session_local)
-                
-                if updates:
-                    utils.update_user_dynamic_fields(username, updates)
+                if 'pending_wrongs_local' in st.session_state or 'pending_session_local' in st.session_state:
+                    utils.sync_pending_ids(
+                        username,
+                        st.session_state.get('pending_wrongs_local'),
+                        st.session_state.get('pending_session_local')
+                    )
                 
                 # 4. 백업
-                drive_sync.upload_db_to_drive()
+                drive_sync.schedule_upload()
             
             st.success("저장 완료!")
             time.sleep(0.5)
@@ -1574,31 +1859,28 @@ def show_quiz_page():
         st.write("")
 
         if 'full_quiz_list' not in st.session_state:
-            with st.spinner("문제 데이터를 불러오는 중입니다..."):
-                    # [NEW] 1. 강제 오답 노트 확인 (Forced Review)
-                    pending_wrongs_str = user_info.get('pending_wrongs', '')
-                    pending_ids = [int(x) for x in pending_wrongs_str.split(',') if x.strip().isdigit()]
+            with st.spinner("문제 데이터를 불러오는 중입니다..."), tracing.span("build_quiz_set"):
+                    # [NEW] 1. 강제 오답 노트 / 2. 중단된 세션 확인 (인덱스 조회 1회)
+                    pending_wrongs, pending_session = utils.load_pending_ids(username)
+                    pending_ids = list(pending_wrongs)
+                    session_ids = list(pending_session)
                     
                     # [로컬 상태 초기화]
                     st.session_state.pending_wrongs_local = set(pending_ids)
-                    
-                    # [NEW] 2. 중단된 세션 확인 (Resume Session)
-                    pending_session_str = user_info.get('pending_session', '')
-                    session_ids = [int(x) for x in pending_session_str.split(',') if x.strip().isdigit()]
-                    
-                    # [로컬 상태 초기화]
                     st.session_state.pending_session_local = set(session_ids)
                     
                     # [NEW] 유효성 검사: 실제로 DB에 존재하는 문제인지 확인
                     resume_q = []
                     if session_ids:
-                        resume_q = df[df['id'].isin(session_ids)].to_dict('records')
+                        resume_q = vocab.records(session_ids)
 
                     if pending_ids:
                         # 강제 복습 모드 진입
-                        review_q = df[df['id'].isin(pending_ids)].to_dict('records')
+                        review_q = vocab.records(pending_ids)
                         random.shuffle(review_q)
                         
+                        metrics.SESSIONS_STARTED.inc(kind="forced_review")
+                        st.session_state.quiz_session_open = True
                         st.session_state.full_quiz_list = review_q
                         st.session_state.quiz_list = review_q 
                         st.session_state.current_idx = 0
@@ -1615,6 +1897,8 @@ def show_quiz_page():
                         # 순서는 섞는 게 학습 효과에 좋음 (또는 저장된 순서 유지? DB엔 집합으로 저장됨 -> 섞자)
                         random.shuffle(resume_q)
                         
+                        metrics.SESSIONS_STARTED.inc(kind="resume")
+                        st.session_state.quiz_session_open = True
                         st.session_state.full_quiz_list = resume_q
                         st.session_state.quiz_list = resume_q
                         st.session_state.current_idx = 0
@@ -1645,7 +1929,7 @@ def show_quiz_page():
                             if len(review_ids) > 50:
                                 review_ids = review_ids[:50]
                             
-                            review_q = df[df['id'].isin(review_ids)].to_dict('records')
+                            review_q = vocab.records(review_ids)
                         
                         # 2. 신규 학습 단어
                         learned_ids = progress_df['word_id'].tolist() if 'word_id' in progress_df.columns else []
@@ -1706,6 +1990,8 @@ def show_quiz_page():
                         utils.manage_session_state(username, 'set', session_ids_to_save)
                         
                         # 퀴즈 리스트 세팅
+                        metrics.SESSIONS_STARTED.inc(kind="new")
+                        st.session_state.quiz_session_open = True # 세트 종료 지표를 1회만 세기 위한 표시
                         st.session_state.full_quiz_list = combined
                         st.session_state.quiz_list = combined[:batch_size]
                         st.session_state.current_idx = 0
@@ -1733,143 +2019,7 @@ def show_quiz_page():
     # TTS 오디오 가져오기 (파일이 없으면 생성)
         audio_data = utils.text_to_speech(curr_q['id'], curr_q['sentence_en'])
         
-        # [MOBILE LAYOUT FIX] Sticky Header Approach -> [MALHEBOCA STYLE]
-        st.markdown("""
-        <style>
-            /* Hide Streamlit Header */
-            header { visibility: hidden; }
-            .block-container { padding-top: 5rem !important; max-width: 700px; margin: 0 auto; padding-bottom: 10rem !important; }
-            
-            /* Sticky Game Area */
-            .quiz-container {
-                position: -webkit-sticky; /* Safari */
-                position: sticky;
-                top: 45px !important;
-                background-color: white;
-                z-index: 9999;
-                padding: 10px 0 10px 0;
-                border-bottom: 1px solid #f0f0f0;
-            }
-            
-            /* [FIX] Hide empty iframe container (Focus Script) to prevent extra space */
-            iframe[height="0"] { display: none !important; }
-            div[data-testid="stHtml"] { height: 0; margin: 0; }
-            
-            /* [FIX] Tighten Layout */
-            div[data-testid="stTextInput"] { margin-bottom: -10px !important; }
-            div[data-testid="stButton"] { margin-top: 10px !important; }
-            
-            /* Progress Bar */
-            
-            /* Progress Bar */
-            .progress-track {
-                width: 100%;
-                background-color: #f1f3f5;
-                height: 6px;
-                border-radius: 3px;
-                margin-bottom: 15px;
-                overflow: hidden;
-            }
-            .progress-fill {
-                background: linear-gradient(90deg, #4facfe 0%, #00f2fe 100%);
-                height: 100%;
-                border-radius: 3px;
-                transition: width 0.3s ease;
-            }
-            
-            /* Card Design */
-            .sentence-card {
-                background-color: #f8f9fa;
-                border-radius: 16px;
-                padding: 15px 15px;
-                text-align: center;
-                margin-bottom: 10px;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.03);
-                border: 1px solid #e9ecef;
-                animation: slideUp 0.4s ease-out;
-            }
-            @keyframes slideUp {
-                from { opacity: 0; transform: translateY(10px); }
-                to { opacity: 1; transform: translateY(0); }
-            }
-            
-            .meaning-text {
-                font-size: 1.0rem;
-                color: #868e96;
-                font-weight: 600;
-                margin-bottom: 5px;
-            }
-            
-            .english-text {
-                font-size: 1.25rem;
-                font-weight: 700;
-                color: #343a40;
-                line-height: 1.4;
-            }
-            
-            .korean-sub {
-                font-size: 0.9rem;
-                color: #333333;
-                margin-top: 5px;
-                font-weight: 400;
-            }
-            
-            /* Blank Style */
-            .blank-box {
-                display: inline-block;
-                min-width: 60px;
-                border-bottom: 3px solid #339af0;
-                color: transparent;
-                margin: 0 4px;
-            }
-
-            /* Input Styling */
-            div[data-testid="stTextInput"] input {
-                font-size: 1.4rem !important;
-                padding: 12px !important;
-                text-align: center;
-                background-color: #fff;
-                border: 2px solid #dee2e6;
-                border-radius: 12px;
-                color: #333;
-            }
-            div[data-testid="stTextInput"] input:focus {
-                border-color: #339af0;
-                box-shadow: 0 0 0 3px rgba(51, 154, 240, 0.1);
-            }
-            
-            /* Hint & Error */
-            .hint-box {
-                background-color: #fff3cd;
-                color: #856404;
-                padding: 10px;
-                border-radius: 8px;
-                margin-top: 10px;
-                text-align: center;
-                font-weight: bold;
-                animation: fadeIn 0.3s;
-            }
-            .error-box {
-                background-color: #ffe3e3;
-                color: #c92a2a;
-                padding: 10px;
-                border-radius: 8px;
-                margin-top: 10px;
-                text-align: center;
-                font-weight: bold;
-                animation: shake 0.3s;
-            }
-            
-            @keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
-            @keyframes shake {
-                0% { transform: translateX(0); }
-                25% { transform: translateX(-5px); }
-                50% { transform: translateX(5px); }
-                75% { transform: translateX(-5px); }
-                100% { transform: translateX(0); }
-            }
-        </style>
-        """, unsafe_allow_html=True)
+        inject_quiz_css()
 
         progress_pct = (idx / len(st.session_state.quiz_list)) * 100
         
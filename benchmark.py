@@ -0,0 +1,622 @@
+"""
+성능 측정용 마이크로 벤치마크
+
+사용법:
+    python benchmark.py connection [--calls 2000]
+    python benchmark.py vocab [--words 5000] [--reruns 200]
+    python benchmark.py recalibrate [--rows 10000000] [--words 5000] [--sample 50000]
+    python benchmark.py logsize [--rows 1000000]
+    python benchmark.py replication [--sessions 50] [--answers 15] [--log-rows 300000]
+    python benchmark.py history [--days 30] [--answers-per-day 3000] [--latency-ms 20]
+    python benchmark.py drive [--uploads 6]
+
+임시 디렉터리에 합성 DB를 만들어 측정하므로 실제 voca.db는 건드리지 않습니다.
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+import zlib
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import chunkstore
+import database as db
+import replication
+import utils
+
+
+def _timeit(fn, calls):
+    """fn을 calls번 호출하여 호출당 지연시간(µs) 리스트 반환"""
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} p50 {p50:8.1f}µs   p95 {p95:8.1f}µs   mean {statistics.fmean(samples):8.1f}µs")
+    return p50
+
+
+class _TempDB:
+    """임시 DB 파일로 database 모듈을 잠시 전환"""
+    def __enter__(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="voca_bench_")
+        self.orig = db.DB_FILE
+        db.DB_FILE = os.path.join(self.tmpdir, "voca.db")
+        db.close_all_connections()
+        db.init_db()
+        return db.DB_FILE
+
+    def __exit__(self, *exc):
+        db.close_all_connections()
+        db.DB_FILE = self.orig
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+def bench_connection(calls):
+    """매 호출 새 연결(기존 방식) vs 풀 연결: get_user_info 1회 지연시간"""
+    with _TempDB() as path:
+        conn = db.get_db_connection()
+        conn.executemany(
+            'INSERT INTO users (username, password, name, level) VALUES (?, ?, ?, ?)',
+            [(f"user{i}", "x", f"학생{i}", 1) for i in range(500)]
+        )
+        conn.commit()
+        conn.close()
+
+        def legacy():
+            # 기존 get_db_connection() 방식: 호출마다 connect/close
+            conn = sqlite3.connect(path)
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM users WHERE username = ?', ("user250",)).fetchone()
+            conn.close()
+            return dict(row)
+
+        def pooled():
+            return db.get_user_info("user250")
+
+        legacy(); pooled() # 워밍업
+        before = _report("per-call connect (before)", _timeit(legacy, calls))
+        after = _report("pooled connection (after)", _timeit(pooled, calls))
+        print(f"speedup: x{before / after:.1f}")
+
+
+def bench_vocab(words, reruns):
+    """퀴즈 페이지 1회 rerun당 단어장 접근 비용: st.cache_data 복사(기존) vs 공용 스토어"""
+    with _TempDB():
+        conn = db.get_db_connection()
+        conn.executemany(
+            'INSERT INTO voca_db (target_word, meaning, level, sentence_en, sentence_ko, root_word) VALUES (?, ?, ?, ?, ?, ?)',
+            [(f"word{i}", f"뜻{i}", i % 30 + 1, f"This is example sentence number {i}.", f"예문 {i}", f"root{i}")
+             for i in range(words)]
+        )
+        conn.commit()
+        conn.close()
+
+        frame = db.get_vocab_store().frame
+        blob = pickle.dumps(frame)
+        review_ids = random.sample(range(1, words + 1), 20)
+
+        def legacy():
+            # 기존: st.cache_data 히트 = pickle 복원(전체 복사) x2 (database + utils 이중 캐시)
+            for _ in range(2):
+                df = pickle.loads(blob)
+            df[df['id'].isin(review_ids)].to_dict('records')
+            df[df['level'] == 5].sample(n=1).iloc[0].to_dict()
+
+        def store():
+            vocab = db.get_vocab_store()
+            vocab.records(review_ids)
+            vocab.record_at(random.choice(vocab.level_positions(5)))
+
+        legacy(); store() # 워밍업
+        print(f"vocabulary: {words} words, pickled {len(blob) / 1024:.0f} KiB")
+        before = _report("cache_data copy (before)", _timeit(legacy, reruns))
+        after = _report("shared store (after)", _timeit(store, reruns))
+        print(f"speedup: x{before / after:.1f}")
+
+
+def _legacy_scores(logs_df, word_levels):
+    """기존 adjust_level_based_on_stats의 iterrows 점수 계산 (비교 기준)"""
+    scores = {}
+    for _, row in logs_df.iterrows():
+        word_id = row['word_id']
+        if word_id not in word_levels: continue
+        gap = row['level'] - word_levels[word_id]
+        score = 0
+        if row['is_correct']:
+            if gap < 0: score = -abs(gap) * 2.0
+            elif gap == 0: score = -0.5
+        else:
+            if gap > 0: score = abs(gap) * 2.0
+            elif gap == 0: score = 0.5
+        scores[word_id] = scores.get(word_id, 0) + score
+    return scores
+
+
+def bench_recalibrate(rows, words, sample):
+    """단어 난이도 재조정: iterrows(기존, 샘플로 외삽) vs 벡터 전체 계산 vs 증분 집계"""
+    rng = np.random.default_rng(0)
+    logs = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'word_id': rng.integers(1, words + 50, rows), # 일부는 삭제된 단어
+        'level': rng.integers(1, 31, rows),
+        'is_correct': rng.integers(0, 2, rows),
+    })
+    word_ids = np.arange(1, words + 1)
+    word_levels = pd.Series(rng.integers(1, 31, words), index=word_ids)
+    print(f"synthetic log: {rows:,} rows, {words:,} words")
+
+    # 1. 기존 iterrows: sample행만 실행 후 전체 행 수로 외삽
+    head = logs.head(sample)
+    t0 = time.perf_counter()
+    legacy = _legacy_scores(head, word_levels.to_dict())
+    legacy_s = (time.perf_counter() - t0) / len(head) * rows
+    vec_head = utils.score_word_answers(head['word_id'], head['level'], head['is_correct'], np.ones(len(head)), word_levels)
+    assert all(vec_head.get(k, 0) == v for k, v in legacy.items()) and len(vec_head) == len(legacy), "score mismatch"
+    print(f"{'iterrows (before, extrap.)':<28} {legacy_s:10.2f}s   (measured on {len(head):,} rows, results identical)")
+
+    # 2. 벡터 연산으로 전체 로그 1회 계산
+    t0 = time.perf_counter()
+    scores = utils.score_word_answers(logs['word_id'], logs['level'], logs['is_correct'], np.ones(rows), word_levels)
+    utils.level_updates_from_scores(scores, word_levels)
+    vec_s = time.perf_counter() - t0
+    print(f"{'vectorized full scan':<28} {vec_s:10.2f}s   x{legacy_s / vec_s:.0f}")
+
+    # 3. 증분: SQLite에 로그 적재 -> 최초 집계 -> 새 로그 1만 건 후 재실행
+    with _TempDB():
+        conn = db.get_db_connection()
+        conn.execute('DROP TRIGGER IF EXISTS trg_log_level_window') # 적재 속도용 (측정 대상 아님)
+        conn.executemany(
+            'INSERT INTO study_log (id, word_id, level, is_correct) VALUES (?, ?, ?, ?)',
+            logs[['id', 'word_id', 'level', 'is_correct']].itertuples(index=False, name=None)
+        )
+        conn.commit()
+        conn.close()
+
+        def run():
+            db.accumulate_word_answer_stats()
+            stats = db.load_word_answer_stats()
+            s = utils.score_word_answers(stats['word_id'], stats['user_level'], stats['is_correct'], stats['n'], word_levels)
+            return s, utils.level_updates_from_scores(s, word_levels)
+
+        t0 = time.perf_counter()
+        first, _ = run()
+        first_s = time.perf_counter() - t0
+        assert np.allclose(first.reindex(scores.index).to_numpy(), scores.to_numpy()), "incremental mismatch"
+        print(f"{'incremental, first run':<28} {first_s:10.2f}s   (SQL GROUP BY of all rows)")
+
+        new_rows = 10_000
+        conn = db.get_db_connection()
+        conn.executemany(
+            'INSERT INTO study_log (word_id, level, is_correct) VALUES (?, ?, ?)',
+            zip(rng.integers(1, words, new_rows).tolist(), rng.integers(1, 31, new_rows).tolist(), rng.integers(0, 2, new_rows).tolist())
+        )
+        conn.commit()
+        conn.close()
+        t0 = time.perf_counter()
+        run()
+        inc_s = time.perf_counter() - t0
+        print(f"{'incremental, +10k rows':<28} {inc_s:10.2f}s   x{legacy_s / inc_s:.0f}")
+
+
+# study_log 스키마 변천 (이름, DDL, 인덱스, 행 생성 함수)
+_LOG_SCHEMAS = [
+    ("text + username (original)",
+     "CREATE TABLE study_log (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME, date DATE, "
+     "word_id INTEGER, username TEXT, level INTEGER, is_correct INTEGER)",
+     "CREATE INDEX idx_log_username ON study_log (username)",
+     "INSERT INTO study_log (timestamp, date, word_id, username, level, is_correct) VALUES (?, ?, ?, ?, ?, ?)"),
+    ("text + user_id",
+     db.STUDY_LOG_TEXT_TABLE_SQL.format(table='study_log'),
+     "CREATE INDEX idx_log_user_level ON study_log (user_id, level, id)",
+     "INSERT INTO study_log (timestamp, date, word_id, user_id, level, is_correct) VALUES (?, ?, ?, ?, ?, ?)"),
+    ("epoch ts + user_id (compact)",
+     db.STUDY_LOG_TABLE_SQL.format(table='study_log'),
+     "CREATE INDEX idx_log_user_level ON study_log (user_id, level, id)",
+     "INSERT INTO study_log (ts, word_id, user_id, level, is_correct) VALUES (?, ?, ?, ?, ?)"),
+]
+
+
+def _db_bytes(path):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('VACUUM')
+        return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def bench_logsize(rows):
+    """study_log 행 인코딩별 파일 크기 (테이블 + 유저 인덱스, VACUUM 후)"""
+    rng = np.random.default_rng(0)
+    ts = np.sort(rng.integers(1_767_225_600, 1_798_761_600, rows)) # 2026년 1년치
+    users = rng.integers(1, 201, rows)
+    words = rng.integers(1, 5001, rows)
+    levels = rng.integers(1, 31, rows)
+    correct = rng.integers(0, 2, rows)
+
+    kst = ts + db.LOG_DAY_OFFSET
+    stamps = pd.to_datetime(kst, unit='s').strftime('%Y-%m-%d %H:%M:%S')
+    columns = {
+        "text + username (original)": lambda: zip(stamps, stamps.str[:10], words.tolist(), [f"student{u:03d}" for u in users], levels.tolist(), correct.tolist()),
+        "text + user_id": lambda: zip(stamps, stamps.str[:10], words.tolist(), users.tolist(), levels.tolist(), correct.tolist()),
+        "epoch ts + user_id (compact)": lambda: zip(ts.tolist(), words.tolist(), users.tolist(), levels.tolist(), correct.tolist()),
+    }
+
+    tmpdir = tempfile.mkdtemp(prefix="voca_bench_")
+    try:
+        print(f"synthetic log: {rows:,} rows")
+        sizes = {}
+        for label, create_sql, index_sql, insert_sql in _LOG_SCHEMAS:
+            path = os.path.join(tmpdir, f"log_{len(sizes)}.db")
+            conn = sqlite3.connect(path)
+            conn.execute(create_sql)
+            conn.execute(index_sql)
+            conn.executemany(insert_sql, columns[label]())
+            conn.commit()
+            conn.close()
+            sizes[label] = _db_bytes(path)
+            print(f"{label:<30} {sizes[label] / rows:6.1f} B/row   {sizes[label] / rows * 1e6 / 2**20:7.1f} MiB per 1M rows")
+
+        compact = sizes["epoch ts + user_id (compact)"]
+        for label, size in sizes.items():
+            if size != compact:
+                saved = (size - compact) / rows * 1e6
+                print(f"saved vs {label:<30} {saved / 2**20:7.1f} MiB per 1M rows ({1 - compact / size:.0%})")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _dump_md5(path):
+    conn = sqlite3.connect(path)
+    try:
+        return hashlib.md5("\n".join(conn.iterdump()).encode("utf-8")).hexdigest()
+    finally:
+        conn.close()
+
+
+def _seed_synthetic_db(rng, words, users, log_rows):
+    """현재 DB 에 합성 단어장/사용자/학습 로그 채우기"""
+    conn = db.get_db_connection()
+    conn.executemany(
+        'INSERT INTO voca_db (target_word, meaning, level, sentence_en, sentence_ko, root_word) VALUES (?, ?, ?, ?, ?, ?)',
+        [(f"word{i}", f"뜻{i}", i % 30 + 1, f"This is example sentence number {i}.", f"예문 {i}", f"root{i}")
+         for i in range(words)]
+    )
+    conn.executemany(
+        'INSERT INTO users (username, password, name, level) VALUES (?, ?, ?, ?)',
+        [(f"user{i}", "x", f"학생{i}", 1) for i in range(users)]
+    )
+    ts = np.sort(rng.integers(1_767_225_600, 1_790_000_000, log_rows))
+    conn.executemany(
+        'INSERT INTO study_log (ts, user_id, word_id, level, is_correct) VALUES (?, ?, ?, ?, ?)',
+        zip(ts.tolist(), rng.integers(1, users + 1, log_rows).tolist(), rng.integers(1, words + 1, log_rows).tolist(),
+            rng.integers(1, 31, log_rows).tolist(), rng.integers(0, 2, log_rows).tolist())
+    )
+    conn.commit()
+    conn.close()
+
+
+def bench_replication(sessions, answers, log_rows, words=5000, users=200):
+    """세션 종료 1회당 백업 전송량: voca.db 전체 업로드(기존) vs 증분 페이지 복제 (로컬 디렉터리 저장소)"""
+    rng = np.random.default_rng(0)
+    with _TempDB() as path:
+        _seed_synthetic_db(rng, words, users, log_rows)
+
+        store_dir = tempfile.mkdtemp(prefix="voca_replica_")
+        try:
+            store = replication.LocalDirStore(store_dir)
+            base = replication.replicate(store)
+            print(f"synthetic DB: {base['db_bytes'] / 2**20:.1f} MiB ({log_rows:,} log rows), "
+                  f"base snapshot {base['bytes'] / 2**20:.2f} MiB compressed")
+
+            today = utils.get_korea_today()
+            full, inc, pages = [], [], []
+            for _ in range(sessions):
+                # 세션 1회: 학생 1명이 answers 문제 풀이 -> 세트 종료 시 사용자 카운터 갱신 -> 백업
+                username = f"user{rng.integers(0, users)}"
+                for wid in rng.integers(1, words + 1, answers).tolist():
+                    correct = bool(rng.integers(0, 2))
+                    progress = pd.DataFrame({'word_id': [wid], 'last_reviewed': [today], 'next_review': [today + timedelta(days=1)],
+                                             'interval': [1], 'fail_count': [0 if correct else 1]})
+                    utils.record_answer(username, wid, correct, log_row=utils.make_log_row(wid, username, 5, correct),
+                                        progress_df=progress)
+                db.update_user_dynamic_fields(username, {'qs_count': answers})
+
+                db.checkpoint_db()
+                full.append(os.path.getsize(path)) # 기존: 파일 전체 업로드
+                res = replication.replicate(store)
+                inc.append(res['bytes'])
+                pages.append(res['pages'])
+
+            with open(path, 'rb') as f:
+                full_zip = len(zlib.compress(f.read(), replication.REPL_COMPRESS_LEVEL))
+            print(f"{sessions} session-ends x {answers} answers")
+            print(f"{'full upload (before)':<28} mean {statistics.fmean(full) / 1024:9.1f} KiB/session")
+            print(f"{'full upload, zlib':<28} mean {full_zip / 1024:9.1f} KiB/session   (for reference)")
+            print(f"{'incremental pages (after)':<28} mean {statistics.fmean(inc) / 1024:9.1f} KiB/session   "
+                  f"p50 {statistics.median(inc) / 1024:.1f} KiB   max {max(inc) / 1024:.1f} KiB   "
+                  f"{statistics.fmean(pages):.1f} pages")
+            print(f"bytes shipped: x{statistics.fmean(full) / statistics.fmean(inc):.0f} less than full upload")
+
+            restored = os.path.join(store_dir, "restored.db")
+            t0 = time.perf_counter()
+            info = replication.restore(store, restored)
+            restore_s = time.perf_counter() - t0
+            assert _dump_md5(restored) == _dump_md5(path), "restored DB differs"
+            print(f"restore base + {info['seq']} increments: {info['bytes'] / 2**20:.2f} MiB fetched, "
+                  f"{restore_s * 1000:.0f} ms, content identical")
+        finally:
+            replication.reset_state()
+            shutil.rmtree(store_dir, ignore_errors=True)
+
+
+class _LatencyStore(replication.LocalDirStore):
+    """요청마다 latency 만큼 지연되는 로컬 저장소 (원격 저장소 왕복 시간 흉내)"""
+    def __init__(self, path, latency):
+        super().__init__(path)
+        self.latency = latency
+
+    def put(self, name, data):
+        time.sleep(self.latency)
+        super().put(name, data)
+
+    def get(self, name):
+        time.sleep(self.latency)
+        return super().get(name)
+
+
+def bench_history(days, answers_per_day, log_rows, latency_ms, words=5000, users=200):
+    """일일 백업 이력: 날마다 voca.db 전체 보관(기존) vs 중복 제거 청크 저장소, 순차 vs 병렬 전송 시간"""
+    rng = np.random.default_rng(0)
+    with _TempDB() as path:
+        _seed_synthetic_db(rng, words, users, log_rows)
+        store_dir = tempfile.mkdtemp(prefix="voca_history_")
+        try:
+            store = replication.LocalDirStore(os.path.join(store_dir, "chunks"))
+            day0 = 1_790_000_000
+            full, sent, new_chunks = [], [], []
+            for d in range(days):
+                # 하루치 학습: 풀이 기록 추가 + 학습 진도 갱신 + 사용자 카운터 갱신
+                conn = db.get_db_connection()
+                ts = np.sort(rng.integers(day0 + d * 86400, day0 + (d + 1) * 86400, answers_per_day))
+                uids = rng.integers(1, users + 1, answers_per_day).tolist()
+                wids = rng.integers(1, words + 1, answers_per_day).tolist()
+                conn.executemany(
+                    'INSERT INTO study_log (ts, user_id, word_id, level, is_correct) VALUES (?, ?, ?, ?, ?)',
+                    zip(ts.tolist(), uids, wids, rng.integers(1, 31, answers_per_day).tolist(),
+                        rng.integers(0, 2, answers_per_day).tolist())
+                )
+                today = day0 // 86400 + d
+                conn.executemany(
+                    'INSERT INTO user_progress (user_id, word_id, last_reviewed, next_review, interval, fail_count) '
+                    'VALUES (?, ?, ?, ?, 1, 0) ON CONFLICT(user_id, word_id) DO UPDATE SET '
+                    'last_reviewed = excluded.last_reviewed, next_review = excluded.next_review, interval = interval * 2',
+                    [(u, w, today, today + 1) for u, w in zip(uids, wids)]
+                )
+                conn.execute('UPDATE users SET qs_count = qs_count + 1 WHERE id IN (%s)'
+                             % ",".join(str(u) for u in set(uids[:50])))
+                conn.commit()
+                conn.close()
+                db.checkpoint_db()
+
+                with open(path, 'rb') as f:
+                    data = f.read()
+                res = chunkstore.backup_snapshot(store, note=f"day {d + 1}", data=data)
+                full.append(len(data))
+                sent.append(res['uploaded_bytes'])
+                new_chunks.append(res['new_chunks'])
+
+            usage = chunkstore.store_usage(store)
+            print(f"{days} daily snapshots, {answers_per_day:,} answers/day, DB {full[0] / 2**20:.1f} -> {full[-1] / 2**20:.1f} MiB")
+            print(f"{'keep every full file':<28} {sum(full) / 2**20:9.1f} MiB stored")
+            print(f"{'dedup chunk store':<28} {usage['bytes'] / 2**20:9.1f} MiB stored   "
+                  f"({usage['chunks']} chunks, dedup ratio x{sum(full) / usage['bytes']:.1f})")
+            print(f"{'first snapshot':<28} {sent[0] / 2**20:9.2f} MiB sent   {new_chunks[0]} chunks")
+            print(f"{'later snapshots':<28} mean {statistics.fmean(sent[1:]) / 1024:9.1f} KiB sent/day   "
+                  f"p50 {statistics.median(sent[1:]) / 1024:.1f} KiB   {statistics.fmean(new_chunks[1:]):.1f} new chunks "
+                  f"(vs {statistics.fmean(full[1:]) / 1024:.0f} KiB full file)")
+
+            # 전송 시간: 같은 내용을 빈 저장소에 올리고 받기 (요청당 latency_ms 지연)
+            latency = latency_ms / 1000
+            print(f"transfer of the last snapshot, {latency_ms:g} ms per request:")
+            for workers in (1, chunkstore.CHUNK_WORKERS):
+                slow = _LatencyStore(os.path.join(store_dir, f"slow{workers}"), latency)
+                up = chunkstore.backup_snapshot(slow, note="bench", workers=workers, data=data)
+                restored = os.path.join(store_dir, f"restored{workers}.db")
+                down = chunkstore.restore_snapshot(slow, up['name'], restored, workers=workers)
+                print(f"  workers={workers:<3} upload {up['seconds']:6.2f} s   restore {down['seconds']:6.2f} s   "
+                      f"({up['chunks']} chunks)")
+            assert _dump_md5(restored) == _dump_md5(path), "restored DB differs"
+            print("restored DB content identical")
+        finally:
+            shutil.rmtree(store_dir, ignore_errors=True)
+
+
+class _FakeDrive:
+    """
+    로컬 가짜 구글 드라이브 (drive_sync.set_drive_service_factory 주입용)
+    - drive_sync 가 쓰는 files().list/create/update/delete 만 흉내, 호출 횟수 기록
+    - 없는 ID 를 쓰면 실제 API 처럼 404 HttpError
+    """
+    _FOLDER = 'application/vnd.google-apps.folder'
+
+    def __init__(self):
+        self.items = {}     # id -> dict(name, parents, mimeType, size)
+        self.calls = {'list': 0, 'create': 0, 'update': 0, 'delete': 0}
+        self._next_id = 0
+
+    def files(self):
+        return self
+
+    @staticmethod
+    def _request(fn):
+        return type('FakeRequest', (), {'execute': staticmethod(fn)})()
+
+    @staticmethod
+    def _not_found(file_id):
+        import httplib2
+        from googleapiclient.errors import HttpError
+        return HttpError(httplib2.Response({'status': 404}), f"File not found: {file_id}".encode())
+
+    @staticmethod
+    def _media_size(media_body):
+        return media_body.size() if media_body is not None else 0
+
+    def list(self, q, **kwargs):
+        self.calls['list'] += 1
+
+        def run():
+            name = q.split("name", 1)[1].split("'")[1]
+            parent = q.split("' in parents")[0].rsplit("'", 1)[1] if "in parents" in q else None
+            if parent is not None and parent not in self.items:
+                raise self._not_found(parent)
+            files = [{'id': i, 'name': f['name'], 'size': str(f['size'])} for i, f in self.items.items()
+                     if f['name'] == name and (parent is None or parent in f['parents'])
+                     and (self._FOLDER in q) == (f['mimeType'] == self._FOLDER)]
+            return {'files': files}
+        return self._request(run)
+
+    def create(self, body, media_body=None, **kwargs):
+        self.calls['create'] += 1
+
+        def run():
+            for parent in body.get('parents', []):
+                if parent not in self.items:
+                    raise self._not_found(parent)
+            self._next_id += 1
+            file_id = f"fake{self._next_id}"
+            self.items[file_id] = {'name': body['name'], 'parents': body.get('parents', []),
+                                   'mimeType': body.get('mimeType'), 'size': self._media_size(media_body)}
+            return {'id': file_id, 'size': str(self.items[file_id]['size'])}
+        return self._request(run)
+
+    def update(self, fileId, media_body=None, **kwargs):
+        self.calls['update'] += 1
+
+        def run():
+            if fileId not in self.items:
+                raise self._not_found(fileId)
+            self.items[fileId]['size'] = self._media_size(media_body)
+            return {'id': fileId, 'size': str(self.items[fileId]['size'])}
+        return self._request(run)
+
+    def remove(self, name):
+        """드라이브 웹에서 지운 것처럼 항목 삭제 (drive_sync 캐시는 모름)"""
+        for file_id, f in list(self.items.items()):
+            if f['name'] == name:
+                del self.items[file_id]
+
+
+def bench_drive(uploads):
+    """드라이브 백업 API 왕복 횟수: 클라이언트/ID 캐시 효과 + 404 시 ID 캐시 무효화 후 재시도 (가짜 드라이브)"""
+    import drive_sync  # 구글 API 클라이언트가 설치된 환경에서만 필요
+
+    fake = _FakeDrive()
+    built = []
+
+    def factory():
+        built.append(1)
+        return fake
+
+    with _TempDB() as path:
+        orig = (drive_sync.DB_FILE, drive_sync.SYNC_META_FILE, drive_sync.BACKUP_MODE)
+        drive_sync.DB_FILE, drive_sync.SYNC_META_FILE = path, path + '.sync.json'
+        drive_sync.BACKUP_MODE = 'full'
+        drive_sync.set_drive_service_factory(factory)
+        try:
+            for _ in range(uploads):
+                assert drive_sync.upload_db_to_drive()[0], "upload failed"
+            lists = fake.calls['list']
+            print(f"{uploads} consecutive uploads: {lists} files().list calls "
+                  f"(before: {2 * uploads}), {fake.calls['update']} updates, {len(built)} client build(s)")
+            assert lists == 2, f"expected 2 list calls (folder + file lookup once), got {lists}"
+            assert len(built) == 1, "Drive client should be built once per thread"
+
+            # 백업 파일이 지워짐 -> 캐시한 ID 로 update 404 -> ID 캐시 비우고 다시 찾아 새로 생성
+            fake.remove(drive_sync.FIXED_FILENAME)
+            before = dict(fake.calls)
+            assert drive_sync.upload_db_to_drive()[0], "upload after file deletion failed"
+            assert fake.calls['update'] == before['update'] + 1 and fake.calls['create'] == before['create'] + 1
+            assert fake.calls['list'] == before['list'] + 2, "stale ids should be looked up again"
+            print("backup file deleted: 404 -> id cache dropped -> re-created on retry")
+
+            # 폴더까지 지워짐 -> 목록 조회 404 -> 다시 찾기 (폴더 없음 = 빈 목록)
+            fake.remove(drive_sync.FOLDER_NAME)
+            assert drive_sync.list_backups() == []
+            assert drive_sync.upload_db_to_drive()[0], "upload after folder deletion failed"
+            assert len(drive_sync.list_backups()) == 1
+            print("backup folder deleted: 404 -> id cache dropped -> folder and file re-created")
+        finally:
+            drive_sync.set_drive_service_factory(None)
+            drive_sync.DB_FILE, drive_sync.SYNC_META_FILE, drive_sync.BACKUP_MODE = orig
+
+
+def main():
+    parser = argparse.ArgumentParser(description="voca 성능 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("connection", help="DB 연결 풀 효과 측정")
+    p.add_argument("--calls", type=int, default=2000)
+
+    p = sub.add_parser("vocab", help="단어장 스토어 효과 측정 (rerun당 비용)")
+    p.add_argument("--words", type=int, default=5000)
+    p.add_argument("--reruns", type=int, default=200)
+
+    p = sub.add_parser("recalibrate", help="단어 난이도 재조정 (합성 로그)")
+    p.add_argument("--rows", type=int, default=10_000_000)
+    p.add_argument("--words", type=int, default=5000)
+    p.add_argument("--sample", type=int, default=50_000)
+
+    p = sub.add_parser("logsize", help="study_log 행 인코딩별 크기 (100만 행당 절감량)")
+    p.add_argument("--rows", type=int, default=1_000_000)
+
+    p = sub.add_parser("replication", help="세션 종료당 백업 전송량 (전체 업로드 vs 증분 복제)")
+    p.add_argument("--sessions", type=int, default=50)
+    p.add_argument("--answers", type=int, default=15)
+    p.add_argument("--log-rows", type=int, default=300_000)
+
+    p = sub.add_parser("history", help="일일 백업 이력 저장량/전송 시간 (중복 제거 청크 저장소)")
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--answers-per-day", type=int, default=3000)
+    p.add_argument("--log-rows", type=int, default=300_000)
+    p.add_argument("--latency-ms", type=float, default=20)
+
+    p = sub.add_parser("drive", help="드라이브 백업 API 왕복 횟수 (가짜 드라이브, 클라이언트/ID 캐시 검증)")
+    p.add_argument("--uploads", type=int, default=6)
+
+    args = parser.parse_args()
+    if args.command == "connection":
+        bench_connection(args.calls)
+    elif args.command == "vocab":
+        bench_vocab(args.words, args.reruns)
+    elif args.command == "recalibrate":
+        bench_recalibrate(args.rows, args.words, args.sample)
+    elif args.command == "logsize":
+        bench_logsize(args.rows)
+    elif args.command == "replication":
+        bench_replication(args.sessions, args.answers, args.log_rows)
+    elif args.command == "history":
+        bench_history(args.days, args.answers_per_day, args.log_rows, args.latency_ms)
+    elif args.command == "drive":
+        bench_drive(args.uploads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+중복 제거 청크 저장소 (백업 이력)
+
+voca.db 스냅샷을 내용 기준 가변 길이 청크(Content-Defined Chunking)로 나눠
+청크별 SHA-256 이름으로 압축 저장하고, 스냅샷마다 청크 목록(manifest)만 따로 남긴다.
+- 날마다 바뀌는 부분은 일부 페이지뿐이므로 새 청크만 올라가고 나머지는 이전 스냅샷과 공유
+- 청크 경계가 내용으로 정해지므로 앞부분에 바이트가 끼어들어도(VACUUM 등) 뒤쪽 청크는 그대로 재사용
+- 업로드/다운로드는 스레드 풀에서 병렬 실행, 복구 시 청크마다 해시 검증 후 순서대로 기록
+
+저장소는 replication.ReplicaStore 인터페이스를 그대로 사용한다 (LocalDirStore / drive_sync.DriveReplicaStore).
+
+    store = replication.LocalDirStore("history")
+    chunkstore.backup_snapshot(store, note="단어 100개 추가 전")
+    chunkstore.list_snapshots(store)
+    chunkstore.restore_snapshot(store, name, "voca.db")
+"""
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import database as db
+import replication
+
+CHUNK_MIN = 8 * 1024                # 최소 청크 크기
+CHUNK_AVG_BITS = 15                 # 평균 청크 크기 2^15 = 32KiB (경계 확률 1/2^15)
+CHUNK_MAX = 128 * 1024              # 최대 청크 크기
+CHUNK_WINDOW = 48                   # 경계 판단에 쓰는 이동 창 크기 (바이트)
+CHUNK_SCAN_BLOCK = 1024 * 1024      # 경계 후보를 찾을 때 한 번에 처리할 크기 (메모리 제한)
+CHUNK_WORKERS = 8                   # 병렬 전송 스레드 수
+CHUNK_COMPRESS_LEVEL = 6
+CHUNK_KEEP_SNAPSHOTS = 30           # prune_snapshots() 기본 보관 개수
+
+_CHUNK_PREFIX = 'chunk-'
+_MANIFEST_PREFIX = 'manifest-'
+# 청크 경계가 프로세스/서버가 달라도 같아야 하므로 고정 시드
+_GEAR = np.random.default_rng(0x564F4341).integers(0, 2**63, 256, dtype=np.uint64)
+_BOUNDARY_MASK = np.uint64((1 << CHUNK_AVG_BITS) - 1)
+
+
+def chunk_name(digest):
+    return f"{_CHUNK_PREFIX}{digest}.z"
+
+def _boundary_candidates(data):
+    """
+    이동 창(CHUNK_WINDOW) 해시의 상위 비트가 0인 위치 (청크 끝 오프셋 후보, 오름차순)
+    - 창 해시 = 창 안 바이트별 난수값의 합 (누적합 차이로 벡터 계산)
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    found = []
+    for off in range(0, len(arr), CHUNK_SCAN_BLOCK):
+        lo = max(0, off - CHUNK_WINDOW + 1)
+        seg = _GEAR[arr[lo:off + CHUNK_SCAN_BLOCK]]
+        if len(seg) < CHUNK_WINDOW:
+            break
+        csum = np.cumsum(seg, dtype=np.uint64)
+        window = csum[CHUNK_WINDOW - 1:] - np.concatenate((np.zeros(1, dtype=np.uint64), csum[:-CHUNK_WINDOW]))
+        hits = np.flatnonzero(((window >> np.uint64(40)) & _BOUNDARY_MASK) == 0)
+        found.append(hits + lo + CHUNK_WINDOW) # 창이 끝나는 다음 위치 = 청크 끝
+    return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+def chunk_boundaries(data):
+    """data 를 나눌 청크 끝 오프셋 목록 (CHUNK_MIN ~ CHUNK_MAX, 마지막은 len(data))"""
+    n = len(data)
+    candidates = _boundary_candidates(data).tolist()
+    bounds = []
+    start = 0
+    while start < n:
+        lo, hi = start + CHUNK_MIN, min(start + CHUNK_MAX, n)
+        if lo >= n:
+            end = n
+        else:
+            k = bisect.bisect_left(candidates, lo)
+            end = candidates[k] if k < len(candidates) and candidates[k] <= hi else hi
+        bounds.append(end)
+        start = end
+    return bounds
+
+
+def _put_chunk(store, digest, chunk):
+    payload = zlib.compress(chunk, CHUNK_COMPRESS_LEVEL)
+    store.put(chunk_name(digest), payload)
+    return len(payload)
+
+def backup_snapshot(store, note="", workers=CHUNK_WORKERS, data=None):
+    """
+    현재 DB 스냅샷을 청크 저장소에 저장 (저장소에 없는 청크만 병렬 업로드, 마지막에 manifest)
+    data 를 주면 그 내용을 스냅샷으로 사용 (벤치마크/테스트)
+    Return: dict(name, chunks, new_chunks, uploaded_bytes, db_bytes, seconds)
+    """
+    t0 = time.perf_counter()
+    if data is None:
+        data = replication.snapshot_bytes('.chunk.tmp')
+    known = {n for n in store.list() if n.startswith(_CHUNK_PREFIX)}
+
+    entries = []
+    new = {}
+    start = 0
+    for end in chunk_boundaries(data):
+        chunk = data[start:end]
+        digest = hashlib.sha256(chunk).hexdigest()
+        entries.append([digest, end - start])
+        if chunk_name(digest) not in known and digest not in new:
+            new[digest] = chunk
+        start = end
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        uploaded = sum(pool.map(lambda item: _put_chunk(store, *item), new.items()))
+
+    # manifest 는 모든 청크가 올라간 뒤에 기록 (목록에 보이는 스냅샷은 항상 복구 가능)
+    created = datetime.now()
+    sha = hashlib.sha256(data).hexdigest()
+    manifest = {
+        'format': 1,
+        'created': created.isoformat(timespec='seconds'),
+        'note': note,
+        'db_bytes': len(data),
+        'sha256': sha,
+        'chunks': entries,
+    }
+    name = f"{_MANIFEST_PREFIX}{created:%Y%m%d-%H%M%S-%f}-{sha[:8]}.json" # 이름순 = 시간순
+    body = json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    store.put(name, body)
+    return {
+        'name': name, 'chunks': len(entries), 'new_chunks': len(new),
+        'uploaded_bytes': uploaded + len(body), 'db_bytes': len(data),
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+def _load_manifest(store, name):
+    return json.loads(store.get(name).decode('utf-8'))
+
+def list_snapshots(store, workers=CHUNK_WORKERS):
+    """저장된 스냅샷 목록 (최신순) -> list of dict(name, created, note, db_bytes, chunks)"""
+    names = sorted((n for n in store.list() if n.startswith(_MANIFEST_PREFIX)), reverse=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        manifests = list(pool.map(lambda n: _load_manifest(store, n), names))
+    return [
+        {'name': n, 'created': m['created'], 'note': m.get('note', ''), 'db_bytes': m['db_bytes'], 'chunks': len(m['chunks'])}
+        for n, m in zip(names, manifests)
+    ]
+
+def _fetch_chunk(store, digest, size):
+    chunk = zlib.decompress(store.get(chunk_name(digest)))
+    if len(chunk) != size or hashlib.sha256(chunk).hexdigest() != digest:
+        raise ValueError(f"청크 검증 실패: {digest[:12]}")
+    return chunk
+
+def restore_snapshot(store, name, dest_path, workers=CHUNK_WORKERS):
+    """
+    스냅샷 복구: 청크를 병렬로 받아 검증하고 순서대로 임시 파일에 기록 -> 전체 해시/무결성 검사 후 원자적 교체
+    (동시에 메모리에 올리는 청크는 workers * 4 개 이내)
+    Return: dict(name, db_bytes, chunks, seconds)
+    """
+    t0 = time.perf_counter()
+    manifest = _load_manifest(store, name)
+    entries = manifest['chunks']
+    tmp_path = dest_path + '.restore'
+    whole = hashlib.sha256()
+    window = max(1, workers * 4)
+    try:
+        with open(tmp_path, 'wb') as f, ThreadPoolExecutor(max_workers=workers) as pool:
+            for i in range(0, len(entries), window):
+                batch = entries[i:i + window]
+                for chunk in pool.map(lambda e: _fetch_chunk(store, *e), batch):
+                    whole.update(chunk)
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        if whole.hexdigest() != manifest['sha256']:
+            raise ValueError("복구한 파일의 해시가 스냅샷과 다릅니다.")
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            check = conn.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            conn.close()
+        if check != 'ok':
+            raise ValueError(f"복구한 DB 무결성 검사 실패: {check}")
+
+        if os.path.abspath(dest_path) == os.path.abspath(db.DB_FILE):
+            db.replace_db_file(tmp_path) # 쓰기 스레드/연결 정리 후 교체
+        else:
+            os.replace(tmp_path, dest_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return {'name': name, 'db_bytes': manifest['db_bytes'], 'chunks': len(entries),
+            'seconds': time.perf_counter() - t0}
+
+
+def prune_snapshots(store, keep=CHUNK_KEEP_SNAPSHOTS):
+    """
+    최신 keep 개만 남기고 오래된 manifest 삭제 + 어떤 스냅샷도 쓰지 않는 청크 정리
+    Return: (삭제한 스냅샷 수, 삭제한 청크 수)
+    """
+    names = store.list()
+    manifests = sorted((n for n in names if n.startswith(_MANIFEST_PREFIX)), reverse=True)
+    kept, dropped = manifests[:keep], manifests[keep:]
+    for n in dropped:
+        store.delete(n)
+    live = set()
+    for n in kept:
+        live.update(chunk_name(d) for d, _ in _load_manifest(store, n)['chunks'])
+    orphans = [n for n in names if n.startswith(_CHUNK_PREFIX) and n not in live]
+    for n in orphans:
+        store.delete(n)
+    return len(dropped), len(orphans)
+
+
+def store_usage(store):
+    """저장소 사용량 요약 (LocalDirStore 전용: 파일 크기 합) -> dict(snapshots, chunks, bytes)"""
+    names = store.list()
+    return {
+        'snapshots': sum(n.startswith(_MANIFEST_PREFIX) for n in names),
+        'chunks': sum(n.startswith(_CHUNK_PREFIX) for n in names),
+        'bytes': sum(os.path.getsize(os.path.join(store.path, n)) for n in names),
+    }
@@ -1,40 +1,1075 @@
 import sqlite3
 import pandas as pd
-import streamlit as st
+import numpy as np
+import bisect
 import os
-from datetime import datetime
+import json
+import logging
+import pathlib
+import queue
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import metrics
+import tracing
 
 DB_FILE = "voca.db"
 
+# --- 연결 풀 설정 ---
+DB_POOL_SIZE = 8                    # 보관할 유휴 연결 최대 개수
+DB_BUSY_TIMEOUT_MS = 5000           # 쓰기 락 대기 시간 (ms)
+DB_MMAP_SIZE = 64 * 1024 * 1024     # 메모리 맵 크기 (64MB)
+DB_CACHED_STATEMENTS = 256          # 연결별 Prepared Statement 캐시 크기
+DB_SWAP_TIMEOUT_SEC = 30            # DB 파일 교체 전 사용 중인 연결이 반납되기를 기다리는 최대 시간
+
+# --- 그룹 커밋 쓰기 스레드 설정 ---
+WRITER_BATCH_WINDOW_MS = 5          # 첫 요청 이후 같은 커밋으로 묶을 대기 시간 (ms)
+WRITER_MAX_BATCH = 256              # 한 커밋에 묶을 최대 쓰기 요청 수
+
+# --- 1회성 마이그레이션 단계 (PRAGMA user_version) ---
+SCHEMA_PROGRESS_DAYS = 1            # user_progress 날짜 TEXT -> 정수 일수 변환 완료
+SCHEMA_LEVEL_WINDOW_GUARD = 2       # trg_log_level_window 에 NULL 가드 추가 + 고아 행 정리
+
+# --- 레벨 평가 ---
+LEVEL_WINDOW_SIZE = 50              # 레벨 평가에 쓰는 최근 답안 수 (현재 레벨 기준)
+
+# --- 답안 기록 Write-Behind 설정 ---
+ANSWER_WRITE_BEHIND = False         # True: 답안을 저널에 먼저 기록하고 DB 반영은 백그라운드에서
+ANSWER_JOURNAL_FILE = "answer_journal.jsonl"
+ANSWER_JOURNAL_FSYNC = True         # 저널 기록마다 fsync (프로세스/전원 장애 대비)
+
+# --- 관리자 통계 스냅샷 ---
+ANALYTICS_SNAPSHOT_SUFFIX = ".analytics.db"  # DB_FILE 옆에 만드는 읽기 전용 사본 (voca.analytics.db)
+ANALYTICS_SNAPSHOT_MAX_AGE = 300    # 이 시간(초)보다 오래된 스냅샷은 다음 조회 때 다시 만듦
+
+# --- 학습 로그 보관 (Hot/Cold) ---
+LOG_ARCHIVE_DIR = "log_archive"     # DB_FILE 옆 폴더, 월별 파일 study_log_YYYY_MM.db
+LOG_ARCHIVE_HORIZON_DAYS = 180      # 학습일이 이보다 오래된 로그를 보관 파일로 이동
+LOG_ARCHIVE_BATCH_ROWS = 10_000     # 1회에 옮길 최대 행 수 (writer 의 범위 삭제 1회가 짧게 끝나도록)
+
+# --- 쿼리 계측 (지연시간 히스토그램 / 느린 쿼리 로그) ---
+QUERY_STATS_ENABLED = True          # False: 계측 없이 sqlite3 기본 커서 사용
+QUERY_STATS_MAX_KEYS = 500          # 따로 집계할 최대 SQL 문장 수 (넘으면 '(other)'로 합산)
+QUERY_LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SLOW_QUERY_MS = 200                 # 이 시간(ms) 이상 걸린 쿼리는 느린 쿼리 로그에 기록
+SLOW_QUERY_LOG_FILE = "slow_query.log"
+SLOW_QUERY_LOG_MAX_BYTES = 1024 * 1024  # 로그 파일 교체 크기
+SLOW_QUERY_LOG_BACKUPS = 3          # 보관할 이전 로그 파일 수 (slow_query.log.1 ~ .3)
+
+
+class _QueryEntry:
+    __slots__ = ('name', 'calls', 'errors', 'rows', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(QUERY_LATENCY_BUCKETS_MS) + 1) # 마지막 칸 = 최대 경계 초과
+
+
+class QueryStats:
+    """
+    SQL 문장별 호출 수 / 오류 수 / 반환 행 수 / 지연시간 히스토그램 (프로세스 전역, 스레드 안전)
+    - 키는 SQL 문자열, 이름은 처음 실행한 함수 (예: get_user_info, accumulate_word_answer_stats._write)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def __contains__(self, sql):
+        return sql in self._entries
+
+    def record(self, sql, name, elapsed_ms, rows, error=False):
+        """1회 실행 결과 반영 -> 해당 SQL의 이름"""
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is None:
+                if len(self._entries) >= QUERY_STATS_MAX_KEYS:
+                    sql, name = '(other)', '(other)'
+                    entry = self._entries.get(sql)
+                if entry is None:
+                    entry = self._entries[sql] = _QueryEntry(name or '?')
+            entry.calls += 1
+            entry.errors += 1 if error else 0
+            entry.rows += rows
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.buckets[bisect.bisect_left(QUERY_LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            return entry.name
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+
+    def snapshot(self):
+        """[(sql, name, calls, errors, rows, total_ms, max_ms, buckets), ...] 복사본"""
+        with self._lock:
+            return [(sql, e.name, e.calls, e.errors, e.rows, e.total_ms, e.max_ms, list(e.buckets))
+                    for sql, e in self._entries.items()]
+
+
+_query_stats = QueryStats()
+
+# 호출자 이름을 찾을 때 건너뛸 계측 코드 함수 이름
+_INSTRUMENTATION_FUNCS = {
+    'execute', 'executemany', 'cursor', 'fetchone', 'fetchmany', 'fetchall', '__next__',
+    '_begin_query', '_fetched', '_finish_query', 'close', '__del__',
+}
+
+def _caller_name():
+    """쿼리를 실행한 함수 이름 (계측 코드/pandas 프레임은 건너뜀)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if frame.f_globals.get('__name__') == __name__ and code.co_name in _INSTRUMENTATION_FUNCS:
+            pass
+        elif f"{os.sep}pandas{os.sep}" not in code.co_filename:
+            break
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    name = getattr(code, 'co_qualname', code.co_name).replace('.<locals>', '')
+    module = frame.f_globals.get('__name__', '?')
+    return name if module == __name__ else f"{module}.{name}"
+
+def _percentile_ms(buckets, max_ms, q):
+    """히스토그램 -> q 분위 지연시간 상한 (ms, 해당 구간의 위쪽 경계, 최대값을 넘지 않음)"""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    cumulative = 0
+    for bound, n in zip(QUERY_LATENCY_BUCKETS_MS + (max_ms,), buckets):
+        cumulative += n
+        if cumulative >= q * total:
+            return min(bound, max_ms)
+    return max_ms
+
+def get_query_stats():
+    """SQL별 지연시간 통계 DataFrame (총 소요시간 순)"""
+    rows = []
+    for sql, name, calls, errors, n_rows, total_ms, max_ms, buckets in _query_stats.snapshot():
+        rows.append({
+            'name': name, 'sql': ' '.join(sql.split()), 'calls': calls, 'errors': errors, 'rows': n_rows,
+            'total_ms': round(total_ms, 2), 'mean_ms': round(total_ms / calls, 3) if calls else 0.0,
+            'p50_ms': _percentile_ms(buckets, max_ms, 0.5), 'p95_ms': _percentile_ms(buckets, max_ms, 0.95),
+            'max_ms': round(max_ms, 3),
+        })
+    columns = ['name', 'sql', 'calls', 'errors', 'rows', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms']
+    df = pd.DataFrame(rows, columns=columns)
+    return df.sort_values('total_ms', ascending=False, ignore_index=True)
+
+def get_query_histogram(name):
+    """함수 이름(name)으로 실행된 쿼리들의 지연시간 히스토그램 (le_ms = 구간 상한, inf = 최대 경계 초과)"""
+    counts = [0] * (len(QUERY_LATENCY_BUCKETS_MS) + 1)
+    for _, entry_name, *_, buckets in _query_stats.snapshot():
+        if entry_name == name:
+            counts = [a + b for a, b in zip(counts, buckets)]
+    return pd.DataFrame({'le_ms': list(QUERY_LATENCY_BUCKETS_MS) + [float('inf')], 'count': counts})
+
+def reset_query_stats():
+    _query_stats.reset()
+
+
+_slow_log_lock = threading.Lock()
+_slow_logger = None
+
+def _get_slow_logger():
+    global _slow_logger
+    with _slow_log_lock:
+        if _slow_logger is None:
+            logger = logging.getLogger('voca.slow_query')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False # 콘솔/루트 로거로 흘리지 않음
+            handler = RotatingFileHandler(
+                SLOW_QUERY_LOG_FILE, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS, encoding='utf-8', delay=True
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            _slow_logger = logger
+        return _slow_logger
+
+def _loggable(value, limit=200):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit] + '…'
+    return value
+
+def _explain_query_plan(conn, sql, params):
+    """느린 쿼리의 EXPLAIN QUERY PLAN (같은 연결에서, 계측 없이)"""
+    head = sql.lstrip()[:7].upper()
+    if not head.startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')):
+        return []
+    if params is None:
+        params = [None] * sql.count('?') # executemany에 이터레이터를 넘긴 경우: 바인딩 없이 계획만
+    try:
+        rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        return [row[3] for row in rows]
+    except sqlite3.Error as e:
+        return [f"(explain failed: {e})"]
+
+def _log_slow_query(conn, sql, name, params, many, elapsed_ms, rows):
+    try:
+        first = (params[0] if params else None) if many else params
+        if isinstance(first, dict):
+            shown = {k: _loggable(v) for k, v in first.items()}
+        else:
+            shown = [_loggable(v) for v in first] if first is not None else None
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(elapsed_ms, 1),
+            'name': name,
+            'rows': rows,
+            'sql': ' '.join(sql.split()),
+            'params': shown,
+            'plan': _explain_query_plan(conn, sql, first),
+        }
+        if many:
+            entry['batch'] = len(params) if params is not None else None
+        _get_slow_logger().warning(json.dumps(entry, ensure_ascii=False, default=str))
+    except Exception as e:
+        print(f"Error writing slow query log: {e}")
+
+def read_slow_query_log(limit=50):
+    """느린 쿼리 로그 최근 limit건 (최신순, 현재 파일만)"""
+    try:
+        with open(SLOW_QUERY_LOG_FILE, encoding='utf-8') as f:
+            lines = f.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    실행부터 결과를 다 읽을 때까지의 시간과 반환 행 수를 QueryStats에 기록하는 커서
+    - 결과 행이 없는 문장(INSERT/UPDATE/DDL)은 execute 직후, SELECT는 결과 소진/close/다음 execute 때 기록
+    - SLOW_QUERY_MS 이상이면 파라미터와 EXPLAIN QUERY PLAN을 느린 쿼리 로그에 기록
+    """
+    _q_sql = None
+
+    def _begin_query(self, sql, params, many):
+        self._finish_query()
+        self._q_sql = sql
+        self._q_name = None if sql in _query_stats else _caller_name() # 이름은 처음 한 번만 계산
+        self._q_params = params
+        self._q_many = many
+        self._q_rows = 0
+        self._q_ms = 0.0
+
+    def _finish_query(self, error=False):
+        sql = self._q_sql
+        if sql is None:
+            return
+        self._q_sql = None
+        rows = self._q_rows if self._q_rows or self.description is not None else max(self.rowcount, 0)
+        name = _query_stats.record(sql, self._q_name, self._q_ms, rows, error)
+        if self._q_ms >= SLOW_QUERY_MS:
+            _log_slow_query(self.connection, sql, name, self._q_params, self._q_many, self._q_ms, rows)
+
+    def _fetched(self, t0, n, done):
+        if self._q_sql is None:
+            return
+        self._q_ms += (time.perf_counter() - t0) * 1000
+        self._q_rows += n
+        if done:
+            self._finish_query()
+
+    def execute(self, sql, parameters=()):
+        self._begin_query(sql, parameters, False)
+        t0 = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception:
+            self._q_ms += (time.perf_counter() - t0) * 1000
+            self._finish_query(error=True)
+            raise
+        self._q_ms += (time.perf_counter() - t0) * 1000
+        if self.description is None:
+            self._finish_query()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        params = seq_of_parameters if isinstance(seq_of_parameters, (list, tuple)) else None
+        self._begin_query(sql, params, True)
+        t0 = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        except Exception:
+            self._q_ms += (time.perf_counter() - t0) * 1000
+            self._finish_query(error=True)
+            raise
+        self._q_ms += (time.perf_counter() - t0) * 1000
+        self._finish_query()
+        return self
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(t0, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        t0 = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(t0, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(t0, len(rows), True)
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(t0, 0, True)
+            raise
+        self._fetched(t0, 1, False)
+        return row
+
+    def close(self):
+        self._finish_query()
+        super().close()
+
+    def __del__(self):
+        # execute(...).fetchone()처럼 결과를 끝까지 읽지 않고 버린 커서
+        try:
+            self._finish_query()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """execute/executemany/cursor()를 InstrumentedCursor로 실행하는 연결 (QUERY_STATS_ENABLED일 때)"""
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = InstrumentedCursor if QUERY_STATS_ENABLED else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class PooledConnection(InstrumentedConnection):
+    """
+    풀에서 빌려준 연결.
+    close()를 호출해도 실제로 닫지 않고 풀에 반납함 (기존 conn.close() 코드 그대로 사용 가능)
+    """
+    _pool = None
+    _generation = 0
+    _checked_out = False
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        elif self._checked_out:
+            self._checked_out = False
+            self._pool.release(self)
+        # 이미 반납된 연결에 대한 중복 close()는 무시
+
+    def really_close(self):
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    프로세스 전역 SQLite 연결 풀
+    - WAL 저널 / busy_timeout / synchronous=NORMAL / mmap 튜닝된 연결을 재사용
+    - 한 연결은 한 번에 한 스레드만 사용 (acquire ~ close 구간)
+    - reset() 호출 시 세대(generation)가 바뀌어 기존 연결은 반납 시점에 폐기됨 (DB 파일 교체 대응)
+    """
+    def __init__(self, max_idle=DB_POOL_SIZE):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._generation = 0
+        self._in_use = 0        # 빌려준(아직 반납되지 않은) 연결 수
+        self._paused = False    # drain() ~ resume() 동안 새 대여 대기
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            DB_FILE,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False, # 스레드 간 이동은 풀이 직렬화함
+            cached_statements=DB_CACHED_STATEMENTS,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(DB_MMAP_SIZE)}')
+        return conn
+
+    def acquire(self):
+        with self._cond:
+            while self._paused:
+                self._cond.wait()
+            self._in_use += 1
+            generation = self._generation
+            while self._idle:
+                conn = self._idle.pop()
+                if conn._generation == generation:
+                    conn._checked_out = True
+                    return conn
+                conn.really_close()
+
+        try:
+            conn = self._connect()
+        except Exception:
+            self._returned()
+            raise
+        conn._generation = generation
+        conn._pool = self
+        conn._checked_out = True
+        return conn
+
+    def _returned(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+
+    def release(self, conn):
+        # 커밋하지 않은 트랜잭션은 버림 (다음 사용자에게 넘기지 않음)
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.really_close()
+            self._returned()
+            return
+
+        with self._cond:
+            if conn._generation == self._generation and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                self._in_use -= 1
+                self._cond.notify_all()
+                return
+        conn.really_close()
+        self._returned()
+
+    def drain(self, timeout):
+        """
+        새 대여를 막고 빌려준 연결이 모두 반납될 때까지 대기한 뒤 모든 연결을 닫음 (resume() 까지 유지)
+        시간 안에 반납되지 않으면 대여를 다시 열고 TimeoutError
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._paused = True
+            while self._in_use:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._paused = False
+                    self._cond.notify_all()
+                    raise TimeoutError(f"DB 연결 {self._in_use}개가 반납되지 않았습니다.")
+                self._cond.wait(remaining)
+        self.reset()
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def reset(self):
+        """모든 유휴 연결 폐기 + 세대 증가 (사용 중인 연결은 반납 시 폐기)"""
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.really_close()
+            except sqlite3.Error:
+                pass
+
+
+_pool = ConnectionPool()
+_schema_generation = None           # 스키마 초기화/마이그레이션을 마친 풀 세대
+_schema_lock = threading.Lock()
+_schema_local = threading.local()
+
+def _ensure_schema():
+    """풀 세대(=DB 파일)마다 한 번 init_db() 실행 (테이블 생성 + 마이그레이션)"""
+    global _schema_generation
+    generation = _pool.generation
+    if _schema_generation == generation or getattr(_schema_local, 'busy', False):
+        return
+    with _schema_lock:
+        if _schema_generation == generation:
+            return
+        _schema_local.busy = True # init_db 내부의 get_db_connection() 재진입 방지
+        try:
+            init_db()
+        finally:
+            _schema_local.busy = False
+        _schema_generation = generation
+
+        # 이전 실행에서 DB에 반영되지 못한 Write-Behind 답안 재적용
+        if os.path.exists(ANSWER_JOURNAL_FILE) and os.path.getsize(ANSWER_JOURNAL_FILE) > 0:
+            _answer_journal.start()
+
 def get_db_connection():
-    """DB 연결 가져오기 (없으면 생성)"""
-    conn = sqlite3.connect(DB_FILE)
+    """DB 연결 가져오기 (풀에서 재사용, 없으면 생성). 사용 후 close() 하면 풀에 반납됨"""
+    _ensure_schema()
+    return _pool.acquire()
+
+def close_all_connections():
+    """
+    풀의 유휴 연결 정리 + 세대 증가 (사용 중인 연결은 반납 시 폐기)
+    DB 파일을 교체할 때는 replace_db_file() 사용 (사용 중인 연결까지 기다림)
+    """
+    _pool.reset()
+
+def replace_db_file(src_path, timeout=DB_SWAP_TIMEOUT_SEC):
+    """
+    DB_FILE 을 src_path 파일로 교체 (드라이브 동기화 / 백업 복구 / 증분 복구 공용)
+    1. 쓰기 스레드: 이미 등록된 요청을 모두 커밋한 뒤 멈춤 (교체 중 요청은 큐에서 대기 -> 새 파일에 반영)
+    2. 연결 풀: 새 대여를 막고 빌려준 연결이 모두 반납될 때까지 대기 후 모든 연결 닫기
+    3. 열린 연결이 하나도 없을 때만 이전 DB의 -wal/-shm 삭제 후 os.replace
+    (timeout 안에 연결이 반납되지 않으면 교체하지 않고 TimeoutError)
+    """
+    with _writer.paused():
+        _pool.drain(timeout)
+        try:
+            for suffix in ('-wal', '-shm'):
+                try:
+                    os.remove(DB_FILE + suffix)
+                except FileNotFoundError:
+                    pass
+            os.replace(src_path, DB_FILE)
+        finally:
+            _pool.resume()
+
+def checkpoint_db():
+    """
+    WAL 내용을 본 DB 파일에 반영 (파일 단위 백업/업로드 전에 호출)
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return True
+    except Exception as e:
+        print(f"Error checkpointing DB: {e}")
+        return False
+    finally:
+        conn.close()
+
+_analytics_lock = threading.Lock()
+_analytics_state = {'generation': None} # 스냅샷을 만든 풀 세대 (None = 무효)
+
+def _analytics_snapshot_path():
+    return os.path.splitext(DB_FILE)[0] + ANALYTICS_SNAPSHOT_SUFFIX
+
+def get_analytics_snapshot_age():
+    """통계 스냅샷 경과 시간(초). 스냅샷이 없으면 None"""
+    try:
+        return max(0.0, time.time() - os.path.getmtime(_analytics_snapshot_path()))
+    except OSError:
+        return None
+
+def invalidate_analytics_snapshot():
+    """다음 통계 조회 때 스냅샷을 새로 만들도록 표시 (학생 삭제 등 즉시 반영이 필요한 변경 후)"""
+    _analytics_state['generation'] = None
+
+def _refresh_analytics_snapshot():
+    path = _analytics_snapshot_path()
+    tmp_path = path + ".tmp"
+    src = get_db_connection()
+    generation = _pool.generation
+    dst = None
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        dst = sqlite3.connect(tmp_path)
+        src.backup(dst)
+        dst.execute('PRAGMA journal_mode=DELETE') # 단일 파일로 (읽기 전용 열기에 -wal/-shm 불필요)
+        dst.close()
+        dst = None
+        os.replace(tmp_path, path)
+        _analytics_state['generation'] = generation
+        return True
+    except Exception as e:
+        print(f"Error refreshing analytics snapshot: {e}")
+        return False
+    finally:
+        if dst is not None:
+            dst.close()
+        src.close()
+
+def refresh_analytics_snapshot():
+    """
+    SQLite 온라인 백업 API로 DB 전체를 스냅샷 파일에 복사
+    - 한 번의 읽기 트랜잭션으로 복사 (pages=-1): WAL 모드라 학생 답안 커밋을 막지 않음
+    - 임시 파일에 쓴 뒤 os.replace로 교체: 이미 열린 스냅샷 연결은 이전 파일을 끝까지 읽음
+    """
+    with _analytics_lock:
+        return _refresh_analytics_snapshot()
+
+def get_analytics_connection(max_age=ANALYTICS_SNAPSHOT_MAX_AGE):
+    """
+    관리자 통계용 읽기 전용 연결 (스냅샷 파일, 오래됐으면 먼저 갱신)
+    - 스냅샷은 바뀌지 않는 파일이므로 immutable로 열어 락을 전혀 잡지 않음
+    - 스냅샷을 만들 수 없으면 본 DB 풀 연결로 대체
+    """
+    with _analytics_lock:
+        age = get_analytics_snapshot_age()
+        fresh = age is not None and age <= max_age and _analytics_state['generation'] == _pool.generation
+        if not fresh and not _refresh_analytics_snapshot():
+            return get_db_connection()
+
+    uri = pathlib.Path(_analytics_snapshot_path()).resolve().as_uri() + "?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
+class GroupCommitWriter:
+    """
+    프로세스 전역 단일 쓰기 스레드 (Group Commit)
+    - 모든 세션의 쓰기 요청(fn(conn, *args))을 큐로 받아 몇 ms 단위로 모아 한 트랜잭션으로 커밋
+    - 요청마다 SAVEPOINT로 감싸서 하나가 실패해도 같은 배치의 다른 요청은 커밋됨
+    - submit()은 Future 반환: 커밋(내구성)까지 기다려야 하면 .result() 호출
+    """
+    def __init__(self, window_ms=WRITER_BATCH_WINDOW_MS, max_batch=WRITER_MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._gate = threading.Lock() # 배치 커밋 중 보유 -> pause() 가 잡으면 다음 배치는 대기 (요청은 큐에 보관)
+        self._thread = None
+        # 지표
+        self.commits = 0
+        self.writes = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.last_batch_size = 0
+        self.last_commit_ms = 0.0
+        self.batch_size_hist = {} # 배치 크기 구간(1, 2, 4, 8 ...) -> 횟수
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        self._start()
+        self._queue.put((fn, args, future))
+        return future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self._gate:
+                    self._commit_batch(batch)
+            except Exception as e:
+                print(f"Error in DB writer: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit_batch(self, batch):
+        results = []
+        t0 = time.perf_counter()
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN')
+            for fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT group_write')
+                try:
+                    results.append((future, fn(conn, *args), None))
+                    conn.execute('RELEASE group_write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO group_write')
+                    conn.execute('RELEASE group_write')
+                    results.append((future, None, e))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        size = len(batch)
+        bucket = 1 << (size - 1).bit_length()
+        self.commits += 1
+        self.writes += size
+        self.last_batch_size = size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        elapsed = time.perf_counter() - t0
+        self.last_commit_ms = elapsed * 1000
+        metrics.DB_COMMIT_SECONDS.observe(elapsed)
+        self.batch_size_hist[bucket] = self.batch_size_hist.get(bucket, 0) + 1
+
+        for future, result, error in results:
+            if error is not None:
+                self.errors += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @contextmanager
+    def paused(self):
+        """이미 등록된 요청을 모두 커밋한 뒤 쓰기 스레드를 멈춤 (블록 안에서 등록된 요청은 큐에서 대기)"""
+        self.submit(lambda conn: None).result() # 앞선 요청 모두 커밋될 때까지 (큐는 순서대로 처리)
+        with self._gate:
+            yield
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'commits': self.commits,
+            'writes': self.writes,
+            'errors': self.errors,
+            'avg_batch_size': (self.writes / self.commits) if self.commits else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'last_batch_size': self.last_batch_size,
+            'last_commit_ms': self.last_commit_ms,
+            'batch_size_hist': dict(sorted(self.batch_size_hist.items())),
+        }
+
+
+_writer = GroupCommitWriter()
+
+def submit_write(fn, *args):
+    """쓰기 요청을 그룹 커밋 스레드에 등록 -> Future (fn(conn, *args)의 반환값)"""
+    return _writer.submit(fn, *args)
+
+def get_writer_stats():
+    """그룹 커밋 지표 (큐 길이, 배치 크기 등)"""
+    return _writer.stats()
+
+@metrics.register_collector
+def _collect_db_metrics():
+    """그룹 커밋 / 쿼리 통계를 Prometheus 지표로 (metrics.render() 때마다 호출)"""
+    w = _writer.stats()
+    families = [
+        ('voca_db_writer_queue_depth', 'gauge', '커밋을 기다리는 쓰기 요청 수', [('', {}, w['queue_depth'])]),
+        ('voca_db_writes_total', 'counter', '그룹 커밋으로 처리된 쓰기 요청 수', [('', {}, w['writes'])]),
+        ('voca_db_write_errors_total', 'counter', '실패한 쓰기 요청 수', [('', {}, w['errors'])]),
+    ]
+    # 같은 함수에서 실행한 여러 SQL 은 하나의 시계열로 합산
+    by_name = {}
+    for _, name, n_calls, n_errors, _, total_ms, _, _ in _query_stats.snapshot():
+        acc = by_name.setdefault(name, [0, 0, 0.0])
+        acc[0] += n_calls
+        acc[1] += n_errors
+        acc[2] += total_ms / 1000
+    calls = [('', {'name': n}, v[0]) for n, v in sorted(by_name.items())]
+    errors = [('', {'name': n}, v[1]) for n, v in sorted(by_name.items())]
+    seconds = [('', {'name': n}, v[2]) for n, v in sorted(by_name.items())]
+    families += [
+        ('voca_db_query_calls_total', 'counter', '쿼리 실행 수 (name: 호출 함수)', calls),
+        ('voca_db_query_errors_total', 'counter', '쿼리 오류 수 (name: 호출 함수)', errors),
+        ('voca_db_query_seconds_total', 'counter', '쿼리 누적 소요 시간 (name: 호출 함수)', seconds),
+    ]
+    return families
+
+def _index_exists(c, index_name):
+    return c.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,)).fetchone() is not None
+
+def _schema_version(c):
+    """1회성 마이그레이션 완료 단계 (PRAGMA user_version, 새 DB는 0)"""
+    return c.execute('PRAGMA user_version').fetchone()[0]
+
+def _set_schema_version(c, version):
+    c.execute(f'PRAGMA user_version = {int(version)}')
+
+def _table_exists(c, table_name):
+    return c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).fetchone() is not None
+
+def _table_columns(c, table_name):
+    return [row[1] for row in c.execute(f'PRAGMA table_info({table_name})')]
+
+# --- 유저 참조 테이블 스키마 (마이그레이션 시 재구성에도 사용, {table} = 테이블 이름) ---
+# users.id(정수)를 자식 테이블이 참조 -> 아이디 변경은 users 1행 UPDATE
+USERS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        name TEXT,
+        level INTEGER DEFAULT 1,
+        fail_streak INTEGER DEFAULT 0,
+        level_shield INTEGER DEFAULT 3,
+        qs_count INTEGER DEFAULT 0
+    )
+'''
+USER_PROGRESS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        word_id INTEGER,
+        last_reviewed INTEGER,              -- 1970-01-01 기준 일수 (to_day_number)
+        next_review INTEGER,                -- 1970-01-01 기준 일수
+        interval INTEGER DEFAULT 0,
+        fail_count INTEGER DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (word_id) REFERENCES voca_db (id)
+    )
+'''
+PENDING_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id INTEGER NOT NULL,
+        word_id INTEGER,
+        PRIMARY KEY (user_id, word_id)
+    ) WITHOUT ROWID
+'''
+# 학습 로그: 시각은 epoch 초 정수 1개 (학습일은 ts에서 계산, LOG_DAY_SQL)
+# SQLite 정수는 값 크기만큼만 저장됨 -> level(1~30)은 1바이트, is_correct(0/1)는 0바이트
+STUDY_LOG_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts INTEGER,
+        user_id INTEGER,
+        word_id INTEGER,
+        level INTEGER,
+        is_correct INTEGER,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (word_id) REFERENCES voca_db (id)
+    )
+'''
+# [MIGRATION] ts 변환 이전 스키마 (timestamp/date 문자열) - username -> user_id 마이그레이션 단계에서만 사용
+STUDY_LOG_TEXT_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME,
+        date DATE,
+        word_id INTEGER,
+        user_id INTEGER,
+        level INTEGER,
+        is_correct INTEGER,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (word_id) REFERENCES voca_db (id)
+    )
+'''
+LEVEL_WINDOW_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id INTEGER,
+        level INTEGER,
+        bits INTEGER DEFAULT 0,
+        n INTEGER DEFAULT 0,
+        PRIMARY KEY (user_id, level)
+    )
+'''
+PENDING_TABLES = ('pending_wrongs', 'pending_session')
+
+# username 문자열 -> users.id (자식 테이블 조회/쓰기 SQL에 그대로 끼워 넣는 스칼라 서브쿼리)
+USER_ID_SQL = '(SELECT id FROM users WHERE username = ?)'
+
+def _migrate_to_user_ids(c):
+    """
+    [MIGRATION] 자식 테이블의 username 문자열 참조 -> users.id 정수 참조
+    SQLite 권장 절차(새 테이블 생성 -> 복사 -> 기존 테이블 삭제 -> 이름 변경)로 재구성.
+    users의 pending_wrongs/pending_session 콤마 문자열도 이때 테이블로 옮기고 컬럼은 제거.
+    """
+    user_cols = _table_columns(c, 'users')
+
+    # 1. users: 정수 id 부여 (기존 행 순서대로)
+    c.execute(USERS_TABLE_SQL.format(table='users_new'))
+    cols = ', '.join(col for col in _table_columns(c, 'users_new') if col != 'id' and col in user_cols)
+    c.execute(f'INSERT OR IGNORE INTO users_new ({cols}) SELECT {cols} FROM users ORDER BY rowid')
+
+    # 2. 오답노트 / 진행 중 세션: 기존 (username, word_id) 테이블 + 콤마 문자열 컬럼
+    for table in PENDING_TABLES:
+        rows = []
+        if _table_exists(c, table):
+            rows += [(r[0], r[1]) for r in c.execute(f'SELECT username, word_id FROM {table}')]
+            c.execute(f'DROP TABLE {table}')
+        if table in user_cols:
+            for r in c.execute(f"SELECT username, {table} FROM users WHERE COALESCE({table}, '') != ''").fetchall():
+                rows += [(r[0], int(x)) for x in _parse_id_list(r[1]) if x.isdigit()]
+        c.execute(PENDING_TABLE_SQL.format(table=table))
+        c.executemany(
+            f'INSERT OR IGNORE INTO {table} (user_id, word_id) SELECT id, ? FROM users_new WHERE username = ?',
+            [(word_id, username) for username, word_id in rows]
+        )
+
+    # 3. username 참조 자식 테이블 (학습 로그는 계정이 없는 기록도 user_id NULL로 보존)
+    for table, create_sql, keep_orphans in (
+        ('user_progress', USER_PROGRESS_TABLE_SQL, False),
+        ('study_log', STUDY_LOG_TEXT_TABLE_SQL, True),
+        ('study_level_window', LEVEL_WINDOW_TABLE_SQL, False),
+    ):
+        if not _table_exists(c, table):
+            continue
+        old_cols = _table_columns(c, table)
+        c.execute(create_sql.format(table=f'{table}_new'))
+        cols = [col for col in _table_columns(c, f'{table}_new') if col != 'user_id' and col in old_cols]
+        join = 'LEFT JOIN' if keep_orphans else 'JOIN'
+        c.execute(f'''
+            INSERT INTO {table}_new ({', '.join(cols)}, user_id)
+            SELECT {', '.join('t.' + col for col in cols)}, u.id
+            FROM {table} t {join} users_new u ON u.username = t.username
+            ORDER BY t.rowid
+        ''')
+        c.execute(f'DROP TABLE {table}')
+        c.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+    c.execute('DROP TABLE users')
+    c.execute('ALTER TABLE users_new RENAME TO users')
+
+def _backfill_level_window(c):
+    """기존 study_log로 study_level_window 채우기 ((user_id, level)별 최근 LEVEL_WINDOW_SIZE개)"""
+    mask = (1 << LEVEL_WINDOW_SIZE) - 1
+    windows = {}
+    for row in c.execute('SELECT user_id, level, is_correct FROM study_log '
+                         'WHERE user_id IS NOT NULL AND level IS NOT NULL ORDER BY id'):
+        key = (row[0], row[1])
+        bits, n = windows.get(key, (0, 0))
+        windows[key] = (((bits << 1) | (1 if row[2] else 0)) & mask, min(n + 1, LEVEL_WINDOW_SIZE))
+    c.executemany(
+        'INSERT OR REPLACE INTO study_level_window (user_id, level, bits, n) VALUES (?, ?, ?, ?)',
+        [(u, lv, bits, n) for (u, lv), (bits, n) in windows.items()]
+    )
+
+# 학습일 기준 시간대 (KST = UTC+9): 학습일(정수 일수) = (ts + LOG_DAY_OFFSET) // 86400
+LOG_DAY_OFFSET = 9 * 3600
+# study_log 행의 학습일 / 표시용 시각·날짜 (KST)
+LOG_DAY_SQL = f"(({{ref}}.ts + {LOG_DAY_OFFSET}) / 86400)"
+LOG_TIMESTAMP_SQL = f"datetime({{ref}}.ts + {LOG_DAY_OFFSET}, 'unixepoch')"
+LOG_DATE_SQL = f"date({{ref}}.ts + {LOG_DAY_OFFSET}, 'unixepoch')"
+
+def _legacy_log_ts(timestamp, day):
+    """
+    [MIGRATION] 예전 로그 행의 (timestamp 문자열, date 문자열) -> epoch 초
+    timestamp는 서버 로컬 시각으로 해석하되, 그 결과의 KST 학습일이 date와 다르면
+    (서버 시간대 차이, 내일 모드 등) date 당일 정오(KST)로 맞춤 -> 일별 집계/통계가 바뀌지 않음
+    """
+    day_n = to_day_number(day)
+    try:
+        ts = int(datetime.strptime(str(timestamp)[:19], '%Y-%m-%d %H:%M:%S').timestamp())
+    except (TypeError, ValueError):
+        ts = None
+    if day_n is None:
+        return ts
+    if ts is None or (ts + LOG_DAY_OFFSET) // 86400 != day_n:
+        return day_n * 86400 - LOG_DAY_OFFSET + 12 * 3600
+    return ts
+
+def _migrate_log_to_epoch(conn):
+    """
+    [MIGRATION] study_log (timestamp, date 문자열 2개) -> ts 정수 1개 (새 테이블 생성 -> 복사 -> 이름 변경)
+    AUTOINCREMENT 순번도 이어받음 (word_answer_stats watermark가 id 증가에 의존)
+    """
+    conn.create_function('legacy_log_ts', 2, _legacy_log_ts, deterministic=True)
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'study_log'").fetchone()
+    conn.execute(STUDY_LOG_TABLE_SQL.format(table='study_log_new'))
+    conn.execute('''
+        INSERT INTO study_log_new (id, ts, user_id, word_id, level, is_correct)
+        SELECT id, legacy_log_ts(timestamp, date), user_id, word_id, level, is_correct
+        FROM study_log ORDER BY id
+    ''')
+    conn.execute('DROP TABLE study_log')
+    conn.execute('ALTER TABLE study_log_new RENAME TO study_log')
+    if seq:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'study_log'", (seq[0],))
+
+def _backfill_daily_rollup(c):
+    """study_log 전체(보관 파일 포함)로 study_daily_rollup 다시 만들기"""
+    c.execute('DELETE FROM study_daily_rollup')
+    c.execute(f'''
+        INSERT INTO study_daily_rollup (user_id, day, attempts, correct)
+        SELECT user_id, {LOG_DAY_SQL.format(ref='l')}, COUNT(*), SUM(CASE WHEN is_correct THEN 1 ELSE 0 END)
+        FROM study_log l
+        WHERE user_id IS NOT NULL AND ts IS NOT NULL
+        GROUP BY 1, 2
+    ''')
+    # 보관 파일로 옮긴 로그의 일별 합계도 더함
+    c.executemany('''
+        INSERT INTO study_daily_rollup (user_id, day, attempts, correct) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            attempts = attempts + excluded.attempts,
+            correct = correct + excluded.correct
+    ''', _archived_rows(f'''
+        SELECT user_id, {LOG_DAY_SQL.format(ref='l')}, COUNT(*), SUM(CASE WHEN is_correct THEN 1 ELSE 0 END)
+        FROM study_log l
+        WHERE user_id IS NOT NULL AND ts IS NOT NULL
+        GROUP BY 1, 2
+    '''))
+
+def backfill_daily_rollup():
+    """study_daily_rollup 재집계 (writer 스레드 경유, 반환: 집계 행 수)"""
+    def _write(conn):
+        _backfill_daily_rollup(conn)
+        return conn.execute('SELECT COUNT(*) FROM study_daily_rollup').fetchone()[0]
+    return submit_write(_write).result()
+
 def init_db():
-    """데이터베이스 초기화 (테이블 생성)"""
+    """데이터베이스 초기화 (테이블 생성 + 마이그레이션)"""
     # if os.path.exists(DB_FILE):
     #    return # 이미 DB 파일이 있으면 실행하지 않음
 
     conn = get_db_connection()
     c = conn.cursor()
 
+    # [MIGRATION] username 참조 -> users.id 정수 참조 (1회, 한 트랜잭션)
+    if _table_exists(c, 'users') and 'id' not in _table_columns(c, 'users'):
+        c.execute('BEGIN')
+        _migrate_to_user_ids(c)
+        conn.commit()
+
+    # [MIGRATION] study_log timestamp/date 문자열 -> ts 정수 (1회, 한 트랜잭션) + 보관 파일도 변환
+    if _table_exists(c, 'study_log') and 'ts' not in _table_columns(c, 'study_log'):
+        c.execute('BEGIN')
+        _migrate_log_to_epoch(conn)
+        conn.commit()
+        for path in _archive_files():
+            _archive_connect(path).close()
+
     # --- 테이블 생성 ---
     # 1. users
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            name TEXT,
-            level INTEGER DEFAULT 1,
-            fail_streak INTEGER DEFAULT 0,
-            level_shield INTEGER DEFAULT 3,
-            qs_count INTEGER DEFAULT 0,
-            pending_wrongs TEXT DEFAULT '',
-            pending_session TEXT DEFAULT ''
-        )
-    ''')
+    c.execute(USERS_TABLE_SQL.format(table='users'))
+    # [MIGRATION] 대소문자 무시 username 인덱스 (로그인/가입 조회를 lower() 전체 스캔 대신 인덱스 1회 탐색으로)
+    if not _index_exists(c, 'uq_users_username_nocase') and not _index_exists(c, 'idx_users_username_nocase'):
+        try:
+            c.execute('CREATE UNIQUE INDEX uq_users_username_nocase ON users (username COLLATE NOCASE)')
+        except sqlite3.IntegrityError:
+            # 대소문자만 다른 기존 계정이 있으면 병합하지 않고 일반 인덱스로 대체 (조회 성능은 동일)
+            print("Warning: case-insensitive duplicate usernames exist; creating non-unique index")
+            c.execute('CREATE INDEX idx_users_username_nocase ON users (username COLLATE NOCASE)')
 
     # 2. voca_db
     c.execute('''
@@ -51,39 +1086,110 @@ def init_db():
             total_wrong INTEGER DEFAULT 0
         )
     ''')
+    # 엑셀 업로드 시 target_word 매칭용 (동형이의어가 있어 UNIQUE 불가)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_voca_target_word ON voca_db (target_word)')
 
     # 3. user_progress
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS user_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT,
-            word_id INTEGER,
-            last_reviewed DATE,
-            next_review DATE,
-            interval INTEGER DEFAULT 0,
-            fail_count INTEGER DEFAULT 0,
-            FOREIGN KEY (username) REFERENCES users (username),
-            FOREIGN KEY (word_id) REFERENCES voca_db (id)
-        )
-    ''')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_progress_user_word ON user_progress (username, word_id)')
+    c.execute(USER_PROGRESS_TABLE_SQL.format(table='user_progress'))
+    # (user_id, word_id) UNIQUE -> ON CONFLICT UPSERT 사용
+    # [MIGRATION] 기존 비고유 인덱스 DB: 중복 행은 최신(id 최대) 1개만 남기고 정리
+    if not _index_exists(c, 'uq_progress_user_word'):
+        c.execute('''
+            DELETE FROM user_progress
+            WHERE id NOT IN (SELECT MAX(id) FROM user_progress GROUP BY user_id, word_id)
+        ''')
+        c.execute('DROP INDEX IF EXISTS idx_progress_user_word')
+        c.execute('CREATE UNIQUE INDEX uq_progress_user_word ON user_progress (user_id, word_id)')
+    # [MIGRATION] 날짜 TEXT('YYYY-MM-DD') -> 정수 일수 (julianday 2440587.5 = 1970-01-01)
+    #   전체 스캔이므로 1회만 (풀 리셋/복구/동기화 때마다 다시 돌지 않도록 user_version 으로 완료 표시)
+    if _schema_version(c) < SCHEMA_PROGRESS_DAYS:
+        for col in ('last_reviewed', 'next_review'):
+            c.execute(f'''
+                UPDATE user_progress SET {col} = CAST(julianday({col}) - 2440587.5 AS INTEGER)
+                WHERE typeof({col}) = 'text'
+            ''')
+        _set_schema_version(c, SCHEMA_PROGRESS_DAYS)
+    # 복습 예정 조회용 (대시보드 due 카운트)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_progress_user_due ON user_progress (user_id, next_review)')
 
+    # 3-1. pending_wrongs / pending_session: 오답노트 / 진행 중 세션 단어 (유저당 단어 1행)
+    #      (users의 콤마 문자열 컬럼 대체 -> 답안마다 1행 INSERT/DELETE)
+    for table in PENDING_TABLES:
+        c.execute(PENDING_TABLE_SQL.format(table=table))
 
     # 4. study_log
+    c.execute(STUDY_LOG_TABLE_SQL.format(table='study_log'))
+    # 레벨 평가용 "유저 + 레벨 최근 N개" 조회 인덱스 (username 단독 인덱스 대체)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_log_user_level ON study_log (user_id, level, id)')
+    c.execute('DROP INDEX IF EXISTS idx_log_username')
+
+    # 4-1. study_level_window: (유저, 레벨)별 최근 LEVEL_WINDOW_SIZE개 답안의 정오 비트
+    #      (bits의 최하위 비트가 가장 최근 답안, n = 창에 든 답안 수) -> 레벨 평가 O(1)
+    level_window_exists = _table_exists(c, 'study_level_window')
+    c.execute(LEVEL_WINDOW_TABLE_SQL.format(table='study_level_window'))
+    # [MIGRATION] 가드 없는 이전 트리거 교체: user_id/level 이 NULL 인 행은 ON CONFLICT 에 걸리지 않아 고아 행이 쌓였음
+    if _schema_version(c) < SCHEMA_LEVEL_WINDOW_GUARD:
+        c.execute('DROP TRIGGER IF EXISTS trg_log_level_window')
+        c.execute('DELETE FROM study_level_window WHERE user_id IS NULL OR level IS NULL')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_log_level_window AFTER INSERT ON study_log
+        WHEN NEW.user_id IS NOT NULL AND NEW.level IS NOT NULL
+        BEGIN
+            INSERT INTO study_level_window (user_id, level, bits, n)
+            VALUES (NEW.user_id, NEW.level, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END, 1)
+            ON CONFLICT (user_id, level) DO UPDATE SET
+                bits = ((bits << 1) | CASE WHEN NEW.is_correct THEN 1 ELSE 0 END) & {(1 << LEVEL_WINDOW_SIZE) - 1},
+                n = MIN(n + 1, {LEVEL_WINDOW_SIZE});
+        END
+    ''')
+    if not level_window_exists:
+        _backfill_level_window(c) # [MIGRATION]
+    if _schema_version(c) < SCHEMA_LEVEL_WINDOW_GUARD:
+        _set_schema_version(c, SCHEMA_LEVEL_WINDOW_GUARD)
+
+    # 4-2. study_daily_rollup: 유저 x 학습일(정수 일수) 풀이/정답 수 (관리자 랭킹/통계용, 로그 INSERT 시 트리거로 갱신)
+    rollup_exists = _table_exists(c, 'study_daily_rollup')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS study_daily_rollup (
+            user_id INTEGER,
+            day INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_log_daily_rollup AFTER INSERT ON study_log
+        WHEN NEW.user_id IS NOT NULL AND NEW.ts IS NOT NULL
+        BEGIN
+            INSERT INTO study_daily_rollup (user_id, day, attempts, correct)
+            VALUES (NEW.user_id, {LOG_DAY_SQL.format(ref='NEW')}, 1, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END)
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                attempts = attempts + 1,
+                correct = correct + excluded.correct;
+        END
+    ''')
+    if not rollup_exists:
+        _backfill_daily_rollup(c) # [MIGRATION]
+
+    # 4-3. word_answer_stats: 단어별 (학생 레벨, 정오) 답안 수 누적 (난이도 재조정 증분 집계용)
+    #      점수는 단어의 "현재" 레벨에 따라 달라지므로 점수 대신 히스토그램을 저장 -> 전체 재계산과 동일 결과
     c.execute('''
-        CREATE TABLE IF NOT EXISTS study_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
-            date DATE,
+        CREATE TABLE IF NOT EXISTS word_answer_stats (
             word_id INTEGER,
-            username TEXT,
-            level INTEGER,
+            user_level INTEGER,
             is_correct INTEGER,
-            FOREIGN KEY (username) REFERENCES users (username),
-            FOREIGN KEY (word_id) REFERENCES voca_db (id)
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (word_id, user_level, is_correct)
+        )
+    ''')
+    # 배치 작업별 마지막 처리 study_log id
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS batch_watermark (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0
         )
     ''')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_log_username ON study_log (username)')
 
     # 5. config
     c.execute('''
@@ -92,14 +1198,72 @@ def init_db():
             value TEXT
         )
     ''')
+    # [MIGRATION] pandas로 만들어진 구버전 config 테이블은 PK가 없어 INSERT OR REPLACE가 중복 행을 만듦
+    if not _index_exists(c, 'uq_config_key'):
+        c.execute('DELETE FROM config WHERE rowid NOT IN (SELECT MAX(rowid) FROM config GROUP BY key)')
+        c.execute('CREATE UNIQUE INDEX uq_config_key ON config (key)')
+
+    # 6. data_version: 데이터셋별 버전 카운터 (트리거가 변경 시 증가 -> 버전 키 캐시 무효화)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    c.executemany('INSERT OR IGNORE INTO data_version (name, version) VALUES (?, 0)', [(n,) for n in ('vocab', 'config')])
+    # voca_db: 단어 내용 컬럼 변경 시에만 (답안마다 바뀌는 total_try/total_wrong 제외)
+    for event in ('INSERT', 'DELETE', 'UPDATE OF target_word, meaning, level, sentence_en, sentence_ko, root_word'):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_version_vocab_{event.split()[0].lower()} AFTER {event} ON voca_db
+            BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'vocab'; END
+        ''')
+    # config: 답안 저널 적용 위치(answer_journal_seq)는 설정이 아니므로 제외
+    for event, ref in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_version_config_{event.lower()} AFTER {event} ON config
+            WHEN {ref}.key != 'answer_journal_seq'
+            BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'config'; END
+        ''')
 
     conn.commit()
     conn.close()
 
 # --- 데이터 읽기 함수 ---
 
-def get_system_config():
-    """시스템 설정 로드"""
+# --- 버전 키 캐시 ---
+# 데이터셋(data_version.name)별로 마지막 값을 (풀 세대, 버전)과 함께 보관.
+# 해당 데이터셋이 바뀐 경우에만 다시 로드 (다른 데이터셋/다른 유저 캐시는 유지)
+_version_cache = {}
+_version_cache_lock = threading.Lock()
+
+def get_data_version(name):
+    """data_version 테이블의 현재 버전 (없으면 0)"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute('SELECT version FROM data_version WHERE name = ?', (name,)).fetchone()
+        return row['version'] if row else 0
+    finally:
+        conn.close()
+
+def _bump_data_version(conn, name):
+    """트리거가 닿지 않는 변경(DROP TABLE 등) 후 수동으로 버전 증가"""
+    conn.execute('UPDATE data_version SET version = version + 1 WHERE name = ?', (name,))
+
+def _versioned(name, loader):
+    """name 데이터셋 버전이 같으면 캐시된 값, 바뀌었으면 loader(version)로 다시 만들어 반환"""
+    # DB 파일 교체(풀 세대 변경)도 버전 변경으로 취급
+    version = (_pool.generation, get_data_version(name))
+    hit = _version_cache.get(name)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    with _version_cache_lock:
+        hit = _version_cache.get(name)
+        if hit is None or hit[0] != version:
+            hit = (version, loader(version))
+            _version_cache[name] = hit
+        return hit[1]
+
+def _load_system_config(version=None):
     conn = get_db_connection()
     try:
         # DB에 테이블이 있는지 확인 (마이그레이션 전일 수 있음)
@@ -119,6 +1283,10 @@ def get_system_config():
     finally:
         conn.close()
 
+def get_system_config():
+    """시스템 설정 로드 (config 버전이 바뀔 때만 DB 조회)"""
+    return dict(_versioned('config', _load_system_config))
+
 def update_system_config(key, value):
     """시스템 설정 업데이트"""
     conn = get_db_connection()
@@ -132,69 +1300,281 @@ def update_system_config(key, value):
     finally:
         conn.close()
 
-@st.cache_data(ttl=60)
-def load_all_vocab():
-    """voca_db 전체 로드 (기존 load_data 대체)"""
-    init_db() # DB 없으면 생성
+# --- 단어장 스토어 (프로세스 공용, 읽기 전용) ---
+# st.cache_data는 캐시 히트마다 DataFrame 전체를 pickle/복사하므로,
+# 데이터 버전당 1번만 만들고 모든 세션이 같은 객체를 공유하는 스토어로 대체.
+# 호출자는 frame을 읽기 전용으로 사용. 복사 없이 나눠 주므로 Copy-on-Write 가 필수:
+# pandas 3 은 항상 켜져 있고(requirements.txt 에서 pandas>=3), 2.x 로 실행되면 아래에서 켬
+# -> 호출자가 frame을 수정해도 원본(공용 캐시)은 보존됨
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+DUMMY_SENTENCE_PATTERN = r"^The word '.*' is important\.$"
+
+class VocabStore:
+    """voca_db 스냅샷: 컬럼 배열 + id→행 인덱스 + 레벨별 버킷"""
+    def __init__(self, frame, version):
+        self.frame = frame
+        self.version = version
+        self.ids = frame['id'].to_numpy()
+        self.levels = frame['level'].to_numpy()
+        self.pos = {int(word_id): i for i, word_id in enumerate(self.ids)}
+        self.level_buckets = {
+            int(level): np.flatnonzero(self.levels == level)
+            for level in pd.unique(frame['level'].dropna())
+        }
+        # 더미 예문("The word '...' is important.") 여부 (출제 우선순위용)
+        self.is_dummy = frame['sentence_en'].str.contains(DUMMY_SENTENCE_PATTERN, regex=True, na=False).to_numpy() \
+            if 'sentence_en' in frame.columns else np.zeros(len(frame), dtype=bool)
+        for arr in (self.ids, self.levels, self.is_dummy, *self.level_buckets.values()):
+            arr.flags.writeable = False
+
+    @property
+    def empty(self):
+        return len(self.ids) == 0
+
+    def positions(self, word_ids):
+        """id 목록 -> 행 위치 배열 (없는 id는 제외)"""
+        pos = self.pos
+        return np.array([pos[int(w)] for w in word_ids if int(w) in pos], dtype=np.intp)
+
+    def records(self, word_ids):
+        """id 목록에 해당하는 단어 dict 리스트 (to_dict('records') 형식)"""
+        return self.frame.iloc[self.positions(word_ids)].to_dict('records')
+
+    def record_at(self, position):
+        return self.frame.iloc[int(position)].to_dict()
+
+    def level_positions(self, level):
+        return self.level_buckets.get(int(level), np.empty(0, dtype=np.intp))
+
+def _build_vocab_store(version):
     conn = get_db_connection()
-    df = pd.read_sql('SELECT * FROM voca_db', conn)
-    conn.close()
-    return df
+    try:
+        frame = pd.read_sql('SELECT * FROM voca_db', conn)
+    finally:
+        conn.close()
+    return VocabStore(frame, version)
+
+@tracing.traced('db.get_vocab_store')
+def get_vocab_store():
+    """현재 데이터 버전의 VocabStore (버전이 같으면 같은 객체를 복사 없이 반환)"""
+    return _versioned('vocab', _build_vocab_store)
+
+def load_all_vocab():
+    """voca_db 전체 로드 (기존 load_data 대체) - 공용 스토어의 DataFrame (복사 없음)"""
+    return get_vocab_store().frame
 
+@tracing.traced('db.get_user_info')
 def get_user_info(username):
     """사용자 정보 가져오기 (기존 get_user_info 대체)"""
     conn = get_db_connection()
-    # 1. Exact Match
-    user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
-    
-    # 2. Case-insensitive Fallback (if not found)
-    if not user:
-        user = conn.execute('SELECT * FROM users WHERE lower(username) = lower(?)', (username,)).fetchone()
-        
-    conn.close()
+    try:
+        # NOCASE 인덱스 1회 탐색 (대소문자만 다른 계정이 있으면 정확히 일치하는 쪽 우선)
+        user = conn.execute(
+            'SELECT * FROM users WHERE username = ? COLLATE NOCASE ORDER BY username = ? DESC LIMIT 1',
+            (username, username)
+        ).fetchone()
+    finally:
+        conn.close()
     if user:
         return dict(user)
     return None
 
+# --- 진도 날짜: 1970-01-01 기준 정수 일수로 저장 ---
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def to_day_number(value):
+    """date / datetime / 'YYYY-MM-DD' -> 1970-01-01 기준 일수 (값이 없거나 잘못되면 None)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            value = date.fromisoformat(value[:10])
+        except ValueError:
+            return None # '', 'NaT', 'None', 'nan' 등
+    elif pd.isna(value):
+        return None
+    if isinstance(value, datetime): # pd.Timestamp 포함
+        value = value.date()
+    return value.toordinal() - _EPOCH_ORDINAL
+
+def from_day_number(n):
+    """정수 일수 -> date (없으면 NaT)"""
+    if n is None or pd.isna(n):
+        return pd.NaT
+    return date.fromordinal(int(n) + _EPOCH_ORDINAL)
+
+@tracing.traced('db.load_user_progress')
 def load_user_progress(username):
     """사용자 학습 진도 로드 (기존 load_user_progress 대체)"""
     conn = get_db_connection()
-    df = pd.read_sql('SELECT * FROM user_progress WHERE username = ?', conn, params=(username,))
+    try:
+        df = pd.read_sql(f'''
+            SELECT p.id, u.username, p.word_id, p.last_reviewed, p.next_review, p.interval, p.fail_count
+            FROM user_progress p JOIN users u ON u.id = p.user_id
+            WHERE p.user_id = {USER_ID_SQL}
+        ''', conn, params=(username,))
+    finally:
+        conn.close()
     
-    # 날짜 컬럼 파싱
+    # 날짜 컬럼: 정수 일수 -> date (RETIRE_DATE 9999-12-31도 그대로 표현)
     for col in ['next_review', 'last_reviewed']:
         if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce').dt.date
-    conn.close()
+            df[col] = pd.Series([from_day_number(v) for v in df[col]], index=df.index, dtype=object)
+    # 로드 이후 변경된 행 추적용 (save_user_progress는 이 행들만 저장)
+    df['is_dirty'] = False
     return df
 
-def load_study_log(username):
-    """사용자 학습 로그 로드"""
+def load_study_log(username, include_archive=False):
+    """사용자 학습 로그 로드 (include_archive=True: 보관 파일의 오래된 로그 포함)"""
     conn = get_db_connection()
-    df = pd.read_sql('SELECT * FROM study_log WHERE username = ?', conn, params=(username,))
-    conn.close()
-    return df
+    try:
+        hot = pd.read_sql(f'''
+            SELECT l.id, {LOG_TIMESTAMP_SQL.format(ref='l')} AS timestamp, {LOG_DATE_SQL.format(ref='l')} AS date,
+                   l.word_id, u.username, l.level, l.is_correct
+            FROM study_log l JOIN users u ON u.id = l.user_id
+            WHERE l.user_id = {USER_ID_SQL}
+        ''', conn, params=(username,))
+        row = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone() if include_archive else None
+    finally:
+        conn.close()
+    if row is None:
+        return hot
+    return _with_archived_logs(hot, {row['id']: username}, row['id'])
+
+def get_dashboard_counts(username, today):
+    """
+    대시보드 숫자 3개 (전체 학습 단어, 장기 기억(interval > 14), 오늘 복습 대상) - 진도표 로드 없이 SQL 1회
+    오늘 복습 대상: next_review <= today 이면서 오늘 이미 복습하지 않은 단어
+    """
+    today_n = to_day_number(today)
+    conn = get_db_connection()
+    try:
+        row = conn.execute(f'''
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(interval > 14), 0) AS mastered,
+                   COALESCE(SUM(next_review <= ? AND last_reviewed IS NOT ?), 0) AS due
+            FROM user_progress WHERE user_id = {USER_ID_SQL}
+        ''', (today_n, today_n, username)).fetchone()
+        return row['total'], row['mastered'], row['due']
+    finally:
+        conn.close()
+
+def get_level_window(username, level):
+    """
+    현재 레벨 기준 최근 LEVEL_WINDOW_SIZE개 답안의 (답안 수, 정답 수) - 롤링 카운터 O(1)
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            f'SELECT bits, n FROM study_level_window WHERE user_id = {USER_ID_SQL} AND level = ?', (username, level)
+        ).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return 0, 0
+    return row['n'], bin(row['bits']).count('1')
+
+def count_recent_correct(username, level, limit=LEVEL_WINDOW_SIZE):
+    """
+    (user_id, level, id) 인덱스로 최근 limit개 로그만 읽어 (답안 수, 정답 수) 계산
+    (롤링 카운터 검증/복구용 SQL 경로)
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute(f'''
+            SELECT COUNT(*) AS total, COALESCE(SUM(is_correct), 0) AS correct
+            FROM (SELECT is_correct FROM study_log
+                  WHERE user_id = {USER_ID_SQL} AND level = ?
+                  ORDER BY id DESC LIMIT ?)
+        ''', (username, level, limit)).fetchone()
+        return row['total'], row['correct']
+    finally:
+        conn.close()
+
+def get_activity_ranking(limit=5):
+    """풀이 수 상위 학생 (username, name, attempts) + 학습 기록 보유 학생 수 - study_daily_rollup 기준 (통계 스냅샷)"""
+    conn = get_analytics_connection()
+    try:
+        ranking = pd.read_sql('''
+            SELECT u.username, u.name, SUM(r.attempts) AS attempts
+            FROM study_daily_rollup r JOIN users u ON u.id = r.user_id
+            GROUP BY r.user_id
+            ORDER BY attempts DESC
+            LIMIT ?
+        ''', conn, params=(limit,))
+        active = conn.execute('SELECT COUNT(DISTINCT user_id) FROM study_daily_rollup').fetchone()[0]
+        return ranking, active
+    finally:
+        conn.close()
+
+def get_period_counts(today):
+    """학생별 (오늘, 최근 7일, 최근 30일, 총 누적) 풀이 수 - 가입 학생 전체, 기록 없으면 0 (통계 스냅샷)"""
+    today_n = to_day_number(today)
+    conn = get_analytics_connection()
+    try:
+        return pd.read_sql('''
+            SELECT u.username, u.name,
+                   COALESCE(SUM(CASE WHEN r.day = ? THEN r.attempts END), 0) AS today,
+                   COALESCE(SUM(CASE WHEN r.day >= ? THEN r.attempts END), 0) AS last_7,
+                   COALESCE(SUM(CASE WHEN r.day >= ? THEN r.attempts END), 0) AS last_30,
+                   COALESCE(SUM(r.attempts), 0) AS total
+            FROM users u LEFT JOIN study_daily_rollup r ON r.user_id = u.id
+            GROUP BY u.id
+        ''', conn, params=(today_n, today_n - 6, today_n - 29))
+    finally:
+        conn.close()
+
+def get_daily_counts(username, start, end):
+    """학생 1명의 start~end 일별 풀이 수 (date, attempts, correct) - 기록 없는 날은 빠짐 (통계 스냅샷)"""
+    conn = get_analytics_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT day, attempts, correct FROM study_daily_rollup
+            WHERE user_id = {USER_ID_SQL} AND day BETWEEN ? AND ?
+            ORDER BY day
+        ''', (username, to_day_number(start), to_day_number(end))).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame(
+        [(from_day_number(r['day']), r['attempts'], r['correct']) for r in rows],
+        columns=['date', 'attempts', 'correct']
+    )
 
 def get_all_users():
     """모든 사용자 정보 로드 (관리자용)"""
     conn = get_db_connection()
-    df = pd.read_sql('SELECT username, name, level FROM users', conn)
-    conn.close()
-    return df
+    try:
+        return pd.read_sql('SELECT username, name, level FROM users', conn)
+    finally:
+        conn.close()
 
 def get_full_users_dump():
     """모든 사용자 전체 정보 로드 (백업용)"""
     conn = get_db_connection()
-    df = pd.read_sql('SELECT * FROM users', conn)
-    conn.close()
-    return df
+    try:
+        return pd.read_sql('SELECT * FROM users', conn)
+    finally:
+        conn.close()
 
-def get_all_study_logs():
-    """모든 학습 로그 로드 (관리자용)"""
-    conn = get_db_connection()
-    df = pd.read_sql('SELECT * FROM study_log', conn)
-    conn.close()
-    return df
+def get_all_study_logs(include_archive=False):
+    """모든 학습 로그 로드 (관리자용 - 통계 스냅샷, include_archive=True: 보관 파일 포함 전체 기록)"""
+    conn = get_analytics_connection()
+    try:
+        hot = pd.read_sql(f'''
+            SELECT l.id, {LOG_TIMESTAMP_SQL.format(ref='l')} AS timestamp, {LOG_DATE_SQL.format(ref='l')} AS date,
+                   l.word_id, u.username, l.level, l.is_correct
+            FROM study_log l LEFT JOIN users u ON u.id = l.user_id
+        ''', conn)
+        usernames = dict(conn.execute('SELECT id, username FROM users').fetchall()) if include_archive else None
+    finally:
+        conn.close()
+    if usernames is None:
+        return hot
+    return _with_archived_logs(hot, usernames)
 
 
 # --- 데이터 쓰기 함수 ---
@@ -203,13 +1583,13 @@ def register_user(username, password, name):
     """사용자 등록 (기존 register_user 대체)"""
     conn = get_db_connection()
     try:
-        # Check if user exists (Case-insensitive)
-        exists = conn.execute('SELECT 1 FROM users WHERE lower(username) = lower(?)', (username,)).fetchone()
+        # Check if user exists (Case-insensitive, NOCASE 인덱스 사용)
+        exists = conn.execute('SELECT 1 FROM users WHERE username = ? COLLATE NOCASE', (username,)).fetchone()
         if exists:
             return "EXIST"
 
         conn.execute(
-            'INSERT INTO users (username, password, name, level, fail_streak, level_shield, qs_count, pending_wrongs, pending_session) VALUES (?, ?, ?, NULL, 0, 3, 0, "", "")',
+            'INSERT INTO users (username, password, name, level, fail_streak, level_shield, qs_count) VALUES (?, ?, ?, NULL, 0, 3, 0)',
             (username, password, name) # 기본 레벨 NULL (레벨 테스트 유도)
         )
         conn.commit()
@@ -226,12 +1606,13 @@ def update_user_dynamic_fields(username, updates):
     """
     사용자 동적 필드 업데이트
     updates: dict of {'col_name': value}
-    Available cols: level, fail_streak, level_shield, qs_count, pending_wrongs, pending_session
+    Available cols: level, fail_streak, level_shield, qs_count
+    (오답노트/진행 중 세션은 pending_wrongs / pending_session 테이블 함수 사용)
     """
     conn = get_db_connection()
     try:
         # 허용된 컬럼만 필터링 (SQL Injection 방지)
-        allowed_cols = ['level', 'fail_streak', 'level_shield', 'qs_count', 'pending_wrongs', 'pending_session']
+        allowed_cols = ['level', 'fail_streak', 'level_shield', 'qs_count']
         filtered_updates = {k: v for k, v in updates.items() if k in allowed_cols}
         
         if not filtered_updates:
@@ -256,42 +1637,20 @@ def update_student_info(old_username, new_username, new_name, new_level):
     try:
         # 1. ID 중복 체크 (ID가 변경된 경우)
         if old_username != new_username:
-            exists = conn.execute('SELECT 1 FROM users WHERE username = ?', (new_username,)).fetchone()
+            # 대소문자만 바꾸는 경우(Han -> han)는 자기 자신이므로 제외
+            exists = conn.execute(
+                'SELECT 1 FROM users WHERE username = ? COLLATE NOCASE AND username != ?', (new_username, old_username)
+            ).fetchone()
             if exists:
                 return "DUPLICATE"
 
-        # 2. 업데이트 실행
-        # SQLite에서는 PK 업데이트 시 Cascade 옵션이 없으면 자식 테이블 참조가 깨질 수 있음.
-        # 따라서 PRAGMA foreign_keys = ON; 을 켜거나, 수동으로 자식 테이블도 업데이트해야 함.
-        # 여기서는 수동 업데이트 방식을 사용 (안전하게)
-        
-        conn.execute("BEGIN TRANSACTION")
-        
-        if old_username != new_username:
-            # 새 유저 생성 (기존 정보 복사)
-            user_row = conn.execute('SELECT * FROM users WHERE username = ?', (old_username,)).fetchone()
-            if not user_row:
-                return "NOT_FOUND"
-                
-            user_data = dict(user_row)
-            user_data['username'] = new_username
-            user_data['name'] = new_name
-            user_data['level'] = new_level
-            
-            # 새 레코드로 삽입
-            cols = ', '.join(user_data.keys())
-            placeholders = ', '.join(['?'] * len(user_data))
-            conn.execute(f'INSERT INTO users ({cols}) VALUES ({placeholders})', list(user_data.values()))
-            
-            # 자식 테이블 업데이트 (username 참조 변경)
-            conn.execute('UPDATE user_progress SET username = ? WHERE username = ?', (new_username, old_username))
-            conn.execute('UPDATE study_log SET username = ? WHERE username = ?', (new_username, old_username))
-            
-            # 기존 레코드 삭제
-            conn.execute('DELETE FROM users WHERE username = ?', (old_username,))
-        else:
-            # ID 변경 없음
-            conn.execute('UPDATE users SET name = ?, level = ? WHERE username = ?', (new_name, new_level, old_username))
+        # 2. 업데이트 실행 (자식 테이블은 users.id를 참조하므로 users 1행만 변경)
+        cur = conn.execute(
+            'UPDATE users SET username = ?, name = ?, level = ? WHERE username = ?',
+            (new_username, new_name, new_level, old_username)
+        )
+        if cur.rowcount == 0:
+            return "NOT_FOUND"
             
         conn.commit()
         return "SUCCESS"
@@ -328,59 +1687,78 @@ def reset_user_password(username, new_password_hash):
     finally:
         conn.close()
 
+PROGRESS_UPSERT_SQL = f'''
+    INSERT INTO user_progress (user_id, word_id, last_reviewed, next_review, interval, fail_count)
+    VALUES ({USER_ID_SQL}, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, word_id) DO UPDATE SET
+        last_reviewed = excluded.last_reviewed,
+        next_review = excluded.next_review,
+        interval = excluded.interval,
+        fail_count = excluded.fail_count
+'''
+
+def _normalize_progress_values(word_id, last_reviewed, next_review, interval, fail_count):
+    """진도 한 행을 DB 저장 형태 (word_id, lr, nr, iv, fc)로 정리. word_id가 잘못되면 None"""
+    # Word ID
+    try:
+        w_id = int(word_id)
+    except:
+        w_id = 0
+    
+    # Skip invalid word_id
+    if w_id == 0: return None
+
+
+    # Stats
+    try:
+        iv = int(interval)
+    except: iv = 0
+    
+    try:
+        fc = int(fail_count)
+    except: fc = 0
+
+    # Dates (NaT/None -> NULL, 정수 일수로 저장)
+    return (w_id, to_day_number(last_reviewed), to_day_number(next_review), iv, fc)
+
 def save_user_progress(username, progress_df):
-    """사용자 진도 저장 (기존 save_progress 대체) - 훨씬 효율적! (executemany 사용)"""
+    """
+    사용자 진도 저장 (기존 save_progress 대체) - 변경된 행만 UPSERT
+    - progress_df에 is_dirty 컬럼이 있으면 (load_user_progress 이후 변경된 행) 그 행만 저장
+    - 없으면 DB의 현재 값과 비교하여 달라진 행만 저장
+    - 저장 후 is_dirty 플래그를 내림
+    """
+    if progress_df is None or progress_df.empty:
+        return True
+
     conn = get_db_connection()
-    c = conn.cursor()
     try:
-        # 1. 해당 유저의 기존 progress 모두 삭제
-        c.execute("DELETE FROM user_progress WHERE username = ?", (username,))
-        
-        # 2. 데이터 삽입 (executemany 사용)
-        if not progress_df.empty:
-            data_to_insert = []
-            for _, row in progress_df.iterrows():
-                # Word ID
-                try:
-                    w_id = int(row.get('word_id', 0))
-                except:
-                    w_id = 0
-                
-                # Skip invalid word_id
-                if w_id == 0: continue
-
-                # Dates (Handle NaT/None)
-                lr = row.get('last_reviewed')
-                nr = row.get('next_review')
-                
-                if pd.isna(lr) or str(lr).strip().lower() in ['nat', 'none', 'nan', '']:
-                    lr = None
-                else:
-                    lr = str(lr)
-                    
-                if pd.isna(nr) or str(nr).strip().lower() in ['nat', 'none', 'nan', '']:
-                    nr = None
-                else:
-                    nr = str(nr)
-
-                # Stats
-                try:
-                    iv = int(row.get('interval', 0))
-                except: iv = 0
-                
-                try:
-                    fc = int(row.get('fail_count', 0))
-                except: fc = 0
+        cols = ['word_id', 'last_reviewed', 'next_review', 'interval', 'fail_count']
+        frame = progress_df.reindex(columns=cols)
+        has_dirty = 'is_dirty' in progress_df.columns
+        if has_dirty:
+            frame = frame[progress_df['is_dirty'].fillna(True).astype(bool)]
+            current = {}
+        else:
+            rows = conn.execute(
+                f'SELECT word_id, last_reviewed, next_review, interval, fail_count FROM user_progress WHERE user_id = {USER_ID_SQL}',
+                (username,)
+            ).fetchall()
+            current = {r['word_id']: tuple(r) for r in rows}
 
-                data_to_insert.append((username, w_id, lr, nr, iv, fc))
+        data_to_upsert = []
+        for row in frame.itertuples(index=False, name=None):
+            values = _normalize_progress_values(*row)
+            if values is None: continue
+            if current.get(values[0]) == values: continue # 변경 없음
+            data_to_upsert.append((username,) + values)
 
-            if data_to_insert:
-                c.executemany('''
-                    INSERT INTO user_progress (username, word_id, last_reviewed, next_review, interval, fail_count)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', data_to_insert)
-        
+        if data_to_upsert:
+            conn.executemany(PROGRESS_UPSERT_SQL, data_to_upsert)
         conn.commit()
+
+        if has_dirty:
+            progress_df['is_dirty'] = False
         return True
     except Exception as e:
         conn.rollback()
@@ -389,76 +1767,633 @@ def save_user_progress(username, progress_df):
     finally:
         conn.close()
 
-def update_single_user_progress(username, word_id, last_reviewed, next_review, interval, fail_count):
-    """단일 단어 진행 상황 업데이트 (UPSERT) - 성능 최적화용"""
-    conn = get_db_connection()
-    c = conn.cursor()
+def _write_progress(conn, username, values):
+    conn.execute(PROGRESS_UPSERT_SQL, (username,) + values)
+    return True
+
+def update_single_user_progress(username, word_id, last_reviewed, next_review, interval, fail_count, wait=True):
+    """단일 단어 진행 상황 업데이트 (UPSERT) - 그룹 커밋 스레드 경유
+       wait=False면 Future 반환
+    """
+    values = _normalize_progress_values(word_id, last_reviewed, next_review, interval, fail_count)
+    if values is None:
+        return False
+    future = submit_write(_write_progress, username, values)
+    if not wait:
+        return future
     try:
-        # [FIX] word_id 강제 형변환
-        word_id = int(word_id)
-        
-        # 날짜 타입 변환 (Safety)
-        if hasattr(last_reviewed, 'strftime'): last_reviewed = str(last_reviewed)
-        if hasattr(next_review, 'strftime'): next_review = str(next_review)
-        
-        # 1. 존재 여부 확인
-        c.execute("SELECT id FROM user_progress WHERE username = ? AND word_id = ?", (username, word_id))
-        row = c.fetchone()
-        
-        if row:
-            # Update
-            c.execute('''
-                UPDATE user_progress 
-                SET last_reviewed = ?, next_review = ?, interval = ?, fail_count = ?
-                WHERE id = ?
-            ''', (last_reviewed, next_review, interval, fail_count, row['id']))
-        else:
-            # Insert
-            c.execute('''
-                INSERT INTO user_progress (username, word_id, last_reviewed, next_review, interval, fail_count)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (username, word_id, last_reviewed, next_review, interval, fail_count))
-            
-        conn.commit()
-        return True
+        return future.result()
     except Exception as e:
         print(f"Error updating single progress: {e}")
         return False
-    finally:
-        conn.close()
 
 
-def batch_log_study_results(log_buffer):
-    """학습 로그 일괄 저장 (기존 batch_log_study_results 대체)"""
+LOG_INSERT_SQL = f'INSERT INTO study_log (ts, word_id, user_id, level, is_correct) VALUES (?, ?, {USER_ID_SQL}, ?, ?)'
+
+def _log_params(row):
+    """로그 행 -> LOG_INSERT_SQL 파라미터. 예전 형식([timestamp, date, ...] 6개, 이전 저널 등)도 변환"""
+    if len(row) == 6:
+        return (_legacy_log_ts(row[0], row[1]), *row[2:])
+    return tuple(row)
+
+def _write_logs(conn, rows):
+    conn.executemany(LOG_INSERT_SQL, rows)
+    return True
+
+def batch_log_study_results(log_buffer, wait=True):
+    """학습 로그 일괄 저장 - 그룹 커밋 스레드 경유
+       log_buffer: [[ts(epoch 초), word_id, username, level, is_correct], ...]
+    """
     if not log_buffer:
         return True
-        
-    conn = get_db_connection()
+    
+    rows = [_log_params(row) for row in log_buffer]
+    future = submit_write(_write_logs, rows)
+    if not wait:
+        return future
     try:
-        log_df = pd.DataFrame(log_buffer, columns=['timestamp', 'date', 'word_id', 'username', 'level', 'is_correct'])
-        log_df.to_sql('study_log', conn, if_exists='append', index=False)
-        conn.commit()
-        return True
+        return future.result()
     except Exception as e:
         print(f"Error batch logging results: {e}")
         return False
+
+def _write_vocab_stats(conn, updates):
+    conn.executemany(
+        'UPDATE voca_db SET total_try = total_try + ?, total_wrong = total_wrong + ? WHERE id = ?',
+        updates # [(try_increment, wrong_increment, word_id), ...]
+    )
+    return True
+
+def update_vocab_stats(updates, wait=True):
+    """단어 통계(total_try, total_wrong) 업데이트 - 그룹 커밋 스레드 경유"""
+    future = submit_write(_write_vocab_stats, list(updates))
+    if not wait:
+        return future
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Error updating vocab stats: {e}")
+        return False
+
+# --- 답안 기록 (Record Answer) ---
+
+def _parse_id_list(id_str):
+    """'1,2,3' -> ['1', '2', '3'] (순서 유지)"""
+    return [x.strip() for x in (id_str or '').split(',') if x.strip()]
+
+# --- 오답노트 / 진행 중 세션 (pending_wrongs / pending_session 테이블) ---
+
+def _add_pending(conn, table, username, word_ids):
+    conn.executemany(
+        f'INSERT OR IGNORE INTO {table} (user_id, word_id) VALUES ({USER_ID_SQL}, ?)',
+        [(username, int(w)) for w in word_ids]
+    )
+
+def _remove_pending(conn, table, username, word_ids):
+    conn.executemany(
+        f'DELETE FROM {table} WHERE user_id = {USER_ID_SQL} AND word_id = ?',
+        [(username, int(w)) for w in word_ids]
+    )
+
+def _replace_pending(conn, table, username, word_ids):
+    conn.execute(f'DELETE FROM {table} WHERE user_id = {USER_ID_SQL}', (username,))
+    _add_pending(conn, table, username, word_ids)
+
+def load_pending_ids(username):
+    """(오답노트 단어 id set, 진행 중 세션 단어 id set) - 인덱스 조회 1회"""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT 0 AS kind, word_id FROM pending_wrongs WHERE user_id = {USER_ID_SQL}
+            UNION ALL
+            SELECT 1 AS kind, word_id FROM pending_session WHERE user_id = {USER_ID_SQL}
+        ''', (username, username)).fetchall()
     finally:
         conn.close()
+    wrongs, session = set(), set()
+    for row in rows:
+        (session if row['kind'] else wrongs).add(row['word_id'])
+    return wrongs, session
 
-def update_vocab_stats(updates):
-    """단어 통계(total_try, total_wrong) 업데이트"""
+def has_pending_session(username):
+    """진행 중 세션이 남아 있는지 (매 rerun 호출 - 인덱스 1회 탐색)"""
     conn = get_db_connection()
     try:
-        c = conn.cursor()
-        c.executemany(
+        return conn.execute(f'SELECT 1 FROM pending_session WHERE user_id = {USER_ID_SQL} LIMIT 1', (username,)).fetchone() is not None
+    finally:
+        conn.close()
+
+def update_pending(username, table, action, word_ids, wait=True):
+    """
+    pending 테이블 변경 (writer 스레드 경유)
+    table: 'pending_wrongs' / 'pending_session', action: 'add' / 'remove' / 'set'(전체 교체)
+    wait=False면 Future 반환
+    """
+    if table not in PENDING_TABLES:
+        raise ValueError(f"unknown pending table: {table}")
+    fn = {'add': _add_pending, 'remove': _remove_pending, 'set': _replace_pending}[action]
+    future = submit_write(fn, table, username, list(word_ids))
+    if not wait:
+        return future
+    try:
+        future.result()
+        return True
+    except Exception as e:
+        print(f"Error updating {table}: {e}")
+        return False
+
+def sync_pending_ids(username, wrongs=None, session=None):
+    """세션 로컬 set 전체를 DB에 동기화 (저장 후 종료 / 세트 종료 시 안전장치) - 한 트랜잭션"""
+    def _write(conn):
+        if wrongs is not None:
+            _replace_pending(conn, 'pending_wrongs', username, wrongs)
+        if session is not None:
+            _replace_pending(conn, 'pending_session', username, session)
+    try:
+        submit_write(_write).result()
+        return True
+    except Exception as e:
+        print(f"Error syncing pending ids: {e}")
+        return False
+
+def _apply_answer(conn, username, answer):
+    """
+    답안 1건을 현재 트랜잭션에 적용 (커밋은 호출자가 담당)
+    answer: record_answer() 참고
+    """
+    word_id = int(answer['word_id'])
+
+    # 1. 학습 로그
+    log_row = answer.get('log')
+    if log_row:
+        conn.execute(LOG_INSERT_SQL, _log_params(log_row))
+
+    # 2. 단어 통계
+    stats = answer.get('stats')
+    if stats:
+        conn.execute(
             'UPDATE voca_db SET total_try = total_try + ?, total_wrong = total_wrong + ? WHERE id = ?',
-            updates # [(try_increment, wrong_increment, word_id), ...]
+            (stats[0], stats[1], word_id)
         )
-        conn.commit()
+
+    # 3. 오답 노트 / 진행 중 세션 목록 (단어별 1행 INSERT/DELETE)
+    _remove_pending(conn, 'pending_wrongs', username, answer.get('wrongs_remove', ()))
+    _add_pending(conn, 'pending_wrongs', username, answer.get('wrongs_add', ()))
+    _remove_pending(conn, 'pending_session', username, answer.get('session_remove', ()))
+
+    # 4. 진도표 (SRS)
+    progress = answer.get('progress')
+    if progress:
+        values = _normalize_progress_values(word_id, *progress)
+        if values is not None:
+            conn.execute(PROGRESS_UPSERT_SQL, (username,) + values)
+
+def _json_default(v):
+    # date / numpy 정수 등 JSON 직렬화
+    if hasattr(v, 'isoformat'): return v.isoformat()
+    if hasattr(v, 'item'): return v.item()
+    return str(v)
+
+class _JournalGap(Exception):
+    """앞 seq 항목이 아직 반영되지 않아 순서대로 적용할 수 없음"""
+
+
+class AnswerJournal:
+    """
+    Write-Behind 답안 저널 (append-only JSON lines)
+    - append(): 저널 파일에 기록(fsync) 후 즉시 반환, DB 반영은 그룹 커밋 스레드가 담당
+    - 각 항목은 seq 번호를 가지며, DB 반영과 같은 트랜잭션에서 config.answer_journal_seq를 갱신
+      -> 프로세스가 죽어도 재시작 시 미반영 항목만 재적용 (중복 적용 없음)
+    - 항목은 seq 순서대로만 반영: 한 항목이 실패하면 뒤 항목도 반영하지 않고, 잠시 후 저널에서 순서대로 다시 등록
+    - 대기 항목이 모두 반영되고 실패가 없을 때만 저널 파일을 비움
+    """
+    SEQ_KEY = 'answer_journal_seq'
+    MAX_ATTEMPTS = 3            # 연속 재시도 횟수 (이후에는 다음 답안 기록 때 다시 시도, 저널은 그대로 보존)
+    RETRY_DELAY_SEC = 1.0       # 재시도 대기 시간 (시도마다 증가)
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock() # 카운터/상태용. 이미 끝난 future 의 콜백(_on_done)은 등록 시 바로 실행됨
+        self._file_lock = threading.Lock() # 저널 파일 추가 기록 직렬화 (잠금 순서: _file_lock -> _lock)
+        self._seq = 0
+        self._pending = 0
+        self._started = False
+        self._failed = False        # 반영 실패 후 아직 재시도로 복구되지 않음 (이 동안 저널을 비우지 않음)
+        self._attempts = 0
+        self._resync_timer = None
+
+    def _applied_seq(self):
+        conn = get_db_connection()
+        try:
+            row = conn.execute('SELECT value FROM config WHERE key = ?', (self.SEQ_KEY,)).fetchone()
+            return int(row['value']) if row else 0
+        finally:
+            conn.close()
+
+    def start(self):
+        """저널 재생: 아직 DB에 반영되지 않은 항목을 순서대로 쓰기 스레드에 등록"""
+        if self._started:
+            return
+        # 락 밖에서 조회: get_db_connection() -> _ensure_schema() -> start() 로 재진입할 수 있음
+        applied = self._applied_seq()
+        with self._file_lock, self._lock:
+            if self._started:
+                return
+            self._started = True
+            entries, last_seq = self._read_unapplied(applied)
+            self._seq = max(applied, last_seq)
+            for entry in entries:
+                self._submit(entry)
+
+    def _read_unapplied(self, applied):
+        """저널 파일에서 seq > applied 인 항목 (seq 순) + 파일의 최대 seq. 호출자가 self._file_lock 보유"""
+        entries = []
+        last_seq = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # 기록 도중 중단된 마지막 줄
+                    last_seq = max(last_seq, entry['seq'])
+                    if entry['seq'] > applied:
+                        entries.append(entry)
+        entries.sort(key=lambda e: e['seq'])
+        return entries, last_seq
+
+    def append(self, username, answer):
+        self.start()
+        # 파일 기록/fsync 는 _file_lock 으로만 직렬화 (seq 순서 = 파일 순서 = 등록 순서)
+        # _lock 은 카운터 갱신 동안만 잡으므로 쓰기 스레드의 _on_done 이 fsync 를 기다리지 않음
+        with self._file_lock:
+            with self._lock:
+                self._seq += 1
+                self._pending += 1 # 미리 예약: 기록 중에 저널이 비워지지 않도록
+                entry = {'seq': self._seq, 'username': username, 'answer': answer}
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=_json_default) + "\n")
+                    f.flush()
+                    if ANSWER_JOURNAL_FSYNC:
+                        os.fsync(f.fileno())
+            except Exception:
+                with self._lock:
+                    self._seq -= 1 # _file_lock 보유 중이므로 다른 항목이 끼어들지 않음 (seq 빈칸 방지)
+                    self._pending -= 1
+                raise
+            self._enqueue(entry)
+            with self._lock:
+                if self._failed and self._resync_timer is None and self._attempts >= self.MAX_ATTEMPTS:
+                    self._attempts = 0 # 재시도를 모두 소진한 뒤 새 답안이 들어오면 다시 시도
+                    self._schedule_resync()
+        return entry['seq']
+
+    def _submit(self, entry):
+        # 호출자가 self._lock 보유
+        self._pending += 1
+        self._enqueue(entry)
+
+    def _enqueue(self, entry):
+        future = submit_write(self._apply, entry)
+        future.add_done_callback(lambda f: self._on_done(entry, f))
+
+    @classmethod
+    def _apply(cls, conn, entry):
+        # 반드시 seq 순서대로: 이미 반영된 항목은 건너뛰고, 앞 항목이 빠졌으면 반영하지 않음
+        row = conn.execute('SELECT value FROM config WHERE key = ?', (cls.SEQ_KEY,)).fetchone()
+        applied = int(row['value']) if row else 0
+        if entry['seq'] <= applied:
+            return False
+        if entry['seq'] != applied + 1:
+            raise _JournalGap(f"seq={entry['seq']} (반영된 마지막 seq={applied})")
+        _apply_answer(conn, entry['username'], entry['answer'])
+        conn.execute(
+            'INSERT INTO config (key, value) VALUES (?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), excluded.value)',
+            (cls.SEQ_KEY, str(entry['seq']))
+        )
+        return True
+
+    def _on_done(self, entry, future):
+        error = future.exception()
+        with self._lock:
+            self._pending -= 1
+            if error is not None:
+                if not isinstance(error, _JournalGap): # 뒤따르는 항목의 순서 오류는 같은 원인이므로 생략
+                    print(f"Error applying answer journal (seq={entry['seq']}): {error}")
+                self._failed = True
+                self._schedule_resync()
+            elif self._pending == 0 and not self._failed:
+                # 모든 항목이 반영되었을 때만 저널 비우기 (실패 항목은 다음 재생을 위해 남김)
+                self._attempts = 0
+                try:
+                    open(self.path, 'w').close()
+                except OSError:
+                    pass
+
+    def _schedule_resync(self):
+        # 호출자가 self._lock 보유. 재시도는 MAX_ATTEMPTS 회까지, 이후에는 다음 append() 때 다시 시도
+        if self._resync_timer is not None or self._attempts >= self.MAX_ATTEMPTS:
+            return
+        self._attempts += 1
+        self._resync_timer = threading.Timer(self.RETRY_DELAY_SEC * self._attempts, self._resync)
+        self._resync_timer.daemon = True
+        self._resync_timer.start()
+
+    def _resync(self):
+        """실패 후 재시도: 저널 파일에서 아직 반영되지 않은 항목을 seq 순서대로 다시 등록"""
+        try:
+            applied = self._applied_seq()
+        except Exception as e:
+            applied = None
+            print(f"Error reading answer journal watermark: {e}")
+        with self._file_lock, self._lock:
+            self._resync_timer = None
+            if applied is None:
+                self._schedule_resync()
+                return
+            self._failed = False
+            for entry in self._read_unapplied(applied)[0]:
+                self._submit(entry)
+
+    def pending(self):
+        return self._pending
+
+    def failed(self):
+        """반영에 실패해 재시도를 기다리는 항목이 있는지"""
+        return self._failed
+
+    def wait(self, timeout=5.0):
+        """대기 중인 항목이 DB에 모두 반영될 때까지 대기 (읽기 전 일관성 확보용). 실패/시간 초과면 False"""
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._failed) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._pending == 0 and not self._failed
+
+
+_answer_journal = AnswerJournal(ANSWER_JOURNAL_FILE)
+
+def record_answer(username, answer, write_behind=None):
+    """
+    답안 1건 (로그 + 단어 통계 + 오답/세션 목록 + 진도표)을 한 트랜잭션으로 저장
+    answer: {
+        'word_id': int,
+        'log': [ts(epoch 초), word_id, username, level, is_correct] or None,
+        'stats': (try_inc, wrong_inc) or None,
+        'wrongs_add': [ids], 'wrongs_remove': [ids], 'session_remove': [ids],
+        'progress': (last_reviewed, next_review, interval, fail_count) or None,
+    }
+    write_behind: None이면 ANSWER_WRITE_BEHIND 설정을 따름
+    """
+    if write_behind is None:
+        write_behind = ANSWER_WRITE_BEHIND
+
+    if write_behind:
+        try:
+            _answer_journal.append(username, answer)
+            return True
+        except Exception as e:
+            print(f"Error journaling answer: {e}")
+            # 저널 기록 실패 시 동기 저장으로 대체
+
+    try:
+        return submit_write(_record_answer_write, username, answer).result()
     except Exception as e:
-        print(f"Error updating vocab stats: {e}")
+        print(f"Error recording answer: {e}")
+        return False
+
+def _record_answer_write(conn, username, answer):
+    _apply_answer(conn, username, answer)
+    return True
+
+def wait_for_pending_answers(timeout=5.0):
+    """Write-Behind 모드에서 아직 반영되지 않은 답안을 기다림 (동기 모드면 즉시 반환)"""
+    return _answer_journal.wait(timeout)
+
+# --- 난이도 재조정용 답안 집계 (증분) ---
+WORD_STATS_WATERMARK = 'word_answer_stats'
+
+WORD_STATS_ACCUMULATE_SQL = '''
+    INSERT INTO word_answer_stats (word_id, user_level, is_correct, n)
+    SELECT word_id, level, CASE WHEN is_correct THEN 1 ELSE 0 END, COUNT(*)
+    FROM study_log
+    WHERE id > ? AND id <= ? AND word_id IS NOT NULL AND level IS NOT NULL
+    GROUP BY word_id, level, CASE WHEN is_correct THEN 1 ELSE 0 END
+    ON CONFLICT (word_id, user_level, is_correct) DO UPDATE SET n = n + excluded.n
+'''
+WORD_STATS_ARCHIVE_SQL = '''
+    SELECT word_id, level, CASE WHEN is_correct THEN 1 ELSE 0 END, COUNT(*)
+    FROM study_log
+    WHERE word_id IS NOT NULL AND level IS NOT NULL
+    GROUP BY 1, 2, 3
+'''
+WORD_STATS_MERGE_SQL = '''
+    INSERT INTO word_answer_stats (word_id, user_level, is_correct, n) VALUES (?, ?, ?, ?)
+    ON CONFLICT (word_id, user_level, is_correct) DO UPDATE SET n = n + excluded.n
+'''
+
+def _reset_word_answer_stats(conn):
+    conn.execute('DELETE FROM word_answer_stats')
+    conn.execute('DELETE FROM batch_watermark WHERE name = ?', (WORD_STATS_WATERMARK,))
+
+def _accumulate_word_answer_stats(conn):
+    row = conn.execute('SELECT last_id FROM batch_watermark WHERE name = ?', (WORD_STATS_WATERMARK,)).fetchone()
+    last_id = row['last_id'] if row else 0
+    archived = 0
+    if last_id == 0:
+        # 처음부터 다시 집계: 보관 파일로 옮긴 로그(모두 이전 watermark 이하)를 먼저 합산
+        archived_stats = list(_archived_rows(WORD_STATS_ARCHIVE_SQL))
+        conn.executemany(WORD_STATS_MERGE_SQL, archived_stats)
+        archived = sum(r[3] for r in archived_stats)
+    max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM study_log').fetchone()[0]
+    if max_id <= last_id:
+        return archived
+    new_rows = archived + conn.execute('SELECT COUNT(*) FROM study_log WHERE id > ? AND id <= ?', (last_id, max_id)).fetchone()[0]
+    conn.execute(WORD_STATS_ACCUMULATE_SQL, (last_id, max_id))
+    conn.execute(
+        'INSERT INTO batch_watermark (name, last_id) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id',
+        (WORD_STATS_WATERMARK, max_id)
+    )
+    return new_rows
+
+def accumulate_word_answer_stats(full=False):
+    """
+    watermark 이후 새 study_log만 word_answer_stats에 합산 (full=True면 처음부터 다시 집계)
+    반환: 새로 반영한 로그 수
+    """
+    def _write(conn):
+        if full:
+            _reset_word_answer_stats(conn)
+        return _accumulate_word_answer_stats(conn)
+    return submit_write(_write).result()
+
+def load_word_answer_stats():
+    """단어별 (학생 레벨, 정오) 답안 수 (word_id, user_level, is_correct, n)"""
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.row_factory = None # 튜플로 받아 바로 배열화 (read_sql보다 빠름)
+        rows = cur.execute('SELECT word_id, user_level, is_correct, n FROM word_answer_stats').fetchall()
     finally:
         conn.close()
+    data = np.array(rows, dtype=np.int64).reshape(-1, 4)
+    return pd.DataFrame(data, columns=['word_id', 'user_level', 'is_correct', 'n'])
+
+# --- 학습 로그 보관 (Hot/Cold) ---
+# 오래된 study_log 행은 월별 SQLite 파일(log_archive/study_log_YYYY_MM.db)로 옮김.
+# 일별 집계(study_daily_rollup), 레벨 평가 창(study_level_window), 단어 통계(word_answer_stats)는
+# 본 DB에 그대로 남으므로 대시보드/랭킹/재조정은 보관 파일을 읽지 않음.
+# 보관 파일은 전체 기록 조회, 재집계(full), 학생 삭제 때만 열림.
+LOG_COLUMNS = 'id, ts, user_id, word_id, level, is_correct'
+
+def _archive_dir():
+    return os.path.join(os.path.dirname(DB_FILE), LOG_ARCHIVE_DIR)
+
+def _archive_path(month):
+    """'YYYY-MM' -> 보관 파일 경로"""
+    return os.path.join(_archive_dir(), f"study_log_{month.replace('-', '_')}.db")
+
+def _archive_files():
+    """보관 파일 경로 목록 (월 순서)"""
+    folder = _archive_dir()
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+            if f.startswith('study_log_') and f.endswith('.db')]
+
+def _archive_connect(path):
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT_MS / 1000, factory=InstrumentedConnection)
+    if _table_exists(conn, 'study_log') and 'ts' not in _table_columns(conn, 'study_log'):
+        conn.execute('BEGIN')
+        _migrate_log_to_epoch(conn) # [MIGRATION]
+        conn.commit()
+    conn.execute(STUDY_LOG_TABLE_SQL.format(table='study_log'))
+    return conn
+
+def _archived_rows(sql, params=()):
+    """모든 보관 파일에 같은 SELECT를 실행해 결과 행(튜플)을 이어서 반환"""
+    for path in _archive_files():
+        conn = _archive_connect(path)
+        try:
+            yield from conn.execute(sql, params)
+        finally:
+            conn.close()
+
+def _copy_archive_batch(cutoff_ts, after_id):
+    """
+    (writer 밖) ts < cutoff_ts 이고 단어 통계에 이미 합산된(watermark 이하) 행 중 id > after_id 인 것을
+    최대 LOG_ARCHIVE_BATCH_ROWS개 월별 보관 파일에 복사 (각 보관 파일은 자기 연결로 커밋)
+    반환: (복사한 행 수, 첫 id, 마지막 id, watermark)
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute('SELECT last_id FROM batch_watermark WHERE name = ?', (WORD_STATS_WATERMARK,)).fetchone()
+        watermark = row['last_id'] if row else 0
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(f'''
+            SELECT {LOG_COLUMNS} FROM study_log
+            WHERE ts < ? AND id <= ? AND id > ?
+            ORDER BY id LIMIT ?
+        ''', (cutoff_ts, watermark, after_id, LOG_ARCHIVE_BATCH_ROWS)).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return 0, None, None, watermark
+
+    by_month = {}
+    for r in rows:
+        month = from_day_number((r[1] + LOG_DAY_OFFSET) // 86400).strftime('%Y-%m')
+        by_month.setdefault(month, []).append(r)
+    for month, month_rows in by_month.items():
+        archive = _archive_connect(_archive_path(month))
+        try:
+            with archive:
+                archive.executemany(f'INSERT OR IGNORE INTO study_log ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)', month_rows)
+        finally:
+            archive.close()
+    return len(rows), rows[0][0], rows[-1][0], watermark
+
+def _delete_archived_range(conn, first_id, last_id, cutoff_ts, watermark):
+    """(writer) 보관 파일에 복사한 id 범위를 본 DB에서 삭제 (복사할 때와 같은 조건 -> 범위 안의 복사된 행만)"""
+    return conn.execute(
+        'DELETE FROM study_log WHERE id BETWEEN ? AND ? AND ts < ? AND id <= ?',
+        (first_id, last_id, cutoff_ts, watermark)
+    ).rowcount
+
+def archive_study_log(horizon_days=LOG_ARCHIVE_HORIZON_DAYS, today=None):
+    """
+    학습일(KST)이 horizon_days보다 오래된 study_log 행을 월별 보관 파일로 이동
+    - 먼저 단어 통계를 최신으로 합산해 두고, 합산된 행만 옮김 (재조정 결과 그대로 유지)
+    - 보관 파일 복사는 writer 밖에서 먼저 커밋하고, writer 에는 id 범위 삭제만 제출
+      (보관 파일 I/O 동안 학생 답안 커밋이 기다리지 않음. 삭제 전에 실패해도 다음 실행 때 INSERT OR IGNORE로 이어서 처리)
+    반환: 이동한 행 수
+    """
+    cutoff_day = to_day_number((today or date.today()) - timedelta(days=horizon_days))
+    cutoff_ts = cutoff_day * 86400 - LOG_DAY_OFFSET # 기준일 0시 (KST)
+    accumulate_word_answer_stats()
+    os.makedirs(_archive_dir(), exist_ok=True)
+
+    moved = 0
+    after_id = 0
+    while True:
+        n, first_id, last_id, watermark = _copy_archive_batch(cutoff_ts, after_id)
+        if not n:
+            break
+        moved += submit_write(_delete_archived_range, first_id, last_id, cutoff_ts, watermark).result()
+        after_id = last_id
+    if moved:
+        invalidate_analytics_snapshot()
+    return moved
+
+def _delete_archived_logs(user_id):
+    """보관 파일에서 한 학생의 로그 삭제 (학생 삭제 시)"""
+    try:
+        for path in _archive_files():
+            archive = _archive_connect(path)
+            try:
+                with archive:
+                    archive.execute('DELETE FROM study_log WHERE user_id = ?', (user_id,))
+            finally:
+                archive.close()
+    except Exception as e:
+        print(f"Error deleting archived logs: {e}")
+
+def _read_archived_logs(user_id=None):
+    """보관 파일의 study_log 행 DataFrame (user_id 지정 시 해당 학생만)"""
+    sql = f'''
+        SELECT l.id, {LOG_TIMESTAMP_SQL.format(ref='l')}, {LOG_DATE_SQL.format(ref='l')},
+               l.word_id, l.user_id, l.level, l.is_correct
+        FROM study_log l
+    '''
+    params = ()
+    if user_id is not None:
+        sql += ' WHERE l.user_id = ?'
+        params = (user_id,)
+    columns = ['id', 'timestamp', 'date', 'word_id', 'user_id', 'level', 'is_correct']
+    return pd.DataFrame(list(_archived_rows(sql, params)), columns=columns)
+
+def _with_archived_logs(hot, usernames, user_id=None):
+    """본 DB 로그(hot) 앞에 보관 로그를 붙여 같은 컬럼 구성으로 반환 (user_id -> username 변환)"""
+    cold = _read_archived_logs(user_id)
+    if cold.empty:
+        return hot
+    cold.insert(4, 'username', cold.pop('user_id').map(usernames))
+    return pd.concat([cold, hot], ignore_index=True)
+
+def get_log_archive_summary():
+    """보관 파일별 (month, rows, size_kb)"""
+    rows = []
+    for path in _archive_files():
+        month = os.path.basename(path)[len('study_log_'):-len('.db')].replace('_', '-')
+        archive = _archive_connect(path)
+        try:
+            count = archive.execute('SELECT COUNT(*) FROM study_log').fetchone()[0]
+        finally:
+            archive.close()
+        rows.append((month, count, round(os.path.getsize(path) / 1024, 1)))
+    return pd.DataFrame(rows, columns=['month', 'rows', 'size_kb'])
 
 def batch_update_vocab_levels(updates):
     """
@@ -485,10 +2420,20 @@ def delete_student(username):
     conn = get_db_connection()
     try:
         conn.execute("BEGIN TRANSACTION")
-        conn.execute('DELETE FROM user_progress WHERE username = ?', (username,))
-        conn.execute('DELETE FROM study_log WHERE username = ?', (username,))
+        row = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()
+        user_id = row['id'] if row else None
+        conn.execute('DELETE FROM user_progress WHERE user_id = ?', (user_id,))
+        conn.execute('DELETE FROM study_log WHERE user_id = ?', (user_id,))
+        conn.execute('DELETE FROM study_level_window WHERE user_id = ?', (user_id,))
+        conn.execute('DELETE FROM study_daily_rollup WHERE user_id = ?', (user_id,))
+        for table in PENDING_TABLES:
+            conn.execute(f'DELETE FROM {table} WHERE user_id = ?', (user_id,))
+        _reset_word_answer_stats(conn) # 삭제된 로그가 집계에 남지 않도록 다음 재조정 때 전체 재집계
         conn.execute('DELETE FROM users WHERE username = ?', (username,))
         conn.commit()
+        if user_id is not None:
+            _delete_archived_logs(user_id) # 다음 단어 통계 재집계 전에 보관 로그도 정리
+        invalidate_analytics_snapshot() # 삭제된 학생이 통계 탭에 남지 않도록
         return True
     except Exception as e:
         conn.rollback()
@@ -554,55 +2499,127 @@ def delete_word(word_id):
     finally:
         conn.close()
 
-def bulk_upsert_words(df):
-    """엑셀 데이터 일괄 업로드 (Target Word 기준 Upsert)"""
-    conn = get_db_connection()
-    c = conn.cursor()
+BULK_UPSERT_CHUNK = 1000           # 엑셀 업로드: 한 트랜잭션에 처리할 행 수 (쓰기 잠금 점유 시간 제한)
+WORD_UPLOAD_COLUMNS = ('meaning', 'level', 'sentence_en', 'sentence_ko', 'root_word')
+
+def _upload_cell(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value
+
+def _normalize_upload_row(row):
+    """업로드 행(dict) -> (target_word, meaning, level, sentence_en, sentence_ko, root_word), 무효 행은 None"""
+    target = _upload_cell(row.get('target_word'))
+    if target is None or not str(target).strip():
+        return None
+    level = _upload_cell(row.get('level'))
     try:
-        count_added = 0
-        count_updated = 0
-        
-        # 1. 기존 단어 매핑 가져오기 (target_word -> id)
-        c.execute("SELECT id, target_word FROM voca_db")
-        existing_words = {row['target_word']: row['id'] for row in c.fetchall()}
-        
-        for _, row in df.iterrows():
-            # 필수 컬럼 체크
-            if 'target_word' not in row or pd.isna(row['target_word']): continue
-            
-            # 데이터 정제
-            target_word = str(row['target_word']).strip()
-            meaning = row.get('meaning', '')
-            level = int(row.get('level', 1)) if pd.notna(row.get('level')) else 1
-            sentence_en = row.get('sentence_en', '')
-            sentence_ko = row.get('sentence_ko', '')
-            root_word = row.get('root_word', '')
-            
-            # Target Word 존재 여부 확인
-            if target_word in existing_words:
-                # 존재하면 UPDATE (ID 기반)
-                word_id = existing_words[target_word]
-                c.execute('''
-                    UPDATE voca_db 
-                    SET meaning=?, level=?, sentence_en=?, sentence_ko=?, root_word=?
-                    WHERE id=?
-                ''', (meaning, level, sentence_en, sentence_ko, root_word, word_id))
-                count_updated += 1
-            else:
-                # 없으면 INSERT
-                c.execute('''
-                    INSERT INTO voca_db (target_word, meaning, level, sentence_en, sentence_ko, root_word)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (target_word, meaning, level, sentence_en, sentence_ko, root_word))
-                count_added += 1
-                
-        conn.commit()
-        return count_added, count_updated
+        level = int(level) if level is not None else 1
+    except (TypeError, ValueError):
+        return None
+    return (
+        str(target).strip(),
+        _upload_cell(row.get('meaning', '')),
+        level,
+        _upload_cell(row.get('sentence_en', '')),
+        _upload_cell(row.get('sentence_ko', '')),
+        _upload_cell(row.get('root_word', '')),
+    )
+
+def _upload_key(values):
+    """비교용: 빈 셀(None)과 빈 문자열을 같게 취급"""
+    return tuple('' if v is None else v for v in values)
+
+def _match_existing_word(candidates, values):
+    """
+    같은 target_word의 기존 단어들(id 순) 중 업로드 행과 짝지을 단어
+    내용이 같은 단어 > 뜻이 같은 단어(동형이의어 구분) > id가 가장 큰 단어
+    """
+    key = _upload_key(values[1:])
+    for cur in candidates:
+        if _upload_key(tuple(cur[col] for col in WORD_UPLOAD_COLUMNS)) == key:
+            return cur, True
+    for cur in candidates:
+        if _upload_key((cur['meaning'],)) == key[:1]:
+            return cur, False
+    return candidates[-1], False
+
+def _upsert_word_chunk(conn, chunk):
+    """
+    chunk 1개 반영: target_word로 기존 단어 조회 후
+    변경된 행만 UPDATE, 새 단어는 INSERT (내용이 같은 행은 건너뜀)
+    """
+    words = list({values[0] for values in chunk})
+    existing = {}
+    rows = conn.execute(
+        f"SELECT id, target_word, {', '.join(WORD_UPLOAD_COLUMNS)} FROM voca_db "
+        f"WHERE target_word IN ({', '.join(['?'] * len(words))}) ORDER BY id",
+        words
+    )
+    for row in rows:
+        existing.setdefault(row['target_word'], []).append(row)
+
+    inserts, updates, unchanged = [], [], 0
+    for values in chunk:
+        candidates = existing.get(values[0])
+        if not candidates:
+            inserts.append(values)
+            continue
+        cur, same = _match_existing_word(candidates, values)
+        if same:
+            unchanged += 1
+        else:
+            updates.append(values[1:] + (cur['id'],))
+
+    if updates:
+        conn.executemany('''
+            UPDATE voca_db 
+            SET meaning=?, level=?, sentence_en=?, sentence_ko=?, root_word=?
+            WHERE id=?
+        ''', updates)
+    if inserts:
+        conn.executemany('''
+            INSERT INTO voca_db (target_word, meaning, level, sentence_en, sentence_ko, root_word)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', inserts)
+    return len(inserts), len(updates), unchanged
+
+def bulk_upsert_words(rows):
+    """
+    엑셀 데이터 일괄 업로드 (Target Word 기준 Upsert)
+    rows: 행 dict의 iterable (스트리밍) 또는 DataFrame
+    BULK_UPSERT_CHUNK행씩 writer 스레드에서 커밋 -> 업로드 중에도 학습 기록 저장이 대기하지 않음
+    반환: {'added', 'updated', 'unchanged', 'skipped', 'error'}
+    """
+    if isinstance(rows, pd.DataFrame):
+        rows = rows.to_dict('records')
+
+    result = {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'error': None}
+
+    def _flush(chunk):
+        added, updated, unchanged = submit_write(_upsert_word_chunk, chunk).result()
+        result['added'] += added
+        result['updated'] += updated
+        result['unchanged'] += unchanged
+
+    try:
+        chunk = []
+        for row in rows:
+            values = _normalize_upload_row(row)
+            if values is None:
+                result['skipped'] += 1 # target_word 누락 / 레벨 형식 오류
+                continue
+            chunk.append(values)
+            if len(chunk) >= BULK_UPSERT_CHUNK:
+                _flush(chunk)
+                chunk = []
+        if chunk:
+            _flush(chunk)
     except Exception as e:
+        # 이미 커밋된 chunk는 유지됨 (반영된 건수는 result에 그대로)
         print(f"Bulk Upsert Error: {e}")
-        return 0, 0
-    finally:
-        conn.close()
+        result['error'] = str(e)
+    return result
 
 def clear_vocabulary_data():
     """단어 데이터 및 관련 진도 초기화 (학생 계정은 유지)"""
@@ -612,16 +2629,24 @@ def clear_vocabulary_data():
         # 1. 테이블 삭제 (스키마 초기화를 위해)
         conn.execute('DROP TABLE IF EXISTS user_progress')
         conn.execute('DROP TABLE IF EXISTS study_log')
+        conn.execute('DROP TABLE IF EXISTS study_level_window')
+        conn.execute('DROP TABLE IF EXISTS study_daily_rollup')
+        _reset_word_answer_stats(conn)
         conn.execute('DROP TABLE IF EXISTS voca_db')
         
         # 2. 유저 상태 초기화 (pending_wrongs, pending_session)
-        conn.execute('UPDATE users SET pending_wrongs = "", pending_session = ""')
+        for table in PENDING_TABLES:
+            conn.execute(f'DELETE FROM {table}')
+        _bump_data_version(conn, 'vocab') # DROP TABLE은 삭제 트리거가 동작하지 않음
         
         conn.commit()
         conn.close()
+        for path in _archive_files(): # 보관 로그도 삭제된 단어를 가리키므로 함께 정리
+            os.remove(path)
         
         # 3. 테이블 재생성
         init_db()
+        invalidate_analytics_snapshot()
         
         return True
     except Exception as e:
@@ -629,3 +2654,19 @@ def clear_vocabulary_data():
         # No, close() is called.
         print(f"Error clearing vocabulary: {e}")
         return False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="voca.db 관리 명령")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill-rollup", help="study_log로 study_daily_rollup 재집계")
+    p = sub.add_parser("archive-logs", help="오래된 study_log를 월별 보관 파일로 이동")
+    p.add_argument("--days", type=int, default=LOG_ARCHIVE_HORIZON_DAYS, help="보관 기준 (학습일이 N일보다 오래된 로그)")
+
+    args = parser.parse_args()
+    if args.command == "backfill-rollup":
+        print(f"study_daily_rollup: {backfill_daily_rollup()} rows")
+    elif args.command == "archive-logs":
+        print(f"archived: {archive_study_log(args.days)} rows -> {_archive_dir()}")
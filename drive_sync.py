@@ -1,10 +1,25 @@
 import os
+import json
+import hashlib
+from contextlib import contextmanager
 import streamlit as st
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaIoBaseUpload
 from oauth2client.service_account import ServiceAccountCredentials
 import io
 from datetime import datetime
+import atexit
+import threading
+try:
+    import fcntl # 프로세스 간 파일 락 (Linux/macOS)
+except ImportError:
+    fcntl = None
+    import msvcrt # Windows
+import database as db
+import metrics
+import replication
+import chunkstore
+import time
 
 # 설정
 SCOPES = ['https://www.googleapis.com/auth/drive']
@@ -12,22 +27,123 @@ DB_FILE = 'voca.db'
 FOLDER_NAME = 'VocaDB_Backup' # 구글 드라이브 내 백업 폴더 이름
 FIXED_FILENAME = 'voca_backup_latest.db' # [FIX] 단일 파일 덮어쓰기용 고정 파일명
 
+# --- 시작 시 동기화 (프로세스당 1회) ---
+SYNC_META_FILE = DB_FILE + '.sync.json'     # 마지막으로 맞춘 드라이브 파일 정보 (md5Checksum, modifiedTime ...)
+SYNC_LOCK_FILE = DB_FILE + '.sync.lock'     # 같은 서버의 여러 프로세스가 동시에 받지 않도록 잠그는 파일
+DOWNLOAD_TMP_FILE = DB_FILE + '.download'   # 다운로드 중인 임시 파일 (검증 후 os.replace 로 교체)
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024       # 다운로드 청크 크기 (메모리에 통째로 올리지 않음)
+REMOTE_META_FIELDS = 'id, md5Checksum, modifiedTime, size'
+
+# --- 증분 복제 모드 (replication.py) ---
+# 'full': 매번 voca.db 전체 업로드 / 'incremental': 기준본 + 바뀐 페이지만 업로드
+# incremental 은 파일을 새로 만들어야 하므로 서비스 계정이 파일을 만들 수 있는 공유 드라이브 폴더가 필요함
+BACKUP_MODE = 'full'
+REPLICA_FOLDER_NAME = 'VocaDB_Replica'
+REPLICA_RESUMABLE_BYTES = 5 * 1024 * 1024   # 이보다 큰 파일(기준본)은 재개 가능한 업로드 사용
+
+# --- 백업 이력 (chunkstore.py: 중복 제거 청크 스냅샷) ---
+# FIXED_FILENAME 은 항상 최신 1개뿐이므로, 날짜별 이력은 청크 저장소에 따로 남김 (역시 공유 드라이브 필요)
+HISTORY_ENABLED = False
+HISTORY_FOLDER_NAME = 'VocaDB_History'
+HISTORY_SNAPSHOT_INTERVAL = 24 * 3600       # 자동 백업 후 마지막 스냅샷이 이보다 오래되었으면 새 스냅샷
+HISTORY_KEEP_SNAPSHOTS = chunkstore.CHUNK_KEEP_SNAPSHOTS
+
+# --- 백그라운드 업로드 설정 ---
+UPLOAD_DEBOUNCE_SEC = 10            # 마지막 요청 후 이 시간 동안 추가 요청이 없으면 업로드 (연속 수정은 1회로 합침)
+UPLOAD_MAX_DELAY_SEC = 60           # 요청이 계속 들어와도 첫 요청 후 이 시간 안에는 반드시 업로드
+UPLOAD_MAX_RETRIES = 3              # 실패 시 재시도 횟수 (이후에는 다음 요청 때 다시 시도)
+UPLOAD_RETRY_BACKOFF_SEC = 5        # 재시도 대기 시간 (시도마다 2배)
+UPLOAD_FAILURE_RETRY_SEC = 300     # 재시도까지 모두 실패하면 이 시간 뒤에 다시 업로드 (변경분은 대기 상태로 유지)
+UPLOAD_EXIT_FLUSH_SEC = 30          # 프로세스 종료 시 대기 중인 업로드를 기다리는 최대 시간
+
+# --- 드라이브 클라이언트 / ID 캐시 ---
+# [PERF] 매 업로드/다운로드마다 인증 객체 생성 + discovery 문서 파싱 + 폴더/파일 ID 조회(왕복 2회)를 하던 것을
+# 프로세스 단위로 캐시. ID 가 가리키는 파일이 지워지거나 옮겨져 404 가 나면 ID 캐시를 비우고 다시 찾음
+DRIVE_STATIC_DISCOVERY = True       # 라이브러리에 포함된 discovery 문서 사용 (네트워크 조회 없음)
+
+_drive_lock = threading.Lock()
+_drive_creds = None                 # 서비스 계정 인증 객체 (프로세스 전역, 토큰 갱신은 라이브러리가 처리)
+_drive_factory = None               # set_drive_service_factory() 로 주입한 서비스 생성 함수
+_drive_generation = 0               # reset_drive_cache() 때마다 증가 -> 스레드별 서비스 재생성
+_drive_local = threading.local()    # 스레드별 서비스 객체 (httplib2 는 스레드 간 공유 불가)
+_id_cache = {}                      # (부모 폴더 ID 또는 None, 이름) -> 파일/폴더 ID
+_drive_error = {'message': None}    # 마지막 서비스 생성 실패 메시지 (백그라운드 스레드에서는 st.error 가 보이지 않으므로 결과로 전달)
+
+def _build_drive_service():
+    global _drive_creds
+    with _drive_lock:
+        if _drive_creds is None:
+            gcp_info = dict(st.secrets["gcp_service_account"])
+            if "private_key" in gcp_info:
+                gcp_info["private_key"] = gcp_info["private_key"].replace("\n", "\n")
+            _drive_creds = ServiceAccountCredentials.from_json_keyfile_dict(gcp_info, SCOPES)
+        creds = _drive_creds
+    return build('drive', 'v3', credentials=creds, cache_discovery=False, static_discovery=DRIVE_STATIC_DISCOVERY)
+
 def get_drive_service():
-    """구글 드라이브 서비스 객체 생성"""
-    try:
-        gcp_info = dict(st.secrets["gcp_service_account"])
-        if "private_key" in gcp_info:
-            gcp_info["private_key"] = gcp_info["private_key"].replace("\n", "\n")
-        
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(gcp_info, SCOPES)
-        service = build('drive', 'v3', credentials=creds)
+    """구글 드라이브 서비스 객체 (스레드마다 처음 1회만 생성하고 재사용)"""
+    service = getattr(_drive_local, 'service', None)
+    if service is not None and _drive_local.generation == _drive_generation:
         return service
+    try:
+        generation = _drive_generation
+        service = (_drive_factory or _build_drive_service)()
     except Exception as e:
-        st.error(f"구글 드라이브 연결 실패: {e}")
+        _drive_error['message'] = f"구글 드라이브 연결 실패: {e}"
+        print(_drive_error['message'])
         return None
+    _drive_error['message'] = None
+    _drive_local.service = service
+    _drive_local.generation = generation
+    return service
+
+def _drive_error_message():
+    return _drive_error['message'] or "구글 드라이브 연결 실패"
+
+def set_drive_service_factory(factory):
+    """
+    서비스 생성 함수 교체 (로컬 가짜 드라이브 등). None 이면 기본(서비스 계정) 방식으로 복원
+    factory() 는 files().list/get/get_media/create/update/delete 를 제공하는 객체를 반환
+    """
+    global _drive_factory
+    _drive_factory = factory
+    reset_drive_cache()
+
+def reset_drive_cache():
+    """캐시한 서비스/인증/ID 모두 폐기 (secrets 변경, 계정 교체 등)"""
+    global _drive_creds, _drive_generation
+    with _drive_lock:
+        _drive_creds = None
+        _drive_generation += 1
+        _id_cache.clear()
+
+def _is_not_found(e):
+    """드라이브 API 404 (HttpError.resp.status) 여부"""
+    return getattr(getattr(e, 'resp', None), 'status', None) == 404
+
+def _drop_stale_ids(e):
+    """404 이면 캐시한 ID 가 더 이상 유효하지 않으므로 ID 캐시를 비움. Return: 비웠는지 여부"""
+    if not _is_not_found(e):
+        return False
+    with _drive_lock:
+        _id_cache.clear()
+    return True
+
+def _cached_id(parent_id, name):
+    with _drive_lock:
+        return _id_cache.get((parent_id, name))
+
+def _remember_id(parent_id, name, file_id):
+    if file_id:
+        with _drive_lock:
+            _id_cache[(parent_id, name)] = file_id
+    return file_id
 
 def _find_folder(service, folder_name):
-    """폴더 ID 찾기"""
+    """폴더 ID 찾기 (찾은 ID 는 캐시, 없으면 매번 다시 조회)"""
+    cached = _cached_id(None, folder_name)
+    if cached:
+        return cached
     query = f"mimeType='application/vnd.google-apps.folder' and name='{folder_name}' and trashed=false"
     # [FIX] Shared Drive 지원 추가
     results = service.files().list(
@@ -39,7 +155,7 @@ def _find_folder(service, folder_name):
     ).execute()
     files = results.get('files', [])
     if files:
-        return files[0]['id']
+        return _remember_id(None, folder_name, files[0]['id'])
     return None
 
 def _create_folder(service, folder_name):
@@ -54,10 +170,13 @@ def _create_folder(service, folder_name):
         fields='id',
         supportsAllDrives=True
     ).execute()
-    return file.get('id')
+    return _remember_id(None, folder_name, file.get('id'))
 
 def _find_file_in_folder(service, folder_id, filename):
-    """폴더 내 파일 ID 찾기"""
+    """폴더 내 파일 ID 찾기 (찾은 ID 는 캐시)"""
+    cached = _cached_id(folder_id, filename)
+    if cached:
+        return cached
     query = f"name='{filename}' and '{folder_id}' in parents and trashed=false"
     # [FIX] Shared Drive 지원 추가
     results = service.files().list(
@@ -69,10 +188,288 @@ def _find_file_in_folder(service, folder_id, filename):
     ).execute()
     files = results.get('files', [])
     if files:
-        return files[0]['id']
+        return _remember_id(folder_id, filename, files[0]['id'])
     return None
 
-def list_backups(limit=20):
+@contextmanager
+def _sync_file_lock():
+    """프로세스 간 배타 락 (같은 서버의 다른 Streamlit 프로세스가 동시에 DB를 교체하지 않도록)"""
+    with open(SYNC_LOCK_FILE, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass # LK_LOCK 은 약 10초 후 포기하므로 다시 시도
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _file_md5(path):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_sync_meta():
+    try:
+        with open(SYNC_META_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_sync_meta(remote):
+    """로컬 voca.db 가 드라이브의 이 버전(remote: files().get 결과)과 같다고 기록"""
+    meta = {k: remote.get(k) for k in ('id', 'md5Checksum', 'modifiedTime', 'size')}
+    meta['synced_at'] = datetime.now().isoformat(timespec='seconds')
+    tmp_path = SYNC_META_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, SYNC_META_FILE)
+    except OSError as e:
+        print(f"Sync Meta Error: {e}")
+
+def _clear_sync_meta():
+    try:
+        os.remove(SYNC_META_FILE)
+    except FileNotFoundError:
+        pass
+
+def _is_same_version(remote, meta):
+    if not meta or meta.get('id') != remote.get('id'):
+        return False
+    if remote.get('md5Checksum') and meta.get('md5Checksum'):
+        return remote['md5Checksum'] == meta['md5Checksum']
+    return remote.get('modifiedTime') == meta.get('modifiedTime') and remote.get('size') == meta.get('size')
+
+def _download_to_temp(service, file_id, expected_md5=None):
+    """
+    드라이브 파일을 임시 파일로 스트리밍 다운로드 (메모리에 통째로 올리지 않음)
+    - expected_md5 가 있으면 받은 내용과 비교해 손상된 파일로 교체하지 않도록 함
+    """
+    request = service.files().get_media(fileId=file_id, supportsAllDrives=True)
+    try:
+        with open(DOWNLOAD_TMP_FILE, 'wb') as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while done is False:
+                status, done = downloader.next_chunk()
+            fh.flush()
+            os.fsync(fh.fileno())
+        if expected_md5 and _file_md5(DOWNLOAD_TMP_FILE) != expected_md5:
+            raise IOError("다운로드한 파일의 md5가 드라이브 정보와 다릅니다.")
+    except Exception:
+        try:
+            os.remove(DOWNLOAD_TMP_FILE)
+        except OSError:
+            pass
+        raise
+    return DOWNLOAD_TMP_FILE
+
+def _swap_in_db(tmp_path):
+    """
+    다운로드한 임시 파일로 로컬 voca.db 교체
+    - 쓰기 스레드 정지 + 사용 중인 연결 반납을 기다린 뒤 WAL/SHM 삭제 후 원자적 교체 (db.replace_db_file)
+    """
+    db.replace_db_file(tmp_path)
+
+class DriveReplicaStore(replication.ReplicaStore):
+    """
+    구글 드라이브 폴더 저장소 (증분 복제 / 백업 이력용)
+    - 이름 -> 파일 ID 는 처음 1회 목록 조회 후 캐시
+    - 서비스 객체(httplib2)는 스레드 간 공유할 수 없으므로 병렬 전송 시 스레드마다 새로 만듦
+    """
+    def __init__(self, service, folder_id, service_factory=None):
+        self._owner = threading.current_thread()
+        self._owner_service = service
+        self._service_factory = service_factory or get_drive_service
+        self._local = threading.local()
+        self._ids_lock = threading.Lock()
+        self.folder_id = folder_id
+        self._ids = None
+
+    @property
+    def service(self):
+        if threading.current_thread() is self._owner:
+            return self._owner_service
+        svc = getattr(self._local, 'service', None)
+        if svc is None:
+            svc = self._local.service = self._service_factory()
+        return svc
+
+    def _file_ids(self):
+        with self._ids_lock:
+            if self._ids is None:
+                self._ids = self._list_file_ids()
+            return self._ids
+
+    def _list_file_ids(self):
+        ids = {}
+        page_token = None
+        while True:
+            results = self.service.files().list(
+                q=f"'{self.folder_id}' in parents and trashed=false",
+                spaces='drive',
+                fields='nextPageToken, files(id, name)',
+                pageSize=1000,
+                pageToken=page_token,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True
+            ).execute()
+            for f in results.get('files', []):
+                ids[f['name']] = f['id']
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        return ids
+
+    def put(self, name, data):
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype='application/octet-stream',
+                                  resumable=len(data) > REPLICA_RESUMABLE_BYTES)
+        file_id = self._file_ids().get(name)
+        if file_id:
+            self.service.files().update(fileId=file_id, media_body=media, supportsAllDrives=True).execute()
+        else:
+            created = self.service.files().create(
+                body={'name': name, 'parents': [self.folder_id]},
+                media_body=media,
+                fields='id',
+                supportsAllDrives=True
+            ).execute()
+            with self._ids_lock:
+                self._ids[name] = created['id']
+
+    def get(self, name):
+        request = self.service.files().get_media(fileId=self._file_ids()[name], supportsAllDrives=True)
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while done is False:
+            status, done = downloader.next_chunk()
+        return fh.getvalue()
+
+    def list(self):
+        return list(self._file_ids())
+
+    def delete(self, name):
+        ids = self._file_ids()
+        with self._ids_lock:
+            file_id = ids.pop(name, None)
+        if file_id:
+            self.service.files().delete(fileId=file_id, supportsAllDrives=True).execute()
+
+def _get_replica_store(service):
+    folder_id = _find_folder(service, REPLICA_FOLDER_NAME) or _create_folder(service, REPLICA_FOLDER_NAME)
+    return DriveReplicaStore(service, folder_id)
+
+def _replicate_to_drive():
+    """[증분 백업] 마지막 전송 이후 바뀐 페이지만 업로드 (필요하면 새 기준본)"""
+    service = get_drive_service()
+    if not service: return False, _drive_error_message()
+
+    try:
+        res = replication.replicate(_get_replica_store(service))
+        metrics.DRIVE_UPLOAD_BYTES.inc(res['bytes'], kind=res['kind'])
+        if res['kind'] == 'none':
+            return True, "변경 사항 없음 (업로드 생략)"
+        return True, f"증분 백업 완료 ({res['name']}, {res['bytes']:,} / {res['db_bytes']:,} bytes)"
+    except Exception as e:
+        _drop_stale_ids(e) # 다음 재시도 때 폴더 ID 를 다시 찾도록
+        print(f"Replicate Error: {e}")
+        return False, f"증분 백업 실패: {e}"
+
+def _download_replica(service, force=False):
+    """[증분 복구] 드라이브의 최신 기준본 + 증분으로 voca.db 복구 (로컬이 이미 같은 지점이면 생략)"""
+    try:
+        store = _get_replica_store(service)
+        with _sync_file_lock():
+            version = replication.latest_version(store)
+            if version is None:
+                return 'no_remote'
+            state = replication.load_state()
+            if not force and os.path.exists(DB_FILE) and state and (state['gen'], state['seq']) == tuple(version):
+                return 'up_to_date'
+            replication.restore(store, DB_FILE, version)
+        return 'downloaded'
+    except Exception as e:
+        _drop_stale_ids(e)
+        print(f"Replica Download Error: {e}")
+        return 'failed'
+
+def _get_history_store(service):
+    folder_id = _find_folder(service, HISTORY_FOLDER_NAME) or _create_folder(service, HISTORY_FOLDER_NAME)
+    return DriveReplicaStore(service, folder_id)
+
+_history_state = {'last_at': None} # 마지막 이력 스냅샷 시각 (epoch 초, None = 아직 확인 안 함)
+
+def create_history_snapshot(note=""):
+    """
+    [백업 이력] 현재 DB를 청크 저장소에 스냅샷으로 저장 (새 청크만 병렬 업로드) 후 오래된 스냅샷 정리
+    Return: (성공 여부, 메시지)
+    """
+    service = get_drive_service()
+    if not service: return False, _drive_error_message()
+
+    try:
+        store = _get_history_store(service)
+        res = chunkstore.backup_snapshot(store, note=note)
+        chunkstore.prune_snapshots(store, HISTORY_KEEP_SNAPSHOTS)
+        _history_state['last_at'] = time.time()
+        metrics.DRIVE_UPLOAD_BYTES.inc(res['uploaded_bytes'], kind='history')
+        return True, f"이력 스냅샷 저장 (새 청크 {res['new_chunks']}/{res['chunks']}개, {res['uploaded_bytes']:,} bytes 전송)"
+    except Exception as e:
+        _drop_stale_ids(e)
+        print(f"History Snapshot Error: {e}")
+        return False, f"이력 스냅샷 실패: {e}"
+
+def _maybe_history_snapshot():
+    """자동 백업 성공 후 호출: 마지막 이력 스냅샷이 HISTORY_SNAPSHOT_INTERVAL 보다 오래되었으면 1개 추가 (하루 1회)"""
+    if not HISTORY_ENABLED:
+        return
+    if _history_state['last_at'] is None:
+        snaps = list_history_snapshots()
+        _history_state['last_at'] = datetime.fromisoformat(snaps[0]['created']).timestamp() if snaps else 0
+    if time.time() - _history_state['last_at'] >= HISTORY_SNAPSHOT_INTERVAL:
+        create_history_snapshot("자동 (일일)")
+
+def list_history_snapshots():
+    """[백업 이력] 스냅샷 목록 (최신순) -> list of dict(name, created, note, db_bytes, chunks)"""
+    service = get_drive_service()
+    if not service: return []
+    try:
+        return chunkstore.list_snapshots(_get_history_store(service))
+    except Exception as e:
+        print(f"History List Error: {e}")
+        return []
+
+def restore_history_snapshot(name):
+    """[백업 이력] 선택한 스냅샷으로 voca.db 복구 (청크 병렬 다운로드 + 검증 후 원자적 교체)"""
+    service = get_drive_service()
+    if not service: return False
+
+    try:
+        store = _get_history_store(service)
+        with _sync_file_lock():
+            chunkstore.restore_snapshot(store, name, DB_FILE)
+            _clear_sync_meta()        # 최신 백업과 다른 내용이 되었으므로 다음 업로드 때 다시 기록
+            replication.reset_state() # 증분 복제는 새 기준본부터 다시
+        return True
+    except Exception as e:
+        print(f"History Restore Error: {e}")
+        return False
+
+def list_backups(limit=20, retry_stale=True):
     """
     [복구] 백업 파일 목록 가져오기
     Return: list of dict {'id', 'name', 'createdTime', 'size'}
@@ -85,23 +482,38 @@ def list_backups(limit=20):
 
     # [FIX] 고정 파일명 검색
     query = f"name = '{FIXED_FILENAME}' and '{folder_id}' in parents and trashed=false"
-    results = service.files().list(
-        q=query, 
-        spaces='drive', 
-        fields='files(id, name, createdTime, size)',
-        orderBy='createdTime desc',
-        pageSize=limit,
-        supportsAllDrives=True, 
-        includeItemsFromAllDrives=True
-    ).execute()
+    try:
+        results = service.files().list(
+            q=query, 
+            spaces='drive', 
+            fields='files(id, name, createdTime, size)',
+            orderBy='createdTime desc',
+            pageSize=limit,
+            supportsAllDrives=True, 
+            includeItemsFromAllDrives=True
+        ).execute()
+    except Exception as e:
+        if retry_stale and _drop_stale_ids(e): # 캐시한 폴더 ID 가 사라진 경우
+            return list_backups(limit, retry_stale=False)
+        raise
     
     return results.get('files', [])
 
 def create_backup(note=""):
     """
-    [백업] 단일 파일 덮어쓰기 모드
+    [백업] 단일 파일 덮어쓰기 모드 (관리자 수동 백업: 결과를 바로 보여줘야 하므로 동기 실행)
+    Return: (성공 여부, 메시지)
     """
-    return upload_db_to_drive()
+    history_msg = None
+    if HISTORY_ENABLED:
+        # 메모와 함께 이력에도 남김 (나중에 이 시점으로 되돌릴 수 있도록, 오늘 자동 스냅샷도 대신함)
+        _, history_msg = create_history_snapshot(note)
+    result = _uploader.upload_now()
+    if not isinstance(result, tuple):
+        return False, "백업 실패 (구글 드라이브 연결 또는 권한을 확인하세요)"
+    if history_msg:
+        return result[0], f"{result[1]} / {history_msg}"
+    return result
 
 def restore_backup(file_id):
     """
@@ -111,64 +523,98 @@ def restore_backup(file_id):
     if not service: return False
 
     try:
-        request = service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-        
-        # 기존 DB 덮어쓰기
-        with open(DB_FILE, 'wb') as f:
-            f.write(fh.getvalue())
-        
+        remote = service.files().get(fileId=file_id, fields=REMOTE_META_FIELDS, supportsAllDrives=True).execute()
+        with _sync_file_lock():
+            tmp_path = _download_to_temp(service, file_id, remote.get('md5Checksum'))
+            # 기존 DB 덮어쓰기
+            _swap_in_db(tmp_path)
+            _clear_sync_meta() # 최신 백업과 다른 내용이 되었으므로 다음 업로드 때 다시 기록
         return True
     except Exception as e:
         print(f"Restore Error: {e}")
         return False
 
-def download_db_from_drive():
+def download_db_from_drive(force=False, retry_stale=True):
     """
     [복구] 구글 드라이브에서 DB 다운로드
+    - 드라이브 파일의 md5Checksum/modifiedTime 이 마지막 동기화 기록과 같으면 받지 않음 (force=True 면 항상 받음)
+    - 임시 파일로 스트리밍한 뒤 md5 확인 후 원자적으로 교체
+    Return: 'downloaded' / 'up_to_date' / 'no_remote' / 'failed'
     """
     service = get_drive_service()
-    if not service: return False
-
-    folder_id = _find_folder(service, FOLDER_NAME)
-    if not folder_id:
-        return False
+    if not service: return 'failed'
 
-    # [FIX] 고정 파일명 사용
-    file_id = _find_file_in_folder(service, folder_id, FIXED_FILENAME)
-    if not file_id:
-        return False
+    if BACKUP_MODE == 'incremental':
+        return _download_replica(service, force)
 
-    # 다운로드 실행
     try:
-        request = service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-        
-        with open(DB_FILE, 'wb') as f:
-            f.write(fh.getvalue())
-        
-        return True
+        folder_id = _find_folder(service, FOLDER_NAME)
+        if not folder_id:
+            return 'no_remote'
+
+        # [FIX] 고정 파일명 사용
+        file_id = _find_file_in_folder(service, folder_id, FIXED_FILENAME)
+        if not file_id:
+            return 'no_remote'
+
+        with _sync_file_lock():
+            # 락을 잡은 뒤에 확인해야 먼저 받은 다른 프로세스의 결과(메타 파일)를 반영할 수 있음
+            remote = service.files().get(fileId=file_id, fields=REMOTE_META_FIELDS, supportsAllDrives=True).execute()
+            if not force and os.path.exists(DB_FILE) and _is_same_version(remote, _load_sync_meta()):
+                return 'up_to_date'
+
+            # 다운로드 실행
+            tmp_path = _download_to_temp(service, file_id, remote.get('md5Checksum'))
+            _swap_in_db(tmp_path)
+            _save_sync_meta(remote)
+        return 'downloaded'
     except Exception as e:
+        if retry_stale and _drop_stale_ids(e):
+            return download_db_from_drive(force, retry_stale=False)
         print(f"Download Error: {e}")
-        return False
+        return 'failed'
+
+_sync_lock = threading.Lock()
+_sync_result = None
+
+def sync_db_once():
+    """
+    [시작 시 동기화] 프로세스당 1회만 download_db_from_drive() 실행
+    - 새 브라우저 세션은 첫 결과를 그대로 받음 (다른 학생이 쓰는 중인 DB를 다시 덮어쓰지 않음)
+    - 첫 동기화가 끝날 때까지 다른 세션은 대기
+    """
+    global _sync_result
+    with _sync_lock:
+        if _sync_result is None:
+            _sync_result = download_db_from_drive()
+        return _sync_result
 
 def upload_db_to_drive():
     """
     [백업] 로컬 DB를 구글 드라이브로 업로드 (단일 파일 덮어쓰기)
+    - 소요 시간과 성공/실패 횟수를 운영 지표(metrics)에 기록
+    """
+    t0 = time.perf_counter()
+    with _upload_lock: # 백그라운드 업로드와 수동 백업이 동시에 같은 파일을 올리지 않도록
+        result = _upload_db_to_drive()
+    metrics.DRIVE_UPLOAD_SECONDS.observe(time.perf_counter() - t0)
+    ok = result[0] if isinstance(result, tuple) else bool(result)
+    metrics.DRIVE_UPLOADS.inc(status="success" if ok else "failure")
+    return result
+
+def _upload_db_to_drive(retry_stale=True):
+    """
+    Return: (성공 여부, 메시지)
+    - 업로드 스레드에서도 실행되므로 st.error 대신 메시지를 돌려줌 (get_upload_status()['last_error'] 로 표시)
     """
     if not os.path.exists(DB_FILE):
-        return False
+        return False, f"로컬 DB 파일({DB_FILE})이 없습니다."
+
+    if BACKUP_MODE == 'incremental':
+        return _replicate_to_drive()
 
     service = get_drive_service()
-    if not service: return False
+    if not service: return False, _drive_error_message()
 
     try:
         # 1. 백업 폴더 확인
@@ -178,23 +624,28 @@ def upload_db_to_drive():
             try:
                 folder_id = _create_folder(service, FOLDER_NAME)
             except:
-                st.error(f"구글 드라이브에 '{FOLDER_NAME}' 폴더를 찾을 수 없습니다. 직접 생성해주세요.")
-                return False
+                return False, f"구글 드라이브에 '{FOLDER_NAME}' 폴더를 찾을 수 없습니다. 직접 생성해주세요."
 
         # 2. 기존 파일 확인
         file_id = _find_file_in_folder(service, folder_id, FIXED_FILENAME)
 
+        # WAL 모드: 아직 본 파일에 반영되지 않은 변경분을 먼저 체크포인트
+        db.checkpoint_db()
+
         media = MediaFileUpload(DB_FILE, mimetype='application/x-sqlite3', resumable=True)
 
         if file_id:
             # [CASE 1] 파일이 있으면 -> 업데이트 (OK)
             updated_metadata = {'name': FIXED_FILENAME, 'mimeType': 'application/x-sqlite3'}
-            service.files().update(
+            remote = service.files().update(
                 fileId=file_id, 
                 body=updated_metadata, 
                 media_body=media,
+                fields=REMOTE_META_FIELDS,
                 supportsAllDrives=True
             ).execute()
+            _save_sync_meta(remote) # 다음 시작 때 방금 올린 파일을 다시 받지 않도록
+            metrics.DRIVE_UPLOAD_BYTES.inc(int(remote.get('size') or 0), kind='full')
             return True, f"백업 업데이트 완료 ({FIXED_FILENAME})"
         else:
             # [CASE 2] 파일이 없으면 -> 생성 시도 (하지만 개인 계정 공유 시 403 에러 발생 가능)
@@ -203,24 +654,240 @@ def upload_db_to_drive():
                     'name': FIXED_FILENAME,
                     'parents': [folder_id]
                 }
-                service.files().create(
+                remote = service.files().create(
                     body=file_metadata, 
                     media_body=media, 
-                    fields='id',
+                    fields=REMOTE_META_FIELDS,
                     supportsAllDrives=True
                 ).execute()
+                _remember_id(folder_id, FIXED_FILENAME, remote.get('id'))
+                _save_sync_meta(remote)
+                metrics.DRIVE_UPLOAD_BYTES.inc(int(remote.get('size') or 0), kind='full')
                 return True, f"새 백업 파일 생성 완료 ({FIXED_FILENAME})"
             except Exception as e:
+                if _is_not_found(e):
+                    raise # 캐시한 폴더가 사라진 경우 -> 아래에서 ID 를 다시 찾아 재시도
                 err_str = str(e)
                 if "storageQuotaExceeded" in err_str or "403" in err_str:
-                    st.error(f"⚠️ 업로드 권한 오류: '{FOLDER_NAME}' 폴더 안에 '{FIXED_FILENAME}' 이름의 빈 파일을 직접 만들고 봇에게 편집 권한을 주세요.")
-                    return False
+                    return False, f"⚠️ 업로드 권한 오류: '{FOLDER_NAME}' 폴더 안에 '{FIXED_FILENAME}' 이름의 빈 파일을 직접 만들고 봇에게 편집 권한을 주세요."
                 print(f"Upload Create Error: {e}")
-                return False
+                return False, f"업로드 실패: {e}"
                 
     except Exception as e:
+        if retry_stale and _drop_stale_ids(e):
+            return _upload_db_to_drive(retry_stale=False)
         print(f"Upload Error: {e}")
-        return False
+        return False, f"업로드 실패: {e}"
+
+_upload_lock = threading.Lock()
+
+class BackgroundUploader:
+    """
+    프로세스 전역 백그라운드 업로드 스레드 (Debounce)
+    - request()는 dirty 표시만 하고 즉시 반환 -> 학생/관리자 화면은 업로드를 기다리지 않음
+    - 마지막 요청 후 UPLOAD_DEBOUNCE_SEC 동안 조용하면 1회 업로드 (연속 요청은 하나로 합침)
+    - 요청이 끊이지 않아도 첫 요청 후 UPLOAD_MAX_DELAY_SEC 안에는 업로드
+    - 실패 시 UPLOAD_MAX_RETRIES 회까지 지수 백오프로 재시도, 업로드 중 들어온 요청은 다음 회차로
+    - 재시도까지 모두 실패하면 대기 상태로 되돌리고 UPLOAD_FAILURE_RETRY_SEC 뒤에 다시 시도 (변경분 유실 방지)
+    """
+    def __init__(self, upload_fn, debounce=UPLOAD_DEBOUNCE_SEC, max_delay=UPLOAD_MAX_DELAY_SEC,
+                 max_retries=UPLOAD_MAX_RETRIES, backoff=UPLOAD_RETRY_BACKOFF_SEC,
+                 failure_retry=UPLOAD_FAILURE_RETRY_SEC):
+        self.upload_fn = upload_fn
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failure_retry = failure_retry
+        self._cond = threading.Condition()
+        self._thread = None
+        self._dirty = False
+        self._first_request = None   # 이번 회차 첫 요청 시각 (monotonic)
+        self._last_request = None    # 이번 회차 마지막 요청 시각 (monotonic)
+        self._flush = False          # True: 디바운스 없이 바로 업로드
+        self._retry_at = 0.0         # 실패 후 이 시각(monotonic) 전에는 다시 업로드하지 않음
+        self._active = 0             # 진행 중인 업로드 수 (백그라운드 + upload_now)
+        # 상태
+        self.requests = 0
+        self.uploads = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_request_at = None  # datetime
+        self.last_success_at = None  # datetime
+        self.last_error = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="drive-uploader", daemon=True)
+            self._thread.start()
+
+    def request(self):
+        """업로드 요청 (즉시 반환)"""
+        with self._cond:
+            now = time.monotonic()
+            if not self._dirty:
+                self._first_request = now
+            self._dirty = True
+            self._last_request = now
+            self.requests += 1
+            self.last_request_at = datetime.now()
+            self._start()
+            self._cond.notify()
+
+    def flush(self, timeout=None):
+        """대기 중인 업로드를 디바운스 없이 바로 실행하고 끝날 때까지 대기 -> 남은 요청이 없으면 True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if not self._dirty and not self._active:
+                return True
+            self._flush = True
+            self._start()
+            self._cond.notify_all()
+            while self._dirty or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def upload_now(self):
+        """
+        대기 중인 요청을 흡수해 지금 바로 1회 업로드 (호출 스레드에서 실행) -> upload_fn 결과
+        - 화면 스레드가 재시도 대기(백오프)로 멈추지 않도록 재시도는 하지 않음
+        - 실패하면 대기 상태로 되돌려 백그라운드 스레드가 백오프 재시도를 이어받음
+        """
+        with self._cond:
+            self._dirty = False
+            self._flush = False
+            self._active += 1
+        try:
+            result = self._upload_with_retry(max_retries=0)
+            if not self._succeeded(result):
+                self._requeue(0)
+            return result
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def _due_in(self):
+        """업로드까지 남은 시간 (초, 0 이하면 지금)"""
+        if self._flush:
+            return 0
+        now = time.monotonic()
+        due = min(self._last_request + self.debounce, self._first_request + self.max_delay)
+        return max(due, self._retry_at) - now
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._dirty: # upload_now()가 먼저 처리한 경우 포함
+                        self._cond.wait()
+                        continue
+                    wait = self._due_in()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                # 이 시점 이후의 요청은 다음 회차 (업로드 도중 바뀐 내용도 빠짐없이 올라가도록)
+                self._dirty = False
+                self._flush = False
+                self._active += 1
+            try:
+                if not self._succeeded(self._upload_with_retry()):
+                    self._requeue(self.failure_retry)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _succeeded(result):
+        return result[0] if isinstance(result, tuple) else bool(result)
+
+    def _requeue(self, delay):
+        """업로드 실패 -> 변경분을 다시 대기 상태로 (delay 초 뒤 백그라운드 스레드가 재시도)"""
+        with self._cond:
+            now = time.monotonic()
+            if not self._dirty: # 업로드 중 들어온 요청이 있으면 그 일정 유지
+                self._dirty = True
+                self._first_request = now
+                self._last_request = now
+            self._retry_at = now + delay
+            self._start()
+            self._cond.notify_all()
+
+    def _upload_with_retry(self, max_retries=None):
+        if max_retries is None:
+            max_retries = self.max_retries
+        result = False
+        for attempt in range(max_retries + 1):
+            try:
+                result = self.upload_fn()
+                ok = self._succeeded(result)
+                error = None if ok else (result[1] if isinstance(result, tuple) else "업로드 실패")
+            except Exception as e:
+                ok, error = False, str(e)
+            if ok:
+                with self._cond:
+                    self.uploads += 1
+                    self.consecutive_failures = 0
+                    self.last_success_at = datetime.now()
+                    self.last_error = None
+                    self._retry_at = 0.0
+                return result
+            with self._cond:
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_error = error
+            if attempt < max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+        print(f"Background Upload Error: {max_retries + 1}회 시도 모두 실패 ({self.last_error})")
+        return result
+
+    def status(self):
+        with self._cond:
+            return {
+                'pending': self._dirty,
+                'uploading': self._active > 0,
+                'requests': self.requests,
+                'uploads': self.uploads,
+                'failures': self.failures,
+                'consecutive_failures': self.consecutive_failures,
+                'last_request_at': self.last_request_at,
+                'last_success_at': self.last_success_at,
+                'last_error': self.last_error,
+            }
+
+
+def _background_upload():
+    result = upload_db_to_drive()
+    if (result[0] if isinstance(result, tuple) else result):
+        _maybe_history_snapshot() # 하루 1회 이력 스냅샷 (업로드 스레드에서 실행되므로 화면은 기다리지 않음)
+    return result
+
+_uploader = BackgroundUploader(_background_upload)
+
+def schedule_upload():
+    """
+    [백업] 백그라운드 업로드 요청 (즉시 반환)
+    - 화면 처리 중에는 이 함수를 사용하고, 결과를 바로 보여줘야 하는 경우에만 upload_db_to_drive() 직접 호출
+    """
+    _uploader.request()
+
+def flush_uploads(timeout=None):
+    """대기 중인 백그라운드 업로드를 바로 실행하고 완료까지 대기"""
+    return _uploader.flush(timeout)
+
+def get_upload_status():
+    """백그라운드 업로드 상태 (대기 여부, 마지막 성공 시각, 연속 실패 수 등)"""
+    return _uploader.status()
+
+@atexit.register
+def _flush_on_exit():
+    # 서버 종료 직전 디바운스 대기 중인 변경분이 유실되지 않도록
+    if _uploader.status()['pending']:
+        _uploader.flush(UPLOAD_EXIT_FLUSH_SEC)
 
 if __name__ == "__main__":
     print("🚀 수동 백업을 시작합니다...")
@@ -269,7 +936,7 @@ if __name__ == "__main__":
         exit(1)
 
     result = upload_db_to_drive()
-    if result:
+    if result[0]:
         print(f"✅ {result[1]}")
     else:
-        print("❌ 백업 실패")
\ No newline at end of file
+        print(f"❌ 백업 실패: {result[1]}")
\ No newline at end of file
@@ -0,0 +1,331 @@
+"""
+운영 지표 레지스트리 (Prometheus 텍스트 포맷)
+
+    ANSWERS = metrics.counter("voca_answers_total", "제출된 답안 수", ["result"])
+    ANSWERS.inc(result="correct")
+
+    with metrics.histogram("voca_tts_synthesis_seconds", "gTTS 생성 시간").time():
+        ...
+
+등록된 지표는 render() 로 Prometheus 텍스트 노출 포맷(0.0.4)으로 만들 수 있고,
+start_exporters() 가 설정에 따라 두 가지 방식으로 내보낸다.
+- 텍스트 파일: node_exporter textfile collector 가 읽는 *.prom 파일을 주기적으로 원자적 교체
+- HTTP: 로컬 전용 작은 서버 스레드 (GET /metrics)
+
+지표 값은 프로세스 메모리에만 있으므로 서버가 재시작되면 0부터 다시 센다
+(Prometheus 의 rate()/increase() 가 카운터 리셋을 알아서 처리함).
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- 내보내기 설정 (None 이면 해당 방식 사용 안 함) ---
+METRICS_TEXTFILE_PATH = None        # 예: "/var/lib/node_exporter/textfile_collector/voca.prom"
+METRICS_TEXTFILE_INTERVAL = 15      # 텍스트 파일 갱신 주기 (초)
+METRICS_HTTP_HOST = "127.0.0.1"     # 외부에 노출하지 않도록 기본은 로컬 전용
+METRICS_HTTP_PORT = None            # 예: 9464
+
+# 지연시간 히스토그램 기본 구간 (초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry_lock = threading.Lock()
+_metrics = {}                       # 이름 -> 지표 (등록 순서 유지)
+_collectors = []                    # render() 때마다 호출되는 함수 -> [(이름, 타입, 설명, [(접미사, 라벨 dict, 값)])]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_family(name, mtype, help_text, samples):
+    help_text = str(help_text).replace("\\", "\\\\").replace("\n", "\\n")  # HELP 줄은 따옴표를 이스케이프하지 않음
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {mtype}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+class _Metric:
+    mtype = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}           # 라벨 값 튜플 -> 값(또는 히스토그램 상태)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 라벨은 {self.labelnames} 이어야 합니다 (받은 값: {tuple(labels)})")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+    def samples(self):
+        with self._lock:
+            return [("", self._labels(k), v) for k, v in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    """단조 증가 카운터 (*_total)"""
+    mtype = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("카운터는 감소할 수 없습니다.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """현재 값 (증감 가능)"""
+    mtype = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """구간별 누적 분포 (*_bucket / *_sum / *_count)"""
+    mtype = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][idx] += 1
+            state[1] += value
+
+    def time(self, **labels):
+        """with 블록 실행 시간(초)을 기록하는 컨텍스트 매니저"""
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1])) for k, s in self._values.items())
+        for key, (counts, total) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                out.append(("_bucket", {**labels, "le": _format_value(float(bound))}, cumulative))
+            out.append(("_sum", labels, total))
+            out.append(("_count", labels, cumulative))
+        return out
+
+
+def _register(cls, name, help_text, labelnames, **kwargs):
+    with _registry_lock:
+        existing = _metrics.get(name)
+        if existing is not None:
+            if not isinstance(existing, cls) or existing.labelnames != tuple(labelnames):
+                raise ValueError(f"지표 이름 충돌: {name}")
+            return existing  # 모듈 재로딩(Streamlit 핫 리로드) 시 같은 객체 재사용
+        metric = cls(name, help_text, labelnames, **kwargs)
+        _metrics[name] = metric
+        return metric
+
+
+def counter(name, help_text, labelnames=()):
+    return _register(Counter, name, help_text, labelnames)
+
+
+def gauge(name, help_text, labelnames=()):
+    return _register(Gauge, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+def register_collector(fn):
+    """
+    render() 때마다 호출할 함수 등록 (이미 다른 곳에 쌓이는 값을 그대로 내보낼 때)
+    fn() -> [(이름, 타입, 설명, [(접미사, 라벨 dict, 값), ...]), ...]
+    """
+    with _registry_lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+    return fn
+
+
+def render():
+    """등록된 모든 지표를 Prometheus 텍스트 노출 포맷 문자열로"""
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+    lines = []
+    for m in metrics:
+        lines.extend(_format_family(m.name, m.mtype, m.help, m.samples()))
+    for fn in collectors:
+        try:
+            for name, mtype, help_text, samples in fn():
+                lines.extend(_format_family(name, mtype, help_text, samples))
+        except Exception as e:
+            print(f"Metrics Collector Error: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path=None):
+    """
+    textfile collector 용 *.prom 파일 쓰기
+    - 임시 파일에 쓰고 os.replace 로 교체 (수집기가 반쯤 쓰인 파일을 읽지 않도록)
+    """
+    path = path or METRICS_TEXTFILE_PATH
+    if not path:
+        return False
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Metrics Textfile Error: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 스크랩 요청마다 stderr 에 찍히지 않도록
+
+
+_exporter_lock = threading.Lock()
+_exporters = {}                     # 'textfile' -> Thread, 'http' -> ThreadingHTTPServer
+
+
+def _textfile_loop(path, interval):
+    while True:
+        write_textfile(path)
+        time.sleep(interval)
+
+
+def start_exporters(textfile_path=None, http_port=None, http_host=None, interval=None):
+    """
+    설정된 내보내기 스레드 시작 (프로세스당 1회, 이미 실행 중이면 무시)
+    인자를 생략하면 모듈 상수(METRICS_*) 사용
+    """
+    textfile_path = textfile_path or METRICS_TEXTFILE_PATH
+    http_port = http_port if http_port is not None else METRICS_HTTP_PORT
+    http_host = http_host or METRICS_HTTP_HOST
+    interval = interval or METRICS_TEXTFILE_INTERVAL
+
+    with _exporter_lock:
+        if textfile_path and 'textfile' not in _exporters:
+            t = threading.Thread(target=_textfile_loop, args=(textfile_path, interval),
+                                 name="metrics-textfile", daemon=True)
+            t.start()
+            _exporters['textfile'] = t
+
+        if http_port is not None and 'http' not in _exporters:
+            try:
+                server = ThreadingHTTPServer((http_host, int(http_port)), _MetricsHandler)
+                server.daemon_threads = True
+            except OSError as e:
+                # 같은 호스트의 다른 프로세스가 이미 포트를 쓰는 경우 등
+                print(f"Metrics HTTP Error: {e}")
+            else:
+                threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+                _exporters['http'] = server
+
+    return {k: (v.server_address if k == 'http' else textfile_path) for k, v in _exporters.items()}
+
+
+def stop_http_exporter():
+    with _exporter_lock:
+        server = _exporters.pop('http', None)
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+# --- 앱 공용 지표 ---
+ANSWERS = counter("voca_answers_total", "제출된 답안 수 (result: correct / wrong / give_up)", ["result"])
+SESSIONS_STARTED = counter("voca_quiz_sessions_started_total", "시작된 퀴즈 세트 수 (kind: new / resume / forced_review)", ["kind"])
+SESSIONS_FINISHED = counter("voca_quiz_sessions_finished_total", "끝까지 푼 퀴즈 세트 수")
+DB_COMMIT_SECONDS = histogram("voca_db_commit_seconds", "그룹 커밋 1회(배치 전체) 소요 시간")
+DRIVE_UPLOAD_SECONDS = histogram("voca_drive_upload_seconds", "Google Drive DB 업로드 소요 시간",
+                                 buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+DRIVE_UPLOAD_BYTES = counter("voca_drive_upload_bytes_total", "Google Drive 로 보낸 바이트 수 (kind: full / base / increment / history)", ["kind"])
+DRIVE_UPLOADS = counter("voca_drive_uploads_total", "Google Drive DB 업로드 시도 수 (status: success / failure)", ["status"])
+TTS_CACHE = counter("voca_tts_cache_total", "TTS 캐시 조회 수 (result: hit / miss)", ["result"])
+TTS_SYNTHESIS_SECONDS = histogram("voca_tts_synthesis_seconds", "gTTS 음성 생성 소요 시간",
+                                  buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0))
+TTS_SYNTHESIS_ERRORS = counter("voca_tts_synthesis_errors_total", "gTTS 음성 생성 실패 수")
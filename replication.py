@@ -0,0 +1,365 @@
+"""
+증분 복제 (Page Shipping)
+
+기존 백업은 매번 voca.db 전체를 올리므로 비용이 DB 크기에 비례한다.
+이 모듈은 마지막으로 보낸 상태와 비교해 바뀐 페이지만 묶어 보낸다.
+
+- 일관된 사본: SQLite 백업 API로 임시 파일에 복사 (쓰기 중에도 한 시점의 스냅샷)
+- 변경 감지: 페이지별 해시(blake2b 16바이트)를 로컬 상태 파일에 보관해 비교
+- 기준본(base): 처음 / 증분이 많이 쌓였을 때 / 오래되었을 때 전체를 압축해 보냄 (세대 gen 증가)
+- 증분(inc): 바뀐 페이지 번호 + 내용, 전체 페이지 수 (zlib 압축)
+- 복구: 최신 세대의 base + 증분을 순서대로 적용 후 무결성 검사, 원자적 교체
+
+저장소는 ReplicaStore 인터페이스 뒤에 있어 로컬 디렉터리(LocalDirStore)로
+오프라인 테스트/벤치마크가 가능하고, 구글 드라이브 구현은 drive_sync.py 에 있다.
+
+    store = replication.LocalDirStore("replica")
+    replication.replicate(store)           # 세션 종료 때마다
+    replication.restore(store, "voca.db")  # 복구
+"""
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+import re
+import sqlite3
+import struct
+import time
+import zlib
+
+import database as db
+
+REPL_BASE_EVERY = 200               # 증분이 이만큼 쌓이면 새 기준본
+REPL_BASE_RATIO = 1.0               # 증분 누적 크기가 기준본의 이 배수를 넘으면 새 기준본 (복구 시간 제한)
+REPL_BASE_MAX_AGE = 7 * 24 * 3600   # 기준본이 이 시간(초)보다 오래되면 새 기준본
+REPL_KEEP_GENERATIONS = 2           # 저장소에 남길 세대 수 (최신 + 직전)
+REPL_COMPRESS_LEVEL = 6
+
+_HASH_SIZE = 16
+_INC_MAGIC = b'VPG1'
+_INC_HEADER = struct.Struct('<4sIII')  # magic, page_size, page_count, 바뀐 페이지 수
+_PAGE_NO = struct.Struct('<I')
+_NAME_RE = re.compile(r'^(base|inc)-(\d{6})(?:-(\d{6}))?\.z$')
+
+
+class ReplicaStore:
+    """복제본 저장소 인터페이스 (이름 -> bytes)"""
+    def put(self, name, data):
+        raise NotImplementedError
+
+    def get(self, name):
+        raise NotImplementedError
+
+    def list(self):
+        """저장된 이름 목록"""
+        raise NotImplementedError
+
+    def delete(self, name):
+        raise NotImplementedError
+
+
+class LocalDirStore(ReplicaStore):
+    """로컬 디렉터리 저장소 (테스트/벤치마크, NAS 마운트 등)"""
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def put(self, name, data):
+        final = os.path.join(self.path, name)
+        tmp = final + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+
+    def get(self, name):
+        with open(os.path.join(self.path, name), 'rb') as f:
+            return f.read()
+
+    def list(self):
+        return [n for n in os.listdir(self.path) if not n.endswith('.tmp')]
+
+    def delete(self, name):
+        try:
+            os.remove(os.path.join(self.path, name))
+        except FileNotFoundError:
+            pass
+
+
+def base_name(gen):
+    return f"base-{gen:06d}.z"
+
+def inc_name(gen, seq):
+    return f"inc-{gen:06d}-{seq:06d}.z"
+
+def _parse_names(names):
+    """-> {gen: {'base': bool, 'incs': [seq, ...]}}"""
+    gens = {}
+    for name in names:
+        m = _NAME_RE.match(name)
+        if not m:
+            continue
+        kind, gen = m.group(1), int(m.group(2))
+        entry = gens.setdefault(gen, {'base': False, 'incs': []})
+        if kind == 'base':
+            entry['base'] = True
+        else:
+            entry['incs'].append(int(m.group(3)))
+    return gens
+
+def latest_version(store):
+    """저장소의 최신 복구 지점 (gen, seq) - 없으면 None (seq 는 base 이후 연속된 마지막 증분)"""
+    gens = {g: e for g, e in _parse_names(store.list()).items() if e['base']}
+    if not gens:
+        return None
+    gen = max(gens)
+    seq = 0
+    incs = set(gens[gen]['incs'])
+    while seq + 1 in incs:
+        seq += 1
+    return gen, seq
+
+
+# --- 로컬 상태 (마지막으로 보낸 페이지 해시) ---
+def _state_path():
+    return db.DB_FILE + '.repl.json'
+
+def _hashes_path():
+    return db.DB_FILE + '.repl.hashes'
+
+def _hashes_digest(hashes):
+    return hashlib.blake2b(hashes, digest_size=_HASH_SIZE).hexdigest()
+
+def load_state():
+    """
+    로컬 상태 (없거나 두 파일이 서로 맞지 않으면 None -> 다음 replicate()는 새 기준본)
+    상태 파일에 해시 파일의 요약값을 함께 기록하므로, 두 파일 교체 사이에 중단되어 섞인 상태는 쓰지 않음
+    """
+    try:
+        with open(_state_path(), encoding='utf-8') as f:
+            state = json.load(f)
+        with open(_hashes_path(), 'rb') as f:
+            hashes = f.read()
+    except (OSError, ValueError):
+        return None
+    if state.pop('hashes_digest', None) != _hashes_digest(hashes):
+        return None
+    state['hashes'] = hashes
+    return state
+
+def _save_state(state):
+    """두 파일 모두 임시 파일에 fsync 후 os.replace (해시 파일 먼저, 상태 파일이 마지막 = 커밋 지점)"""
+    hashes = state['hashes']
+    meta = {k: v for k, v in state.items() if k != 'hashes'}
+    meta['hashes_digest'] = _hashes_digest(hashes)
+    for path, data in ((_hashes_path(), hashes), (_state_path(), json.dumps(meta).encode('utf-8'))):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+def reset_state():
+    """로컬 상태 삭제 -> 다음 replicate()는 새 기준본을 보냄"""
+    for path in (_state_path(), _hashes_path()):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def snapshot_file(tmp_suffix='.repl.tmp'):
+    """
+    DB의 한 시점 사본 파일 경로 (백업 API로 임시 파일에 복사: 쓰기 중에도 일관된 페이지 집합)
+    with 블록이 끝나면 삭제
+    """
+    tmp_path = db.DB_FILE + tmp_suffix
+    src = db.get_db_connection()
+    dst = sqlite3.connect(tmp_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    try:
+        yield tmp_path
+    finally:
+        os.remove(tmp_path)
+
+def snapshot_bytes(tmp_suffix='.repl.tmp'):
+    """DB의 한 시점 사본 내용 (전체를 메모리에 올림: 청크 분할 등 내용 전체가 필요할 때)"""
+    with snapshot_file(tmp_suffix) as path:
+        with open(path, 'rb') as f:
+            return f.read()
+
+def _iter_pages(f, page_size):
+    while True:
+        page = f.read(page_size)
+        if not page:
+            return
+        yield page
+
+def _page_hash(page):
+    return hashlib.blake2b(page, digest_size=_HASH_SIZE).digest()
+
+def _file_page_size(path):
+    # SQLite 헤더 16~17 바이트: 페이지 크기 (1 은 65536)
+    with open(path, 'rb') as f:
+        size = struct.unpack('>H', f.read(18)[16:18])[0]
+    return 65536 if size == 1 else size
+
+def _encode_increment(page_size, page_count, changed):
+    """changed: [(페이지 번호, 내용), ...]"""
+    parts = [_INC_HEADER.pack(_INC_MAGIC, page_size, page_count, len(changed))]
+    for pgno, page in changed:
+        parts.append(_PAGE_NO.pack(pgno))
+        parts.append(page)
+    return zlib.compress(b''.join(parts), REPL_COMPRESS_LEVEL)
+
+def _file_page_hashes(path, page_size):
+    with open(path, 'rb') as f:
+        return b''.join(_page_hash(page) for page in _iter_pages(f, page_size))
+
+def _needs_base(state, page_size, now):
+    return (state is None
+            or state.get('page_size') != page_size
+            or state['seq'] >= REPL_BASE_EVERY
+            or state['inc_bytes'] > state['base_bytes'] * REPL_BASE_RATIO
+            or now - state.get('base_at', 0) > REPL_BASE_MAX_AGE)
+
+def _prune(store, keep_gen):
+    for gen, entry in _parse_names(store.list()).items():
+        if gen <= keep_gen - REPL_KEEP_GENERATIONS:
+            if entry['base']:
+                store.delete(base_name(gen))
+            for seq in entry['incs']:
+                store.delete(inc_name(gen, seq))
+
+def replicate(store, force_base=False):
+    """
+    현재 DB를 저장소에 복제 (바뀐 페이지만, 필요하면 새 기준본)
+    Return: dict(kind='base'|'increment'|'none', name, bytes=전송 바이트, pages=보낸 페이지 수,
+                 page_count, db_bytes=DB 전체 크기, gen, seq)
+    - 사본 파일을 페이지 단위로 읽으며 이전 해시와 비교 (메모리에는 바뀐 페이지/압축 결과만)
+    - 저장소에 먼저 쓰고 성공한 뒤에 로컬 상태를 갱신하므로, 실패하면 다음 호출이 같은 변경분을 다시 보냄
+    """
+    with snapshot_file() as path:
+        page_size = _file_page_size(path)
+        db_bytes = os.path.getsize(path)
+        page_count = db_bytes // page_size
+        state = load_state()
+        now = time.time()
+        result = {'page_count': page_count, 'db_bytes': db_bytes}
+
+        if force_base or _needs_base(state, page_size, now):
+            # 다른 곳(복구 후 다른 서버 등)에서 만든 세대를 덮어쓰지 않도록 저장소의 최신 세대도 확인
+            gen = max(state['gen'] if state else 0, (latest_version(store) or (0, 0))[0]) + 1
+            comp = zlib.compressobj(REPL_COMPRESS_LEVEL)
+            parts, hashes = [], []
+            with open(path, 'rb') as f:
+                for page in _iter_pages(f, page_size):
+                    hashes.append(_page_hash(page))
+                    parts.append(comp.compress(page))
+            parts.append(comp.flush())
+            payload = b''.join(parts)
+            name = base_name(gen)
+            store.put(name, payload)
+            _save_state({'gen': gen, 'seq': 0, 'page_size': page_size, 'base_bytes': len(payload),
+                         'inc_bytes': 0, 'base_at': now, 'hashes': b''.join(hashes)})
+            _prune(store, gen)
+            result.update(kind='base', name=name, bytes=len(payload), pages=page_count, gen=gen, seq=0)
+            return result
+
+        old = state['hashes']
+        changed, hashes = [], []
+        with open(path, 'rb') as f:
+            for i, page in enumerate(_iter_pages(f, page_size)):
+                digest = _page_hash(page)
+                hashes.append(digest)
+                if digest != old[i * _HASH_SIZE:(i + 1) * _HASH_SIZE]:
+                    changed.append((i + 1, page))
+        hashes = b''.join(hashes)
+
+    if not changed and len(hashes) == len(old):
+        result.update(kind='none', name=None, bytes=0, pages=0, gen=state['gen'], seq=state['seq'])
+        return result
+
+    seq = state['seq'] + 1
+    payload = _encode_increment(page_size, page_count, changed)
+    name = inc_name(state['gen'], seq)
+    store.put(name, payload)
+    state.update(seq=seq, inc_bytes=state['inc_bytes'] + len(payload), hashes=hashes)
+    _save_state(state)
+    result.update(kind='increment', name=name, bytes=len(payload), pages=len(changed), gen=state['gen'], seq=seq)
+    return result
+
+
+def _apply_increment(f, payload):
+    raw = zlib.decompress(payload)
+    magic, page_size, page_count, n = _INC_HEADER.unpack_from(raw, 0)
+    if magic != _INC_MAGIC:
+        raise ValueError("잘못된 증분 파일입니다.")
+    off = _INC_HEADER.size
+    for _ in range(n):
+        pgno = _PAGE_NO.unpack_from(raw, off)[0]
+        off += _PAGE_NO.size
+        f.seek((pgno - 1) * page_size)
+        f.write(raw[off:off + page_size])
+        off += page_size
+    f.truncate(page_count * page_size)
+
+def restore(store, dest_path, version=None):
+    """
+    저장소의 base + 증분을 적용해 dest_path 로 복구 (임시 파일에 만든 뒤 무결성 검사 후 원자적 교체)
+    version=(gen, seq) 를 주면 그 지점까지만 적용 (기본: 최신)
+    Return: dict(gen, seq, bytes=내려받은 바이트)
+    - dest_path 가 현재 DB면 로컬 상태도 복구된 내용 기준으로 다시 만들어 이어서 증분을 보낼 수 있게 함
+    """
+    version = version or latest_version(store)
+    if version is None:
+        raise FileNotFoundError("저장소에 기준본이 없습니다.")
+    gen, seq = version
+
+    live = os.path.abspath(dest_path) == os.path.abspath(db.DB_FILE)
+    tmp_path = dest_path + '.restore'
+    try:
+        payload = store.get(base_name(gen))
+        base_bytes = fetched = len(payload)
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.decompress(payload))
+        with open(tmp_path, 'r+b') as f:
+            for s in range(1, seq + 1):
+                payload = store.get(inc_name(gen, s))
+                fetched += len(payload)
+                _apply_increment(f, payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            check = conn.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            conn.close()
+        if check != 'ok':
+            raise ValueError(f"복구한 DB 무결성 검사 실패: {check}")
+
+        if live:
+            page_size = _file_page_size(tmp_path)
+            hashes = _file_page_hashes(tmp_path, page_size)
+            db.replace_db_file(tmp_path) # 쓰기 스레드/연결 정리 후 교체
+        else:
+            os.replace(tmp_path, dest_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if live:
+        _save_state({'gen': gen, 'seq': seq, 'page_size': page_size, 'base_bytes': base_bytes,
+                     'inc_bytes': fetched - base_bytes, 'base_at': time.time(), 'hashes': hashes})
+    return {'gen': gen, 'seq': seq, 'bytes': fetched}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 모듈이 저장소 루트에 평평하게 있으므로 루트를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,132 @@
+"""chunkstore: 청크 공유 / 복구 해시 / 손상 검출 / 정리 / 경계 일관성 (LocalDirStore 사용)"""
+import hashlib
+import os
+import sqlite3
+import zlib
+
+import numpy as np
+import pytest
+
+import chunkstore
+import replication
+
+ROWS = 500
+BLOB_BYTES = 3000
+
+
+def _blob(rng):
+    return rng.bytes(BLOB_BYTES)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """임의 BLOB 행으로 채운 약 2MB SQLite 파일"""
+    path = str(tmp_path / "src.db")
+    rng = np.random.default_rng(7)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, body BLOB)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, _blob(rng)) for i in range(ROWS)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return replication.LocalDirStore(str(tmp_path / "history"))
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _touch_rows(path, ids, seed):
+    """같은 크기 BLOB 으로 덮어써 몇 페이지만 바뀌도록"""
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path)
+    conn.executemany("UPDATE t SET body = ? WHERE id = ?", [(_blob(rng), i) for i in ids])
+    conn.commit()
+    conn.close()
+    return _read(path)
+
+
+def _chunk_names(store, name):
+    return {chunkstore.chunk_name(d) for d, _ in chunkstore._load_manifest(store, name)['chunks']}
+
+
+def test_snapshots_share_unchanged_chunks(db_path, store):
+    first = chunkstore.backup_snapshot(store, data=_read(db_path))
+    second = chunkstore.backup_snapshot(store, data=_touch_rows(db_path, [10, 250, 490], seed=1))
+
+    assert first['chunks'] >= 30
+    assert first['new_chunks'] == first['chunks']
+    # 헤더 페이지 + 바뀐 3개 페이지가 걸친 청크만 새로 올라감
+    assert second['new_chunks'] <= 8
+    shared = _chunk_names(store, first['name']) & _chunk_names(store, second['name'])
+    assert len(shared) >= second['chunks'] - second['new_chunks']
+    assert second['uploaded_bytes'] < first['uploaded_bytes'] / 4
+
+
+def test_restore_matches_original_hash(db_path, store, tmp_path):
+    data = _read(db_path)
+    res = chunkstore.backup_snapshot(store, data=data)
+    dest = str(tmp_path / "restored.db")
+
+    out = chunkstore.restore_snapshot(store, res['name'], dest, workers=2)
+
+    assert out['db_bytes'] == len(data)
+    assert hashlib.sha256(_read(dest)).hexdigest() == hashlib.sha256(data).hexdigest()
+    assert not os.path.exists(dest + '.restore')
+
+
+def test_corrupted_chunk_is_rejected(db_path, store, tmp_path):
+    res = chunkstore.backup_snapshot(store, data=_read(db_path))
+    digest, size = chunkstore._load_manifest(store, res['name'])['chunks'][3]
+    chunk = bytearray(zlib.decompress(store.get(chunkstore.chunk_name(digest))))
+    chunk[size // 2] ^= 0xFF
+    store.put(chunkstore.chunk_name(digest), zlib.compress(bytes(chunk)))
+
+    with pytest.raises(ValueError):
+        chunkstore._fetch_chunk(store, digest, size)
+
+    dest = str(tmp_path / "restored.db")
+    with pytest.raises(ValueError):
+        chunkstore.restore_snapshot(store, res['name'], dest)
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + '.restore')
+
+
+def test_prune_keeps_chunks_of_kept_manifests(db_path, store, tmp_path):
+    names = [chunkstore.backup_snapshot(store, data=_read(db_path))['name']]
+    for seed, ids in ((1, [20, 300]), (2, [40, 410])):
+        names.append(chunkstore.backup_snapshot(store, data=_touch_rows(db_path, ids, seed))['name'])
+    kept = set().union(*(_chunk_names(store, n) for n in names[1:]))
+    before = {n for n in store.list() if n.startswith('chunk-')}
+
+    dropped, orphans = chunkstore.prune_snapshots(store, keep=2)
+
+    after = {n for n in store.list() if n.startswith('chunk-')}
+    assert dropped == 1
+    assert after == kept
+    assert orphans == len(before - kept) > 0
+    assert [s['name'] for s in chunkstore.list_snapshots(store)] == sorted(names[1:], reverse=True)
+    for n in names[1:]: # 남은 스냅샷은 모두 복구 가능
+        chunkstore.restore_snapshot(store, n, str(tmp_path / f"{n}.db"))
+
+
+def test_boundaries_do_not_depend_on_scan_block(monkeypatch):
+    data = np.random.default_rng(3).bytes(600_000)
+    whole = chunkstore.chunk_boundaries(data)
+    candidates = chunkstore._boundary_candidates(data).tolist()
+
+    # 블록 경계가 창(CHUNK_WINDOW) 중간에 걸치도록 홀수 크기 블록으로 나눠도 결과가 같아야 함
+    for block in (4099, 65_537, chunkstore.CHUNK_WINDOW + 1):
+        monkeypatch.setattr(chunkstore, 'CHUNK_SCAN_BLOCK', block)
+        assert chunkstore._boundary_candidates(data).tolist() == candidates
+        assert chunkstore.chunk_boundaries(data) == whole
+
+    assert whole[-1] == len(data)
+    sizes = np.diff([0] + whole)
+    assert sizes[:-1].min() >= chunkstore.CHUNK_MIN
+    assert sizes.max() <= chunkstore.CHUNK_MAX
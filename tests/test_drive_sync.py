@@ -0,0 +1,119 @@
+"""drive_sync: 스레드별 클라이언트 캐시 / 폴더·파일 ID 캐시 / 404 시 ID 재조회 / reset_drive_cache (가짜 드라이브 주입)"""
+import threading
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("oauth2client")
+
+import database as db
+import drive_sync
+from benchmark import _FakeDrive
+
+
+@pytest.fixture
+def drive(tmp_path, monkeypatch):
+    """임시 DB + 가짜 드라이브 주입 -> (fake, 클라이언트를 만든 스레드 ID 목록)"""
+    path = str(tmp_path / "voca.db")
+    monkeypatch.setattr(db, 'DB_FILE', path)
+    monkeypatch.setattr(drive_sync, 'DB_FILE', path)
+    monkeypatch.setattr(drive_sync, 'SYNC_META_FILE', path + '.sync.json')
+    monkeypatch.setattr(drive_sync, 'BACKUP_MODE', 'full')
+    db.close_all_connections()
+    db.init_db()
+
+    fake = _FakeDrive()
+    built = []
+
+    def factory():
+        built.append(threading.get_ident())
+        return fake
+
+    drive_sync.set_drive_service_factory(factory)
+    yield fake, built
+    drive_sync.set_drive_service_factory(None)
+    db.close_all_connections()
+
+
+def _upload():
+    ok, msg = drive_sync.upload_db_to_drive()
+    assert ok, msg
+
+
+def _in_thread(fn):
+    out = []
+    t = threading.Thread(target=lambda: out.append(fn()))
+    t.start()
+    t.join()
+    return out[0]
+
+
+def test_client_built_once_per_thread(drive):
+    fake, built = drive
+    for _ in range(3):
+        _upload()
+    assert built == [threading.get_ident()]
+
+    def twice():
+        return drive_sync.get_drive_service(), drive_sync.get_drive_service()
+
+    for _ in range(2):
+        assert _in_thread(twice) == (fake, fake)
+    assert len(built) == 3
+    assert len(set(built)) == 3 # 스레드마다 1개씩 (httplib2 는 스레드 간 공유 불가)
+
+
+def test_folder_and_file_ids_resolved_once(drive):
+    fake, _ = drive
+    for _ in range(4):
+        _upload()
+    # 첫 업로드: 폴더/파일 조회 1회씩 + 생성, 이후에는 캐시한 ID 로 바로 update
+    assert fake.calls['list'] == 2
+    assert fake.calls['create'] == 2
+    assert fake.calls['update'] == 3
+
+
+def test_stale_ids_dropped_on_404(drive):
+    fake, _ = drive
+    _upload()
+    assert drive_sync._cached_id(None, drive_sync.FOLDER_NAME)
+
+    assert not drive_sync._drop_stale_ids(RuntimeError("timeout")) # 404 가 아니면 유지
+    assert drive_sync._cached_id(None, drive_sync.FOLDER_NAME)
+    assert drive_sync._drop_stale_ids(fake._not_found("fake1"))
+    assert drive_sync._cached_id(None, drive_sync.FOLDER_NAME) is None
+
+    lists = fake.calls['list']
+    _upload()
+    assert fake.calls['list'] == lists + 2 # 폴더 + 파일 다시 조회
+    assert fake.calls['create'] == 2
+
+
+def test_upload_after_remote_delete_looks_up_again(drive):
+    fake, _ = drive
+    _upload()
+    fake.remove(drive_sync.FIXED_FILENAME)
+    before = dict(fake.calls)
+
+    _upload() # 캐시한 파일 ID 로 update -> 404 -> ID 캐시 비우고 다시 찾아 새로 생성
+
+    assert fake.calls['update'] == before['update'] + 1
+    assert fake.calls['list'] == before['list'] + 2
+    assert fake.calls['create'] == before['create'] + 1
+    folder_id = drive_sync._cached_id(None, drive_sync.FOLDER_NAME)
+    assert drive_sync._cached_id(folder_id, drive_sync.FIXED_FILENAME) in fake.items
+
+
+def test_reset_drive_cache_forces_rebuild(drive):
+    fake, built = drive
+    _upload()
+    drive_sync.get_drive_service()
+    assert len(built) == 1
+
+    drive_sync.reset_drive_cache()
+
+    assert drive_sync._cached_id(None, drive_sync.FOLDER_NAME) is None
+    lists = fake.calls['list']
+    _upload()
+    assert len(built) == 2
+    assert fake.calls['list'] == lists + 2
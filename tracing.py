@@ -0,0 +1,230 @@
+"""
+리런(rerun) 단위 구간 추적 (Span Tracing)
+
+Streamlit 은 버튼 하나만 눌러도 페이지 함수를 처음부터 다시 실행한다.
+한 번의 리런 안에서 CSS/JS 주입, 사용자 정보 조회, 퀴즈 세트 구성, TTS,
+정규식 마스킹 등이 차례로 실행되는데, 이 중 어느 구간이 느린지 보기 위해
+구간(span)별 소요 시간을 기록한다.
+
+    with tracing.rerun("quiz"):          # 리런 1회 = JSONL 한 줄
+        with tracing.span("css"):        # 구간 측정 (중첩 가능)
+            ...
+
+    @tracing.traced()                    # 함수 전체를 구간으로 측정
+    def text_to_speech(...): ...
+
+추적이 꺼져 있으면(기본값) span/traced 는 전역 플래그 하나만 확인하고
+곧바로 원래 코드를 실행하므로 오버헤드는 무시할 수준이다.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+TRACING_ENABLED = False             # 기본값: 꺼짐 (관리자 화면에서 켜고 끌 수 있음)
+TRACE_FILE = "rerun_trace.jsonl"    # 리런 1회당 한 줄씩 기록
+TRACE_FILE_MAX_BYTES = 5 * 1024 * 1024  # 이 크기를 넘으면 .1 로 밀어내고 새로 시작
+TRACE_TOTAL_NAME = "(rerun total)"  # 통계 표에서 리런 전체 시간을 나타내는 이름
+
+_enabled = TRACING_ENABLED
+_local = threading.local()          # 스레드(세션)별 진행 중인 리런
+_write_lock = threading.Lock()
+
+
+def set_enabled(flag):
+    """추적 켜기/끄기 (프로세스 전체)"""
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    return _enabled
+
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때 돌려주는 공용 컨텍스트 매니저 (아무것도 하지 않음)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Trace:
+    """리런 1회 분량의 구간 기록"""
+    __slots__ = ("page", "started", "t0", "depth", "spans")
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.depth = 0
+        self.spans = []
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.trace.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        trace = self.trace
+        trace.depth -= 1
+        trace.spans.append({
+            "name": self.name,
+            "start_ms": round((self.start - trace.t0) * 1000, 3),
+            "ms": round((end - self.start) * 1000, 3),
+            "depth": trace.depth,
+        })
+        return False
+
+
+def span(name):
+    """구간 측정 컨텍스트 매니저 (추적이 꺼져 있거나 진행 중인 리런이 없으면 no-op)"""
+    if not _enabled:
+        return _NOOP
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name)
+
+
+def traced(name=None):
+    """함수 호출 전체를 하나의 구간으로 측정하는 데코레이터 (기본 이름: 함수 이름)"""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _Rerun:
+    __slots__ = ("trace",)
+
+    def __init__(self, page):
+        self.trace = _Trace(page)
+
+    def __enter__(self):
+        _local.trace = self.trace
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self.trace
+        _local.trace = None
+        total_ms = (time.perf_counter() - trace.t0) * 1000
+        # st.rerun()/st.stop() 은 예외로 리런을 끊으므로, 중단된 리런도 그대로 기록
+        record = {
+            "ts": round(trace.started, 3),
+            "page": trace.page,
+            "total_ms": round(total_ms, 3),
+            "aborted": exc_type is not None,
+            "spans": sorted(trace.spans, key=lambda s: s["start_ms"]),
+        }
+        _append(record)
+        return False
+
+
+def rerun(page):
+    """리런 1회를 감싸는 컨텍스트 매니저. 종료 시 TRACE_FILE 에 한 줄 기록"""
+    if not _enabled:
+        return _NOOP
+    return _Rerun(page)
+
+
+def _append(record):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    try:
+        with _write_lock:
+            try:
+                if os.path.getsize(TRACE_FILE) > TRACE_FILE_MAX_BYTES:
+                    os.replace(TRACE_FILE, TRACE_FILE + ".1")
+            except OSError:
+                pass
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+    except Exception as e:
+        print(f"Trace Write Error: {e}")
+
+
+def load_traces(last_n=200, page=None):
+    """최근 리런 기록 last_n 개 (오래된 것 → 최신 순)"""
+    records = []
+    for path in (TRACE_FILE + ".1", TRACE_FILE):
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # 기록 도중 끊긴 줄
+                    if page is None or rec.get("page") == page:
+                        records.append(rec)
+        except Exception as e:
+            print(f"Trace Read Error: {e}")
+    return records[-last_n:] if last_n else records
+
+
+def load_stage_stats(last_n=200, page=None):
+    """
+    최근 리런 last_n 개의 구간별 통계 DataFrame
+    (stage, calls, reruns, p50_ms, p95_ms, mean_ms, max_ms) — p95 내림차순.
+    한 리런에서 같은 구간이 여러 번 실행되면 리런 단위로 합산한다.
+    """
+    columns = ["stage", "calls", "reruns", "p50_ms", "p95_ms", "mean_ms", "max_ms"]
+    records = load_traces(last_n, page)
+    if not records:
+        return pd.DataFrame(columns=columns)
+
+    rows = []
+    for i, rec in enumerate(records):
+        rows.append((i, TRACE_TOTAL_NAME, rec.get("total_ms", 0.0)))
+        for s in rec.get("spans", []):
+            rows.append((i, s["name"], s["ms"]))
+    df = pd.DataFrame(rows, columns=["rerun", "stage", "ms"])
+    calls = df.groupby("stage").size()
+    per_rerun = df.groupby(["stage", "rerun"])["ms"].sum().groupby(level="stage")
+
+    stats = pd.DataFrame({
+        "calls": calls,
+        "reruns": per_rerun.size(),
+        "p50_ms": per_rerun.quantile(0.5),
+        "p95_ms": per_rerun.quantile(0.95),
+        "mean_ms": per_rerun.mean(),
+        "max_ms": per_rerun.max(),
+    }).reset_index().rename(columns={"index": "stage"})
+    stats[["p50_ms", "p95_ms", "mean_ms", "max_ms"]] = stats[["p50_ms", "p95_ms", "mean_ms", "max_ms"]].round(2)
+    return stats.sort_values("p95_ms", ascending=False)[columns].reset_index(drop=True)
+
+
+def clear_traces():
+    """기록 파일 삭제"""
+    with _write_lock:
+        for path in (TRACE_FILE, TRACE_FILE + ".1"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
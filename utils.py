@@ -1,17 +1,20 @@
 import pandas as pd
+import numpy as np
 import hashlib
 import os
 import time
 from datetime import datetime, timedelta
 import pytz
-import streamlit as st
 import streamlit.components.v1 as components
 from gtts import gTTS
 import io
 import re
 import random
 import calendar
+import openpyxl
 import database as db
+import metrics
+import tracing
 
 # --- 2. 기본 상수 설정 ---
 LEVEL_UP_INTERVAL_DAYS = 7
@@ -26,17 +29,13 @@ SRS_STEPS_DAYS = [1, 3, 7, 14, 60, 120]
 
 
 # --- [NEW] 시스템 설정 관리 (Config) ---
-@st.cache_data(ttl=60)
 def get_system_config():
-    """시스템 설정 가져오기 (SQLite)"""
+    """시스템 설정 가져오기 (SQLite, config 버전 키 캐시)"""
     return db.get_system_config()
 
 def update_system_config(key, new_value):
     """설정값 업데이트 (SQLite)"""
-    if db.update_system_config(key, new_value):
-        st.cache_data.clear() # 캐시 초기화
-        return True
-    return False
+    return db.update_system_config(key, new_value) # config 버전 트리거가 캐시 무효화
 
 # --- 4. 보안 및 시간 함수 ---
 def make_hashes(password):
@@ -61,15 +60,22 @@ def _add_months(date_obj, months: int):
     return datetime(y, m, d).date()
 
 # --- 5. 데이터 로딩 ---
-@st.cache_data(ttl=60, show_spinner=False)
 def load_data():
-    """voca_db 로딩 (SQLite)"""
+    """voca_db 로딩 (SQLite) - 프로세스 공용 스토어의 DataFrame (복사 없음, 읽기 전용으로 사용)"""
     return db.load_all_vocab()
 
+def get_vocab_store():
+    """단어장 스토어 (id→행 인덱스, 레벨별 버킷 포함)"""
+    return db.get_vocab_store()
+
 def load_user_progress(username):
     """사용자의 학습 진도 로드 (SQLite)"""
     return db.load_user_progress(username)
 
+def get_dashboard_counts(username, today):
+    """(전체 학습 단어, 장기 기억, 오늘 복습 대상) 수 (SQLite)"""
+    return db.get_dashboard_counts(username, today)
+
 def save_progress(username, progress_df):
     """진도 저장 (SQLite)"""
     return db.save_user_progress(username, progress_df)
@@ -109,11 +115,58 @@ def update_word_stats(word_id, is_correct):
         print(f"Stats Update Error: {e}")
         return False
 
+def record_answer(username, word_id, is_correct, log_row=None, progress_df=None,
+                  wrongs_add=(), wrongs_remove=(), session_remove=()):
+    """
+    한 문제의 결과를 한 번에 저장 (SQLite 단일 트랜잭션)
+    - log_row: 학습 로그 make_log_row() 결과 [ts, word_id, username, level, is_correct] (주면 단어 통계도 함께 반영)
+    - progress_df: 주면 해당 word_id 행을 진도표에 저장하고 변경 표시(is_dirty) 해제
+    - wrongs_add / wrongs_remove / session_remove: 오답 노트 / 진행 중 세션 목록 변경
+    """
+    try:
+        word_id = int(word_id)
+        answer = {
+            'word_id': word_id,
+            'log': log_row,
+            'stats': (1, 0 if is_correct else 1) if log_row else None,
+            'wrongs_add': [int(x) for x in wrongs_add],
+            'wrongs_remove': [int(x) for x in wrongs_remove],
+            'session_remove': [int(x) for x in session_remove],
+            'progress': None,
+        }
+
+        mask = None
+        if progress_df is not None and 'word_id' in progress_df.columns:
+            mask = progress_df['word_id'] == word_id
+            if mask.any():
+                row = progress_df[mask].iloc[0]
+                answer['progress'] = (row.get('last_reviewed'), row.get('next_review'),
+                                      int(row.get('interval', 0)), int(row.get('fail_count', 0)))
+
+        ok = db.record_answer(username, answer)
+        if ok and answer['progress'] is not None and 'is_dirty' in progress_df.columns:
+            progress_df.loc[mask, 'is_dirty'] = False
+        return ok
+    except Exception as e:
+        print(f"Record Answer Error: {e}")
+        return False
+
+def wait_for_pending_answers(timeout=5.0):
+    """Write-Behind로 대기 중인 답안이 DB에 반영될 때까지 대기"""
+    return db.wait_for_pending_answers(timeout)
+
+def make_log_row(word_id, username, level, is_correct, today=None):
+    """
+    학습 로그 1행 [ts(epoch 초), word_id, username, level, is_correct]
+    학습일은 ts에서 계산됨 (KST) -> today가 실제 오늘과 다르면(내일 모드) 같은 시각의 해당 날짜로 기록
+    """
+    ts = int(time.time())
+    if today is not None:
+        ts += (today - get_korea_today()).days * 86400
+    return [ts, int(word_id), username, int(level), 1 if is_correct else 0]
+
 def log_study_result(username, word_id, level, is_correct):
-    today = get_korea_today()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    row = [timestamp, str(today), int(word_id), username, int(level), 1 if is_correct else 0]
-    db.batch_log_study_results([row])
+    db.batch_log_study_results([make_log_row(word_id, username, level, is_correct)])
 
 
 def batch_log_study_results(rows):
@@ -121,13 +174,65 @@ def batch_log_study_results(rows):
     return db.batch_log_study_results(rows)
 
 
-def load_study_log(username):
-    """사용자 학습 로그 로드 (SQLite)"""
-    return db.load_study_log(username)
+def load_study_log(username, include_archive=False):
+    """사용자 학습 로그 로드 (SQLite, include_archive=True: 보관 로그 포함)"""
+    return db.load_study_log(username, include_archive)
+
+def get_recent_level_result(username, level):
+    """현재 레벨 최근 50문제의 (답안 수, 정답 수) (SQLite 롤링 카운터)"""
+    return db.get_level_window(username, level)
+
+def get_all_study_logs(include_archive=False):
+    """모든 학습 로그 로드 (관리자용 - SQLite, include_archive=True: 보관 로그 포함 전체 기록)"""
+    return db.get_all_study_logs(include_archive)
+
+def archive_study_log(horizon_days=db.LOG_ARCHIVE_HORIZON_DAYS):
+    """학습일이 horizon_days보다 오래된 로그를 월별 보관 파일로 이동 (반환: 이동한 행 수)"""
+    return db.archive_study_log(horizon_days, today=get_korea_today())
+
+def get_log_archive_summary():
+    """월별 보관 파일 현황 (month, rows, size_kb)"""
+    return db.get_log_archive_summary()
+
+# --- DB 성능 지표 (관리자용) ---
+def get_query_stats():
+    """SQL별 호출 수 / 반환 행 수 / 지연시간(p50, p95, max)"""
+    return db.get_query_stats()
 
-def get_all_study_logs():
-    """모든 학습 로그 로드 (관리자용 - SQLite)"""
-    return db.get_all_study_logs()
+def get_query_histogram(name):
+    """함수 이름별 쿼리 지연시간 히스토그램"""
+    return db.get_query_histogram(name)
+
+def reset_query_stats():
+    db.reset_query_stats()
+
+def read_slow_query_log(limit=50):
+    """느린 쿼리 로그 최근 기록 (최신순)"""
+    return db.read_slow_query_log(limit)
+
+def get_writer_stats():
+    """그룹 커밋 쓰기 스레드 지표"""
+    return db.get_writer_stats()
+
+def get_activity_ranking(limit=5):
+    """풀이 수 상위 학생 + 학습 기록 보유 학생 수 (일별 집계 테이블)"""
+    return db.get_activity_ranking(limit)
+
+def get_period_counts(today):
+    """학생별 오늘/7일/30일/누적 풀이 수 (일별 집계 테이블)"""
+    return db.get_period_counts(today)
+
+def get_daily_counts(username, start, end):
+    """학생 1명의 기간 내 일별 풀이 수 (일별 집계 테이블)"""
+    return db.get_daily_counts(username, start, end)
+
+def get_analytics_snapshot_age():
+    """관리자 통계 스냅샷 경과 시간(초), 없으면 None"""
+    return db.get_analytics_snapshot_age()
+
+def refresh_analytics_snapshot():
+    """관리자 통계 스냅샷 즉시 갱신"""
+    return db.refresh_analytics_snapshot()
 
 def get_all_users():
     """모든 사용자 정보 로드 (관리자용 - SQLite)"""
@@ -141,6 +246,18 @@ def get_user_info(username):
     """사용자 정보 가져오기 (SQLite)"""
     return db.get_user_info(username)
 
+def load_pending_ids(username):
+    """(오답노트 단어 id set, 진행 중 세션 단어 id set) (SQLite)"""
+    return db.load_pending_ids(username)
+
+def has_pending_session(username):
+    """진행 중 세션 존재 여부 (SQLite)"""
+    return db.has_pending_session(username)
+
+def sync_pending_ids(username, wrongs=None, session=None):
+    """세션 로컬 set -> DB 동기화 (SQLite)"""
+    return db.sync_pending_ids(username, wrongs, session)
+
 def manage_session_state(username, action, data):
     """
     진행 중인 세션(pending_session) 관리
@@ -148,50 +265,19 @@ def manage_session_state(username, action, data):
     """
     if action == 'set':
         # data expected to be list of ints or strings
-        new_str = ",".join(str(x) for x in data)
-        update_user_dynamic_fields(username, {'pending_session': new_str})
+        db.update_pending(username, 'pending_session', 'set', data)
         
     elif action == 'remove':
         # data expected to be single id
-        user_info = get_user_info(username)
-        if not user_info: return
-        
-        current_str = user_info.get('pending_session', '')
-        current_ids = [x.strip() for x in current_str.split(',') if x.strip()]
-        str_id = str(data)
-        
-        if str_id in current_ids:
-            current_ids.remove(str_id)
-            new_str = ",".join(current_ids)
-            update_user_dynamic_fields(username, {'pending_session': new_str})
+        db.update_pending(username, 'pending_session', 'remove', [data])
 
 def manage_pending_wrongs(username, action, word_id):
     """
     오답노트(pending_wrongs) 관리
     action: 'add' or 'remove'
     """
-    # 1. 현재 상태 가져오기
-    user_info = get_user_info(username)
-    if not user_info: return
-    
-    current_str = user_info.get('pending_wrongs', '')
-    current_ids = [x.strip() for x in current_str.split(',') if x.strip()]
-    
-    str_id = str(word_id)
-    changed = False
-    
-    if action == 'add':
-        if str_id not in current_ids:
-            current_ids.append(str_id)
-            changed = True
-    elif action == 'remove':
-        if str_id in current_ids:
-            current_ids.remove(str_id)
-            changed = True
-            
-    if changed:
-        new_str = ",".join(current_ids)
-        update_user_dynamic_fields(username, {'pending_wrongs': new_str})
+    if action in ('add', 'remove'):
+        db.update_pending(username, 'pending_wrongs', action, [word_id])
 
 def update_user_dynamic_fields(username, updates):
     """사용자 동적 필드 업데이트 (SQLite)"""
@@ -305,6 +391,7 @@ def update_schedule(word_id, is_correct, progress_df, today):
 
     JUMP_INTERVAL = 240 # 8개월 (약 240일)
     RETIRE_DATE = datetime(9999, 12, 31).date()
+    track_dirty = 'is_dirty' in progress_df.columns # 변경 행 추적 (save_user_progress용)
 
     if 'word_id' in progress_df.columns and word_id in progress_df['word_id'].values:
         idx = progress_df[progress_df['word_id'] == word_id].index[0]
@@ -318,6 +405,8 @@ def update_schedule(word_id, is_correct, progress_df, today):
         cur_interval = _to_int(progress_df.loc[idx, 'interval'], 0)
         
         progress_df.loc[idx, 'last_reviewed'] = today
+        if track_dirty:
+            progress_df.loc[idx, 'is_dirty'] = True
         cur_fail = _to_int(progress_df.loc[idx, 'fail_count'], 0)
 
         if is_correct:
@@ -370,6 +459,8 @@ def update_schedule(word_id, is_correct, progress_df, today):
                 'fail_count': 1,
                 'next_review': today + timedelta(days=1)
             }
+        if track_dirty:
+            new_row['is_dirty'] = True
         progress_df = pd.concat([progress_df, pd.DataFrame([new_row])], ignore_index=True)
 
     # 타입 정리 (안전)
@@ -383,43 +474,45 @@ def update_schedule(word_id, is_correct, progress_df, today):
     return progress_df
 
 # --- 9. 기타 유틸 ---
+@tracing.traced()
 def get_random_question(level, exclude_ids=[]):
     """지정된 레벨의 랜덤 문제 1개 반환 (없으면 근접 레벨 탐색)"""
-    df = load_data()
-    if df is None or df.empty:
+    store = get_vocab_store()
+    if store.empty:
         return None
-    
-    # 1. 해당 레벨의 단어 필터링 (exclude_ids 제외)
-    base_pool = df
-    if exclude_ids:
-        base_pool = df[~df['id'].isin(exclude_ids)]
-        if base_pool.empty: base_pool = df # 제외 후 없으면 전체에서 (중복 허용)
 
-    candidates = base_pool[base_pool['level'] == level]
-    
+    # 1. 레벨 버킷에서 exclude_ids 제외 (제외 후 전부 비면 제외 없이 - 중복 허용)
+    exclude = set(exclude_ids) if exclude_ids else None
+    if exclude and len(exclude) >= len(store.ids) and all(int(i) in exclude for i in store.ids):
+        exclude = None
+
+    def _level_pool(lv):
+        pos = store.level_positions(lv)
+        if exclude:
+            pos = pos[~np.isin(store.ids[pos], list(exclude))]
+        return pos
+
+    candidates = _level_pool(level)
+
     # 2. 해당 레벨에 단어가 없으면 -> 가장 가까운 레벨 찾기
-    if candidates.empty:
-        available_levels = base_pool['level'].unique()
-        if len(available_levels) > 0:
-            # 현재 level과 차이가 가장 적은 레벨 찾기
-            nearest_level = min(available_levels, key=lambda x: abs(x - level))
-            candidates = base_pool[base_pool['level'] == nearest_level]
-        else:
-            candidates = base_pool # 정말 데이터가 없는 경우
+    if len(candidates) == 0:
+        for lv in sorted(store.level_buckets, key=lambda x: abs(x - level)):
+            candidates = _level_pool(lv)
+            if len(candidates) > 0:
+                break
 
-    if candidates.empty:
+    if len(candidates) == 0:
         return None
-    
+
     # [FIX] 품질 개선: "The word '...' is important." 같은 더미 문장 제외 우선순위 적용
-    # 정규식으로 더미 패턴 확인 (The word '...' is important.)
-    dummy_pattern = r"^The word '.*' is important\.$"
-    good_candidates = candidates[~candidates['sentence_en'].str.contains(dummy_pattern, regex=True, na=False)]
-    
-    if not good_candidates.empty:
-        return good_candidates.sample(n=1).iloc[0].to_dict()
-        
-    return candidates.sample(n=1).iloc[0].to_dict()
+    # (더미 여부는 스토어 생성 시 1번만 계산)
+    good_candidates = candidates[~store.is_dummy[candidates]]
+    if len(good_candidates) > 0:
+        return store.record_at(random.choice(good_candidates))
+
+    return store.record_at(random.choice(candidates))
 
+@tracing.traced()
 def text_to_speech(word_id, text):
     """
     1) 텍스트 해시 기반 파일명 확인: tts_audio/{word_id}_{hash}.mp3
@@ -444,9 +537,12 @@ def text_to_speech(word_id, text):
     if os.path.exists(file_path):
         try:
             with open(file_path, "rb") as f:
-                return f.read()
+                data = f.read()
+            metrics.TTS_CACHE.inc(result="hit")
+            return data
         except:
             pass
+    metrics.TTS_CACHE.inc(result="miss")
 
     # 2. 없으면 새로 생성해야 함. 그 전에 구버전 파일 청소
     # (예: 101.mp3 또는 101_oldhash.mp3)
@@ -465,13 +561,16 @@ def text_to_speech(word_id, text):
 
     # 3. gTTS로 생성 후 저장
     try:
-        tts = gTTS(text=text, lang='en')
-        tts.save(file_path)
+        with metrics.TTS_SYNTHESIS_SECONDS.time():
+            tts = gTTS(text=text, lang='en')
+            tts.save(file_path)
         with open(file_path, "rb") as f:
             return f.read()
     except:
+        metrics.TTS_SYNTHESIS_ERRORS.inc()
         return None
 
+@tracing.traced()
 def get_masked_sentence(sentence, target_word, root_word=None):
     if not isinstance(sentence, str): return sentence
     words_to_mask = [str(target_word)]
@@ -483,11 +582,13 @@ def get_masked_sentence(sentence, target_word, root_word=None):
     pattern = re.compile(pattern_str, re.IGNORECASE)
     return pattern.sub(" [ ❓ ] ", sentence)
 
+@tracing.traced()
 def get_highlighted_sentence(sentence, target_word):
     if not isinstance(sentence, str): return sentence
     pattern = re.compile(re.escape(target_word), re.IGNORECASE)
     return pattern.sub(r"<span style='color: #E74C3C; font-weight: 900; font-size: 1.2em;'>\g<0></span>", sentence)
 
+@tracing.traced()
 def get_bolded_korean_meaning(sentence_ko, meaning):
     """
     한글 뜻(meaning)에 포함된 단어가 예문 해석(sentence_ko)에 있으면 볼드체 처리
@@ -546,77 +647,69 @@ def focus_element(target_type="input"):
     ) 
 
 
-def adjust_level_based_on_stats():
+LEVEL_ADJUST_THRESHOLD = 15        # 누적 점수 +/- 이 값 이상이면 단어 레벨 1단계 조정
+
+def score_word_answers(word_ids, user_levels, is_correct, counts, word_levels):
+    """
+    답안(또는 답안 히스토그램)별 Weighted Gap 점수를 단어별로 합산 (벡터 연산)
+    - word_levels: 단어 id -> 현재 레벨 (pd.Series)
+    - counts: 같은 (단어, 학생 레벨, 정오) 답안 수 (원본 로그 1행이면 1)
+    반환: 단어 id -> 누적 점수 (pd.Series, 현재 단어장에 없는 단어 제외)
+    """
+    word_ids = np.asarray(word_ids)
+    cur_word_lv = word_levels.reindex(word_ids).to_numpy(dtype=float)
+    known = ~np.isnan(cur_word_lv)
+    # 로그 당시 학생 레벨과 단어 현재 레벨의 차이
+    gap = np.asarray(user_levels, dtype=float)[known] - cur_word_lv[known]
+    correct = np.asarray(is_correct)[known].astype(bool)
+
+    score = np.zeros(len(gap))
+    # 정답: 저레벨 학생이 맞춤(쉬움) -|gap|*2, 같은 레벨 -0.5, 고레벨이 맞춤 -> 변동 없음
+    score[correct & (gap < 0)] = -np.abs(gap[correct & (gap < 0)]) * 2.0
+    score[correct & (gap == 0)] = -0.5
+    # 오답: 고레벨 학생이 틀림(어려움) +|gap|*2, 같은 레벨 +0.5, 저레벨이 틀림 -> 변동 없음
+    score[~correct & (gap > 0)] = np.abs(gap[~correct & (gap > 0)]) * 2.0
+    score[~correct & (gap == 0)] = 0.5
+    score *= np.asarray(counts, dtype=float)[known]
+
+    return pd.Series(score).groupby(word_ids[known]).sum()
+
+def level_updates_from_scores(scores, word_levels, threshold=LEVEL_ADJUST_THRESHOLD):
+    """누적 점수 -> [(new_level, word_id), ...] (범위 1~30, 변경된 단어만)"""
+    current = word_levels.reindex(scores.index).to_numpy(dtype=float)
+    step = np.where(scores.to_numpy() >= threshold, 1, np.where(scores.to_numpy() <= -threshold, -1, 0))
+    new = np.clip(current + step, 1, 30)
+    changed = new != current
+    return [(int(lv), int(wid)) for lv, wid in zip(new[changed], scores.index[changed])]
+
+def adjust_level_based_on_stats(incremental=True):
     """
     단어 난이도 자동 조정 (Weighted Gap Algorithm)
     - 학생 레벨과 단어 레벨의 차이를 가중치로 사용
     - 고레벨 학생이 틀리면 단어 레벨 상승 (강력)
     - 저레벨 학생이 맞추면 단어 레벨 하락 (강력)
+    - incremental: 지난 실행 이후 새 로그만 읽어 단어별 답안 집계에 합산 (False면 전체 재집계)
     """
     try:
-        logs_df = get_all_study_logs()
-        words_df = load_data()
-        
-        if logs_df.empty or words_df is None:
+        db.accumulate_word_answer_stats(full=not incremental)
+        stats_df = db.load_word_answer_stats()
+        store = get_vocab_store()
+
+        if stats_df.empty or store.empty:
             return 0, "데이터가 부족합니다."
 
         # 단어별 현재 레벨 매핑
-        word_levels = dict(zip(words_df['id'], words_df['level']))
-        
-        # 조정 점수 계산
-        adjustment_scores = {} # word_id -> score
-        
-        # 로그 분석 (최근 1000건 정도만? 아니면 전체? 일단 전체 하되 데이터 많으면 최적화 필요)
-        # 여기선 전체 분석
-        for _, row in logs_df.iterrows():
-            word_id = row['word_id']
-            user_lv = row['level'] # 로그 당시 유저 레벨 (이걸 써야 정확함. 현재 유저 레벨보다 기록 당시 상황이 중요)
-            is_correct = row['is_correct']
-            
-            if word_id not in word_levels: continue
-            
-            cur_word_lv = word_levels[word_id]
-            gap = user_lv - cur_word_lv
-            
-            score = 0
-            if is_correct:
-                if gap < 0: # 저레벨 학생이 맞춤 (쉬움)
-                    score = -abs(gap) * 2.0
-                elif gap == 0:
-                    score = -0.5
-                # gap > 0 (고레벨이 맞춤) -> 당연함 (변동 없음)
-            else:
-                if gap > 0: # 고레벨 학생이 틀림 (어려움)
-                    score = abs(gap) * 2.0
-                elif gap == 0:
-                    score = 0.5
-                # gap < 0 (저레벨이 틀림) -> 당연함 (변동 없음)
-                
-            adjustment_scores[word_id] = adjustment_scores.get(word_id, 0) + score
+        word_levels = pd.Series(store.levels, index=store.ids)
+
+        # 조정 점수 계산 (점수는 현재 단어 레벨 기준이므로 매번 집계에서 다시 계산)
+        scores = score_word_answers(
+            stats_df['word_id'], stats_df['user_level'], stats_df['is_correct'], stats_df['n'], word_levels
+        )
+        updates = level_updates_from_scores(scores, word_levels)
 
-        # 변경 대상 선별 (Threshold: +/- 15점)
-        THRESHOLD = 15
-        updates = []
-        
-        for word_id, score in adjustment_scores.items():
-            current_lv = word_levels[word_id]
-            new_lv = current_lv
-            
-            if score >= THRESHOLD:
-                new_lv += 1
-            elif score <= -THRESHOLD:
-                new_lv -= 1
-                
-            # 범위 제한 (1~30)
-            new_lv = max(1, min(30, new_lv))
-            
-            if new_lv != current_lv:
-                updates.append((new_lv, word_id))
-        
         # DB 업데이트
         if updates:
-            if db.batch_update_vocab_levels(updates):
-                st.cache_data.clear() # 데이터 갱신
+            if db.batch_update_vocab_levels(updates): # vocab 버전 트리거가 캐시 무효화
                 return len(updates), f"{len(updates)}개 단어의 난이도가 재조정되었습니다."
             else:
                 return 0, "DB 업데이트 실패"
@@ -651,26 +744,58 @@ def clear_all_vocabulary():
     """모든 단어 및 진도 초기화 (학생 정보 유지)"""
     return db.clear_vocabulary_data()
 
+def open_excel_rows(file):
+    """
+    엑셀 첫 시트를 openpyxl read-only 모드로 열어 (컬럼 목록, 행 dict 제너레이터) 반환
+    (pd.read_excel처럼 통째로 읽지 않고 한 행씩 스트리밍)
+    """
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    sheet_rows = wb.active.iter_rows(values_only=True)
+    header = next(sheet_rows, None) or ()
+    # 컬럼 이름 공백 제거
+    columns = [str(c).strip() if c is not None else '' for c in header]
+
+    def _rows():
+        try:
+            for values in sheet_rows:
+                if all(v is None for v in values):
+                    continue # 빈 행
+                yield dict(zip(columns, values))
+        finally:
+            wb.close()
+
+    return columns, _rows()
+
 def process_excel_upload(file, reset_mode=False):
     """엑셀 파일 업로드 처리 (reset_mode=True일 경우 기존 단어 삭제)"""
     try:
-        df = pd.read_excel(file)
-        # 컬럼 이름 공백 제거
-        df.columns = [str(c).strip() for c in df.columns]
+        started = time.perf_counter()
+        columns, rows = open_excel_rows(file)
         
-        if 'target_word' not in df.columns or 'meaning' not in df.columns:
+        if 'target_word' not in columns or 'meaning' not in columns:
+            rows.close()
             return False, "엑셀 파일에 'target_word'와 'meaning' 컬럼이 반드시 있어야 합니다."
         
         # [NEW] 초기화 모드
         if reset_mode:
             if not db.clear_vocabulary_data():
+                rows.close()
                 return False, "기존 데이터 초기화 실패"
             
-        added, updated = db.bulk_upsert_words(df)
+        result = db.bulk_upsert_words(rows)
+        added, updated, unchanged, skipped = result['added'], result['updated'], result['unchanged'], result['skipped']
+        total = added + updated + unchanged + skipped
+        rows_per_sec = total / max(time.perf_counter() - started, 1e-9)
+
+        if result['error']:
+            return False, f"오류 발생: {result['error']} (중단 전까지 {added}개 추가, {updated}개 수정 반영됨)"
         
-        msg = f"✅ 처리 완료: {added}개 추가, {updated}개 수정됨"
+        msg = f"✅ 처리 완료: {added}개 추가, {updated}개 수정, {unchanged}개 변경 없음"
         if reset_mode:
             msg = f"✅ 초기화 후 등록 완료: 총 {added}개 단어 등록됨"
+        if skipped:
+            msg += f" ({skipped}개 행 건너뜀: 단어 누락/레벨 형식 오류)"
+        msg += f" · {total:,}행, {rows_per_sec:,.0f} rows/s"
             
         return True, msg
     except Exception as e: